@@ -0,0 +1,185 @@
+#Block handling benchmark: classification and conversion of the blocks of many short pages,
+#table-driven (block_to_block_type / block_to_html_node) versus the previous code, reproduced
+#below: strip() and a startswith chain to classify, an if/elif chain on the type string to
+#dispatch, and a text node -> node loop copied into every converter.
+#The legacy heading, quote and list converters can't render links or images, so the pages
+#here only put those in paragraphs.
+#
+#Usage: python benchmarks/bench_blocks.py [--pages 2000] [--repeat 5]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import profiler
+from corpus import _list, _paragraph, _sentence
+from htmlnode import (LeafNode, ParentNode, block_to_block_type, block_to_html_node, convert_code_block,
+                      convert_image, convert_link, markdown_to_blocks)
+from textnode import text_to_textnodes
+
+
+def legacy_block_type(block):
+    block = block.strip()
+    if block.startswith('#'):
+        return "heading"
+    elif block.startswith('```'):
+        return "code_block"
+    elif block.startswith('>'):
+        return "quote"
+    elif block.startswith('- ') or block[0].isdigit() and block[1:3] == '. ':
+        return "list"
+    elif block.startswith('!['):
+        return "image"
+    elif block.startswith('['):
+        return "link"
+    else:
+        return "paragraph"
+
+
+def legacy_inline(text):
+    with profiler.stage("inline"):
+        return text_to_textnodes(text)
+
+
+def legacy_heading(block):
+    heading_level = block.count('#', 0, block.find(' '))
+    children = []
+    for text_node in legacy_inline(block[heading_level:].strip()):
+        if text_node.text_type == "text":
+            children.append(text_node.text)
+        elif text_node.text_type == "bold":
+            children.append(LeafNode(tag='b', value=text_node.text))
+        elif text_node.text_type == "italic":
+            children.append(LeafNode(tag='i', value=text_node.text))
+    return ParentNode(tag=f'h{heading_level}', children=children)
+
+
+def legacy_paragraph(block):
+    children = []
+    for text_node in legacy_inline(block.strip()):
+        if text_node.text_type == "text":
+            children.append(text_node.text)
+        elif text_node.text_type == "bold":
+            children.append(LeafNode(tag='strong', value=text_node.text))
+        elif text_node.text_type == "italic":
+            children.append(LeafNode(tag='em', value=text_node.text))
+        elif text_node.text_type == "link":
+            children.append(LeafNode(tag='a', value=text_node.text, props={'href': text_node.url}))
+        elif text_node.text_type == "image":
+            children.append(LeafNode(tag='img', value=None, props={'alt': text_node.text, 'src': text_node.url}))
+    return ParentNode(tag='p', children=children)
+
+
+def legacy_quote(block):
+    quoted_text = [line.lstrip('> ').strip() for line in block.strip().split('\n') if line.strip().startswith('>')]
+    children = []
+    for text_node in legacy_inline(' '.join(quoted_text)):
+        if text_node.text_type == "text":
+            children.append(text_node.text)
+        elif text_node.text_type == "bold":
+            children.append(LeafNode(tag='strong', value=text_node.text))
+        elif text_node.text_type == "italic":
+            children.append(LeafNode(tag='em', value=text_node.text))
+    return ParentNode(tag='blockquote', children=children)
+
+
+def legacy_list(block):
+    items = block.strip().split('\n')
+    tag = 'ol' if items[0].strip().startswith('1.') else 'ul'
+    children = []
+    for item in items:
+        li_children = []
+        for text_node in legacy_inline(item.lstrip('- 1234567890.').strip()):
+            if text_node.text_type == "text":
+                li_children.append(text_node.text)
+            elif text_node.text_type == "bold":
+                li_children.append(LeafNode(tag='strong', value=text_node.text))
+            elif text_node.text_type == "italic":
+                li_children.append(LeafNode(tag='em', value=text_node.text))
+        children.append(ParentNode(tag='li', children=li_children))
+    return ParentNode(tag=tag, children=children)
+
+
+LEGACY_STAGES = {block_type: f"convert:{block_type}" for block_type in
+                 ("heading", "paragraph", "code_block", "quote", "list", "image", "link")}
+
+
+def legacy_block_to_html_node(block):
+    block_type = legacy_block_type(block)
+    with profiler.stage(LEGACY_STAGES.get(block_type, "convert")):
+        if block_type == "heading":
+            return legacy_heading(block)
+        elif block_type == "paragraph":
+            return legacy_paragraph(block)
+        elif block_type == "code_block":
+            return convert_code_block(block)
+        elif block_type == "quote":
+            return legacy_quote(block)
+        elif block_type == "list":
+            return legacy_list(block)
+        elif block_type == "image":
+            return convert_image(block)
+        elif block_type == "link":
+            return convert_link(block)
+
+
+#A short page: title, a couple of subheadings, one-to-three sentence paragraphs, a small
+#list, a quote and a code block. Paragraphs never open with a link or image, which the
+#legacy classifier took for a lone link/image block and truncated.
+def short_page(rng, index):
+    blocks = [f"# Page {index}"]
+    for i in range(3):
+        blocks.append(f"## {_sentence(rng, 4, links=False)}")
+        paragraph = _paragraph(rng, rng.randint(1, 3))
+        blocks.append(f"So {paragraph}" if paragraph[0] in '[!' else paragraph)
+        if i == 0:
+            blocks.append(_list(rng, 4, ordered=index % 2 == 1, links=False))
+        elif i == 1:
+            blocks.append("> " + _sentence(rng, 10, links=False))
+        else:
+            blocks.append("```\nprint('hello')\n```")
+    return "\n\n".join(blocks)
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block classification and dispatch benchmark")
+    parser.add_argument("--pages", type=int, help="Short pages to convert", default=2000)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    blocks = [block for index in range(args.pages) for block in markdown_to_blocks(short_page(rng, index))]
+    for block in blocks:
+        if legacy_block_to_html_node(block).to_html() != block_to_html_node(block).to_html():
+            raise SystemExit(f"Output differs for block: {block!r}")
+
+    rows = [
+        ("classify", lambda: [legacy_block_type(block) for block in blocks],
+         lambda: [block_to_block_type(block) for block in blocks]),
+        ("convert", lambda: [legacy_block_to_html_node(block) for block in blocks],
+         lambda: [block_to_html_node(block) for block in blocks]),
+    ]
+    print(f"{len(blocks)} blocks from {args.pages} pages")
+    print(f"{'step':<10} {'legacy s':>10} {'table s':>10} {'legacy us/blk':>14} {'table us/blk':>13} {'speedup':>8}")
+    for name, legacy, table in rows:
+        old = best_of(legacy, args.repeat)
+        new = best_of(table, args.repeat)
+        print(f"{name:<10} {old:>10.4f} {new:>10.4f} {old / len(blocks) * 1e6:>14.2f} {new / len(blocks) * 1e6:>13.2f}"
+              f" {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
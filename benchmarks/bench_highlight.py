@@ -0,0 +1,88 @@
+#Syntax highlighting benchmark on code-heavy pages (the "code" corpus mix: API-doc style
+#pages, each with eight fenced snippets drawn from a small pool, one in five made unique).
+#Time to convert every page to HTML with:
+#  plain       - the previous convert_code_block (reproduced below: no escaping, no highlighting)
+#  cold        - highlighting with an empty cache, in memory and on disk
+#  warm disk   - a fresh HighlightCache over the disk cache the cold run filled (the next build)
+#  warm memory - the same HighlightCache again (a worker's later batches, or the daemon)
+#
+#Usage: python benchmarks/bench_highlight.py [--pages 1000] [--repeat 5]
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import highlight
+import htmlnode
+from corpus import make_page
+from htmlnode import LeafNode, ParentNode, markdown_to_html_node
+
+
+def legacy_code_block(block):
+    code_content = block.strip('`').strip()
+    code_node = LeafNode(tag='code', value=code_content)
+    return ParentNode(tag='pre', children=[code_node])
+
+
+def convert_all(pages):
+    for markdown in pages:
+        markdown_to_html_node(markdown).to_html()
+
+
+def best_of(func, repeat, setup=None):
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Syntax highlighting benchmark")
+    parser.add_argument("--pages", type=int, help="Pages to convert", default=1000)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    pages = [make_page(rng, "code", i) for i in range(args.pages)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'highlight')
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            highlight.configure(cache_dir)
+
+        def fresh():
+            highlight.configure(cache_dir)
+
+        converters = htmlnode.BLOCK_CONVERTERS
+        original = converters["code_block"]
+        converters["code_block"] = legacy_code_block
+        try:
+            plain = best_of(lambda: convert_all(pages), args.repeat)
+        finally:
+            converters["code_block"] = original
+
+        cold_time = best_of(lambda: convert_all(pages), args.repeat, cold)
+        misses = highlight.active.misses
+        disk = best_of(lambda: convert_all(pages), args.repeat, fresh)
+        memory = best_of(lambda: convert_all(pages), args.repeat)
+
+    print(f"{args.pages} pages, {misses} distinct snippets highlighted")
+    print(f"{'run':<12} {'s':>8} {'vs plain':>9}")
+    for name, elapsed in (("plain", plain), ("cold", cold_time), ("warm disk", disk), ("warm memory", memory)):
+        print(f"{name:<12} {elapsed:>8.3f} {elapsed / plain:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
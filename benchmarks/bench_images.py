@@ -0,0 +1,108 @@
+#Image stage benchmark on a static dir of many images (synthetic PNGs: a real header
+#followed by filler, so files have realistic sizes without needing an encoder):
+#  cold        - first sync_images: every image's header is read and its bytes hashed
+#  unchanged   - the next sync: size and mtime match the index, no image is opened
+#  lost index  - images.json deleted: every image is hashed again, and with Pillow its
+#                variants come out of the content-addressed cache instead of being redone
+#  render      - converting pages that embed the images, without and with the image index
+#                (the cost of adding width/height/srcset to every <img>)
+#
+#Usage: python benchmarks/bench_images.py [--images 2000] [--size 200] [--jobs 1] [--repeat 3]
+import argparse
+import logging
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import images
+from htmlnode import markdown_to_html_node
+
+
+def png(width, height, size):
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    header = b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+    return header + os.urandom(max(0, size - len(header)))
+
+
+def best_of(func, repeat, setup=None):
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image stage benchmark")
+    parser.add_argument("--images", type=int, help="Images in the static dir", default=2000)
+    parser.add_argument("--size", type=int, help="Size of each image in KB", default=200)
+    parser.add_argument("--jobs", type=int, help="Worker processes (0 = one per CPU)", default=1)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=3)
+    args = parser.parse_args()
+    logging.getLogger("ssg").setLevel(logging.WARNING)
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as root:
+        static = os.path.join(root, 'static')
+        dest = os.path.join(root, 'public')
+        index_path = os.path.join(root, '.ssg', 'images.json')
+        for i in range(args.images):
+            directory = os.path.join(static, 'images', f"d{i // 100}")
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"i{i}.png"), 'wb') as f:
+                f.write(png(rng.randint(200, 3000), rng.randint(200, 2000), args.size * 1024))
+
+        def sync():
+            images.sync_images(static, dest, index_path, jobs=args.jobs)
+
+        def clean():
+            shutil.rmtree(os.path.join(root, '.ssg'), ignore_errors=True)
+            shutil.rmtree(dest, ignore_errors=True)
+
+        def lose_index():
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+        cold = best_of(sync, args.repeat, clean)
+        sync()
+        unchanged = best_of(sync, args.repeat)
+        lost = best_of(sync, args.repeat, lose_index)
+
+        pages = [f"# Page {p}\n\n" + "\n\n".join(
+            f"Figure {j}: ![fig](/images/d{k // 100}/i{k}.png)" for j, k in
+            enumerate(rng.randrange(args.images) for _ in range(10))) for p in range(500)]
+
+        def render():
+            for markdown in pages:
+                markdown_to_html_node(markdown).to_html()
+
+        def render_annotated():
+            for markdown in pages:
+                node = markdown_to_html_node(markdown)
+                images.active.annotate(node)
+                node.to_html()
+
+        plain = best_of(render, args.repeat)
+        annotated = best_of(render_annotated, args.repeat)
+
+    print(f"{args.images} images of {args.size} KB, Pillow {'installed' if images.Image else 'not installed'}")
+    print(f"{'step':<11} {'s':>8}")
+    for name, elapsed in (("cold", cold), ("unchanged", unchanged), ("lost index", lost)):
+        print(f"{name:<11} {elapsed:>8.3f}")
+    print(f"render 500 pages x 10 images: {plain:.3f} s plain, {annotated:.3f} s annotated "
+          f"({annotated / plain:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
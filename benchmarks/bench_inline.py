@@ -0,0 +1,58 @@
+#Inline parsing benchmark: times text_to_textnodes on single paragraphs of growing size
+#and compares it with the old split_nodes_delimiter -> image -> link pipeline.
+#A linear parser keeps a flat us/KB column as the paragraph grows.
+#
+#Usage: python benchmarks/bench_inline.py [--sizes 100,200,400,800] [--repeat 3]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from textnode import TextNode, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+
+
+SENTENCE = ("Plain words with **bold text** and *italic text*, a [link](https://example.com/page) "
+            "and an ![image](/images/pic.png) in the middle of a long line. ")
+
+
+def make_paragraph(size_kb):
+    repeats = size_kb * 1024 // len(SENTENCE) + 1
+    return (SENTENCE * repeats)[:size_kb * 1024]
+
+
+def three_pass(text):
+    return split_nodes_link(split_nodes_image(split_nodes_delimiter([TextNode(text, "text")])))
+
+
+def best_of(func, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline tokenizer scaling benchmark")
+    parser.add_argument("--sizes", type=str, help="Paragraph sizes in KB, comma separated", default="100,200,400,800")
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=3)
+    parser.add_argument("--skip-old", action="store_true", help="Don't time the old three-pass pipeline")
+    args = parser.parse_args()
+
+    print(f"{'size KB':>8} {'single-pass s':>14} {'us/KB':>8} {'three-pass s':>13} {'us/KB':>8}")
+    for size_kb in (int(s) for s in args.sizes.split(',')):
+        text = make_paragraph(size_kb)
+        new = best_of(text_to_textnodes, text, args.repeat)
+        row = f"{size_kb:>8} {new:>14.4f} {new / size_kb * 1e6:>8.1f}"
+        if not args.skip_old:
+            old = best_of(three_pass, text, args.repeat)
+            row += f" {old:>13.4f} {old / size_kb * 1e6:>8.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#Node memory benchmark: per-node overhead of the slotted HTMLNode representation versus
+#the previous dict-backed one (reproduced below as LegacyLeafNode), and the traced peak
+#of markdown_to_html_node on a large generated document.
+#
+#Usage: python benchmarks/bench_nodes.py [--nodes 200000] [--paragraphs 20000]
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from htmlnode import LeafNode, markdown_to_html_node
+
+
+class LegacyLeafNode:
+    #The old representation: a __dict__ per instance plus a fresh list and dict on every leaf.
+    def __init__(self, tag, value=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = []
+        self.props = props if props is not None else {}
+
+
+def traced(build):
+    tracemalloc.start()
+    result = build()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, peak
+
+
+def count_nodes(node):
+    if type(node) is str:
+        return 0, 1
+    nodes, strings = 1, 0
+    for child in node.children:
+        child_nodes, child_strings = count_nodes(child)
+        nodes += child_nodes
+        strings += child_strings
+    return nodes, strings
+
+
+def make_document(paragraphs):
+    blocks = []
+    for i in range(paragraphs):
+        blocks.append(f"## Section {i}")
+        blocks.append(f"Some text with **bold {i}**, *italic* and a [link](/page/{i}) in it, then more text.")
+        blocks.append(f"- item {i}\n- item with **bold**\n- last item")
+    return "\n\n".join(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTMLNode memory benchmark")
+    parser.add_argument("--nodes", type=int, help="Text leaves to allocate per representation", default=200000)
+    parser.add_argument("--paragraphs", type=int, help="Sections in the generated document", default=20000)
+    args = parser.parse_args()
+
+    texts = [f"text run {i}" for i in range(args.nodes)]
+    print(f"Per text run ({args.nodes} runs, string payload excluded):")
+    for name, build in (
+        ("legacy dict leaf", lambda: [LegacyLeafNode(None, text) for text in texts]),
+        ("slotted leaf", lambda: [LeafNode(None, text) for text in texts]),
+        ("plain str child", lambda: list(texts)),
+    ):
+        _, size, _ = traced(build)
+        print(f"  {name:<18} {size / args.nodes:>7.1f} bytes")
+
+    document = make_document(args.paragraphs)
+    tree, size, peak = traced(lambda: markdown_to_html_node(document))
+    nodes, strings = count_nodes(tree)
+    print(f"Document: {len(document) / 1e6:.1f} MB markdown, {nodes} nodes + {strings} string runs")
+    print(f"  tree size {size / 1e6:.1f} MB, peak while parsing {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#Full build benchmark: build_pages (find every page, then generate them in batches) against
+#the pipelined build (scan, read, render and write overlapping), at each --jobs value.
+#The corpus is generated once; every run writes into a fresh output directory.
+#On a local disk with a warm page cache reads cost next to nothing, so expect the two to be
+#close here; the pipeline pays off when reads are slow (network filesystems, cold caches).
+#
+#Usage: python benchmarks/bench_pipeline.py [--pages 2000] [--jobs 1,4] [--repeat 3]
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from corpus import generate_corpus
+from main import build_pages, find_pages
+from pipeline import PipelinedBuild
+
+
+TEMPLATE = '<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>'
+
+
+def best_of(func, out_dir, repeat):
+    best = None
+    for _ in range(repeat):
+        shutil.rmtree(out_dir, ignore_errors=True)
+        start = time.perf_counter()
+        failures = func(out_dir)
+        elapsed = time.perf_counter() - start
+        if failures:
+            raise SystemExit(f"Build failed: {failures[0]}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched versus pipelined full build benchmark")
+    parser.add_argument("--pages", type=int, help="Pages in the corpus", default=2000)
+    parser.add_argument("--mix", type=str, help="Content mix (see corpus.py)", default="mixed")
+    parser.add_argument("--jobs", type=str, help="Comma separated worker counts to try", default="1,4")
+    parser.add_argument("--readers", type=int, help="Reader threads for the pipeline", default=4)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("ssg").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, 'content')
+        out_dir = os.path.join(root, 'public')
+        template = os.path.join(root, 'template.html')
+        generate_corpus(content, args.pages, args.mix)
+        with open(template, 'w') as f:
+            f.write(TEMPLATE)
+
+        print(f"{args.pages} pages ({args.mix})")
+        print(f"{'jobs':>4} {'batched s':>10} {'pipelined s':>12} {'speedup':>8}")
+        for jobs in (int(value) for value in args.jobs.split(',')):
+            batched = best_of(lambda dest: build_pages(find_pages(content, dest), template, jobs,
+                                                       content_root=content), out_dir, args.repeat)
+            pipelined = best_of(lambda dest: PipelinedBuild(content, template, dest, jobs, args.readers).run(),
+                                out_dir, args.repeat)
+            print(f"{jobs:>4} {batched:>10.3f} {pipelined:>12.3f} {batched / pipelined:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
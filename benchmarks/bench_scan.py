@@ -0,0 +1,96 @@
+#Content discovery benchmark on a large synthetic tree (many small .md files plus other files
+#spread over nested directories):
+#  find_pages   - the previous listdir + isfile/isdir walk (reproduced below) against scandir
+#  unchanged    - telling which pages changed since the last build: hashing every page, as
+#                 incremental builds used to, against comparing with the saved TreeSnapshot
+#
+#Usage: python benchmarks/bench_scan.py [--files 100000] [--repeat 3]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from main import find_pages
+from manifest import hash_file
+from scanner import TreeSnapshot
+
+
+def legacy_find_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
+        item_full_path = os.path.join(dir_path_content, item)
+
+        if os.path.isfile(item_full_path) and item.endswith('.md'):
+            dest_file_name = item.replace('.md', '.html')
+            pages.append((item_full_path, os.path.join(dest_dir_path, dest_file_name)))
+        elif os.path.isdir(item_full_path):
+            pages.extend(legacy_find_pages(item_full_path, os.path.join(dest_dir_path, item)))
+    return pages
+
+
+#files spread 50 to a directory, 20 directories to a parent; one in five is an image.
+def make_tree(root, files):
+    old = time.time_ns() - 60 * 10 ** 9
+    for i in range(files):
+        directory = os.path.join(root, f"s{i // 1000}", f"d{i // 50 % 20}")
+        if i % 50 == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"f{i}.png" if i % 5 == 4 else f"f{i}.md")
+        with open(path, 'w') as f:
+            f.write(f"# Page {i}\n\nSome text for page {i}.\n")
+        os.utime(path, ns=(old, old))
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content discovery benchmark")
+    parser.add_argument("--files", type=int, help="Files in the tree", default=100000)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, 'content')
+        dest = os.path.join(root, 'public')
+        make_tree(content, args.files)
+        if legacy_find_pages(content, dest) != find_pages(content, dest):
+            raise SystemExit("find_pages results differ")
+
+        snapshot_path = os.path.join(root, 'pages.json')
+        TreeSnapshot.scan(snapshot_path, content, '.md').save()
+
+        def hash_all():
+            for src_path, _ in legacy_find_pages(content, dest):
+                hash_file(src_path)
+
+        def compare_snapshot():
+            previous = TreeSnapshot.load(snapshot_path)
+            current = TreeSnapshot.scan(snapshot_path, content, '.md')
+            changed = [source for source, state in current.files.items() if not previous.unchanged(source, state)]
+            if changed:
+                raise SystemExit(f"{len(changed)} page(s) unexpectedly changed")
+
+        rows = [("find_pages", lambda: legacy_find_pages(content, dest), lambda: find_pages(content, dest)),
+                ("unchanged", hash_all, compare_snapshot)]
+        print(f"{args.files} files, {len(find_pages(content, dest))} pages")
+        print(f"{'step':<11} {'before s':>9} {'after s':>9} {'speedup':>8}")
+        for name, before, after in rows:
+            old = best_of(before, args.repeat)
+            new = best_of(after, args.repeat)
+            print(f"{name:<11} {old:>9.3f} {new:>9.3f} {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#Template fill and write benchmark on many short pages, with content already rendered (as
+#served from the page cache) so only the template and the write are measured:
+#  before - render() into a StringIO, join, encode the whole page, one write (reproduced below)
+#  after  - render_bytes(): pre-encoded template text plus the encoded fields, one os.writev
+#Timed as the fill alone, then fill and write into an empty directory (every page written)
+#and again over its own output (every page compared and left alone).
+#
+#Usage: python benchmarks/bench_template_write.py [--pages 5000] [--repeat 5]
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from corpus import _paragraph, _sentence
+from htmlnode import markdown_to_html_node
+from template import load_template
+from writer import write_if_changed
+
+
+def legacy_write_if_changed(path, data):
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + '.write-tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def best_of(func, repeat, setup=None):
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template fill and write benchmark")
+    parser.add_argument("--pages", type=int, help="Pages to write", default=5000)
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    template = load_template(os.path.join(HERE, '..', 'template.html'))
+    contexts = []
+    for i in range(args.pages):
+        markdown = f"# Page {i}\n\n{_paragraph(rng, 3)}\n\n## {_sentence(rng, 4)}\n\n{_paragraph(rng, 2)}"
+        contexts.append({"Title": f"Page {i}", "Content": markdown_to_html_node(markdown).to_html()})
+
+    with tempfile.TemporaryDirectory() as root:
+        targets = [os.path.join(root, 'out', f"p{i}.html") for i in range(args.pages)]
+
+        def fresh():
+            shutil.rmtree(os.path.join(root, 'out'), ignore_errors=True)
+            os.makedirs(os.path.join(root, 'out'))
+
+        def legacy_fill(context):
+            page = io.StringIO()
+            template.render(page, context)
+            return page.getvalue().encode('utf-8')
+
+        rows = []
+        for name, fill, write in (("before", legacy_fill, legacy_write_if_changed),
+                                  ("after", template.render_bytes, write_if_changed)):
+            def fill_only():
+                for context in contexts:
+                    fill(context)
+
+            def fill_and_write():
+                for path, context in zip(targets, contexts):
+                    write(path, fill(context))
+
+            rows.append((name, best_of(fill_only, args.repeat), best_of(fill_and_write, args.repeat, fresh),
+                         best_of(fill_and_write, args.repeat)))
+
+    print(f"{args.pages} pages, {sum(len(c['Content']) for c in contexts) // args.pages} bytes of content each")
+    print(f"{'':<7} {'fill s':>8} {'written s':>10} {'unchanged s':>12}")
+    for name, fill_time, written, unchanged in rows:
+        print(f"{name:<7} {fill_time:>8.3f} {written:>10.3f} {unchanged:>12.3f}")
+    print(f"speedup {rows[0][1] / rows[1][1]:>7.2f}x {rows[0][2] / rows[1][2]:>9.2f}x {rows[0][3] / rows[1][3]:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
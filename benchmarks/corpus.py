@@ -0,0 +1,142 @@
+#Synthetic content trees for the benchmarks.
+#
+#Each mix shapes the markdown differently so one stage of the pipeline dominates:
+#  headings   - many short heading blocks with inline markup
+#  lists      - long bullet and numbered lists
+#  paragraphs - few, very long paragraphs full of inline markup
+#  nested     - ordinary pages spread over a deep directory tree
+#  code       - API reference pages: short prose around many fenced snippets, most of
+#               them drawn from a small pool that recurs from page to page
+#  mixed      - a bit of everything, roughly what a real site looks like
+#
+#Usage: python benchmarks/corpus.py OUT_DIR [--pages 500] [--mix mixed] [--seed 1]
+import argparse
+import os
+import random
+
+
+MIXES = ("headings", "lists", "paragraphs", "nested", "mixed", "code")
+
+WORDS = ("tolkien middle earth ring hobbit shire gandalf frodo mordor elves dwarves mountain river "
+         "journey council fellowship tower wizard dragon treasure forest road").split()
+
+
+def _sentence(rng, words=12, links=True):
+    parts = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.06:
+            word = f"**{word}**"
+        elif roll < 0.12:
+            word = f"*{word}*"
+        elif not links:
+            pass
+        elif roll < 0.15:
+            word = f"[{word}](/{rng.choice(WORDS)}/{i})"
+        elif roll < 0.16:
+            word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+        parts.append(word)
+    return " ".join(parts).capitalize() + "."
+
+
+def _paragraph(rng, sentences):
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _list(rng, items, ordered=False, links=True):
+    return "\n".join(f"{i + 1}. {_sentence(rng, 6, links)}" if ordered else f"- {_sentence(rng, 6, links)}"
+                     for i in range(items))
+
+
+SNIPPETS = (
+    ("python", "from ring import Client\nclient = Client(api_key=\"KEY\")  # reads RING_API_KEY too\n"
+               "for hobbit in client.hobbits.list(limit=10):\n    print(hobbit.name, hobbit.age > 50)"),
+    ("python", "@retry(times=3)\ndef fetch(path, timeout=2.5):\n    \"\"\"Fetch one resource.\"\"\"\n"
+               "    if not path.startswith('/'):\n        raise ValueError(f\"bad path: {path!r}\")\n"
+               "    return session.get(BASE + path, timeout=timeout).json()"),
+    ("javascript", "const client = new Client({ apiKey: process.env.RING_API_KEY });\n"
+                   "// list the first page\nconst page = await client.hobbits.list({ limit: 10 });\n"
+                   "page.items.forEach((h) => console.log(`${h.name} <${h.email}>`));"),
+    ("bash", "# create a hobbit\ncurl -X POST \"$RING_URL/hobbits\" \\\n"
+             "  -H \"Authorization: Bearer $RING_API_KEY\" \\\n  -d '{\"name\": \"Frodo\", \"age\": 50}'"),
+    ("json", "{\n  \"id\": \"hob_123\",\n  \"name\": \"Frodo\",\n  \"age\": 50,\n"
+             "  \"ring_bearer\": true,\n  \"friends\": [\"Sam\", \"Merry\", null]\n}"),
+)
+
+
+def _snippet(rng, index):
+    language, code = rng.choice(SNIPPETS)
+    if rng.random() < 0.2:
+        #Now and then a snippet unique to this page.
+        code = code.replace("10", str(index + 11))
+    return f"```{language}\n{code}\n```"
+
+
+def make_page(rng, mix, index):
+    blocks = [f"# Page {index}: {rng.choice(WORDS).title()}"]
+    if mix == "headings":
+        for i in range(40):
+            blocks.append(f"{'#' * rng.randint(2, 6)} {_sentence(rng, 5)}")
+            blocks.append(_sentence(rng, 8))
+    elif mix == "lists":
+        for i in range(8):
+            blocks.append(_list(rng, 25, ordered=i % 2 == 1))
+    elif mix == "paragraphs":
+        for _ in range(3):
+            blocks.append(_paragraph(rng, 150))
+    elif mix == "code":
+        for i in range(8):
+            blocks.append(f"## {_sentence(rng, 3, links=False)}")
+            blocks.append(_paragraph(rng, 1))
+            blocks.append(_snippet(rng, index))
+    else:
+        for i in range(6):
+            blocks.append(f"## {_sentence(rng, 4)}")
+            blocks.append(_paragraph(rng, 6))
+            roll = i % 3
+            if roll == 0:
+                blocks.append(_list(rng, 5))
+            elif roll == 1:
+                blocks.append("> " + _sentence(rng, 14))
+            else:
+                blocks.append("```\ndef example():\n    return 42\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_path(mix, index):
+    if mix == "nested":
+        #Eight levels deep, fanning out four ways per level.
+        parts = [f"d{(index >> (2 * level)) & 3}" for level in range(8)]
+        return os.path.join(*parts, f"page{index}.md")
+    return os.path.join(f"section{index % 20}", f"page{index}.md")
+
+
+#Write `pages` markdown files of the given mix under out_dir, returns total bytes written.
+def generate_corpus(out_dir, pages=500, mix="mixed", seed=1):
+    rng = random.Random(seed)
+    total = 0
+    for index in range(pages):
+        path = os.path.join(out_dir, page_path(mix, index))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        markdown = make_page(rng, mix, index)
+        with open(path, 'w') as f:
+            f.write(markdown)
+        total += len(markdown.encode('utf-8'))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown content tree")
+    parser.add_argument("out_dir", type=str, help="Directory to write the pages into")
+    parser.add_argument("--pages", type=int, help="Number of pages", default=500)
+    parser.add_argument("--mix", choices=MIXES, help="Shape of the content", default="mixed")
+    parser.add_argument("--seed", type=int, help="Random seed", default=1)
+    args = parser.parse_args()
+
+    total = generate_corpus(args.out_dir, args.pages, args.mix, args.seed)
+    print(f"Wrote {args.pages} pages ({total / 1e6:.2f} MB) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#Benchmark suite for the markdown pipeline.
+#
+#For every content mix (see corpus.py) it generates a synthetic tree and times:
+#  inline    - text_to_textnodes over every block of every page
+#  parse     - markdown_to_html_node for every page
+#  serialize - to_html on the parsed trees
+#  build     - a full generate_page_recursive build to disk
+#and reports throughput in pages/s and MB/s of markdown.
+#
+#Regressions are caught against a stored baseline (timings are machine specific, so keep
+#one baseline per machine / CI runner type):
+#  python benchmarks/suite.py --save-baseline      record benchmarks/baseline.json
+#  python benchmarks/suite.py --compare            exit 1 if any stage got slower than tolerance
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+
+from corpus import MIXES, generate_corpus
+from htmlnode import markdown_to_blocks, markdown_to_html_node
+from main import generate_page_recursive
+from textnode import text_to_textnodes
+
+
+TEMPLATE = '<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>'
+STAGES = ("inline", "parse", "serialize", "build")
+
+
+def read_pages(content_dir):
+    pages = []
+    for directory, _, files in os.walk(content_dir):
+        for name in sorted(files):
+            with open(os.path.join(directory, name), 'r') as f:
+                pages.append(f.read())
+    return pages
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_mix(mix, pages, repeat):
+    with tempfile.TemporaryDirectory() as root:
+        content = os.path.join(root, 'content')
+        template = os.path.join(root, 'template.html')
+        with open(template, 'w') as f:
+            f.write(TEMPLATE)
+        total_bytes = generate_corpus(content, pages, mix)
+        sources = read_pages(content)
+        blocks = [block for source in sources for block in markdown_to_blocks(source)]
+        trees = [markdown_to_html_node(source) for source in sources]
+
+        timings = {
+            "inline": best_of(lambda: [text_to_textnodes(block) for block in blocks], repeat),
+            "parse": best_of(lambda: [markdown_to_html_node(source) for source in sources], repeat),
+            "serialize": best_of(lambda: [tree.to_html() for tree in trees], repeat),
+            "build": best_of(lambda: generate_page_recursive(content, template, os.path.join(root, 'public')), repeat),
+        }
+
+    megabytes = total_bytes / 1e6
+    return {
+        stage: {"seconds": seconds, "pages_per_s": pages / seconds, "mb_per_s": megabytes / seconds}
+        for stage, seconds in timings.items()
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for mix, stages in results.items():
+        for stage, numbers in stages.items():
+            before = baseline.get(mix, {}).get(stage)
+            if not before:
+                continue
+            change = numbers["pages_per_s"] / before["pages_per_s"] - 1
+            flag = "  REGRESSION" if change < -tolerance else ""
+            print(f"{mix:<11} {stage:<10} {before['pages_per_s']:>10.1f} -> {numbers['pages_per_s']:>10.1f} pages/s"
+                  f" ({change:+.1%}){flag}")
+            if flag:
+                regressions.append((mix, stage, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Markdown pipeline benchmark suite")
+    parser.add_argument("--pages", type=int, help="Pages per content mix", default=300)
+    parser.add_argument("--mixes", type=str, help="Comma separated mixes to run", default=",".join(MIXES))
+    parser.add_argument("--repeat", type=int, help="Runs per measurement (best is kept)", default=3)
+    parser.add_argument("--baseline", type=str, help="Baseline file", default=os.path.join(HERE, 'baseline.json'))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, help="Allowed slowdown before flagging, 0.15 = 15%%", default=0.15)
+    parser.add_argument("--json", type=str, help="Also write the raw results here", default=None)
+    args = parser.parse_args()
+
+    #Keep per-page progress out of the timings.
+    logging.getLogger("ssg").setLevel(logging.WARNING)
+
+    results = {}
+    print(f"{'mix':<11} {'stage':<10} {'seconds':>9} {'pages/s':>10} {'MB/s':>8}")
+    for mix in args.mixes.split(','):
+        results[mix] = run_mix(mix, args.pages, args.repeat)
+        for stage in STAGES:
+            numbers = results[mix][stage]
+            print(f"{mix:<11} {stage:<10} {numbers['seconds']:>9.4f} {numbers['pages_per_s']:>10.1f}"
+                  f" {numbers['mb_per_s']:>8.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
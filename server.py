@@ -1,6 +1,212 @@
 import os
+import sys
+import io
 import argparse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+import logging
+import threading
+import urllib.parse
+from functools import partial
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+logger = logging.getLogger("ssg.server")
+
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    "<script>new EventSource('" + RELOAD_PATH + "').onmessage = function () { location.reload(); };</script>"
+)
+
+
+# Precompressed siblings the production handler looks for, best first.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    # Production handler: HTTP/1.1 keep-alive, ETag / Last-Modified validators answered
+    # with 304, .br/.gz siblings served when the client accepts them, and file bodies
+    # sent with socket.sendfile so the kernel copies them straight from the page cache.
+    protocol_version = "HTTP/1.1"
+    timeout = 30  # drop idle keep-alive connections
+    max_age = 300  # Cache-Control max-age for everything but HTML, which always revalidates
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            parts = urllib.parse.urlsplit(self.path)
+            if not parts.path.endswith("/"):
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                new_parts = (parts[0], parts[1], parts[2] + "/", parts[3], parts[4])
+                self.send_header("Location", urllib.parse.urlunsplit(new_parts))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            index = os.path.join(path, "index.html")
+            if not os.path.isfile(index):
+                return self.list_directory(path)
+            path = index
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        ctype = self.guess_type(path)
+        encoding, served_path = self.pick_variant(path)
+        f = open(served_path, "rb")
+        try:
+            fs = os.fstat(f.fileno())
+            etag = f'"{fs.st_size:x}-{fs.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+            if self.not_modified(etag, fs.st_mtime):
+                f.close()
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_validators(etag, fs.st_mtime, ctype)
+                self.end_headers()
+                return None
+
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(fs.st_size))
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_validators(etag, fs.st_mtime, ctype)
+            self.end_headers()
+            return f
+        except Exception:
+            f.close()
+            raise
+
+    def send_validators(self, etag, mtime, ctype):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.send_header("Vary", "Accept-Encoding")
+        if ctype.startswith("text/html"):
+            self.send_header("Cache-Control", "no-cache")
+        else:
+            self.send_header("Cache-Control", f"public, max-age={self.max_age}")
+
+    # Use a precompressed sibling when the client accepts it and it isn't older than the original.
+    def pick_variant(self, path):
+        accepted = {
+            token.split(";", 1)[0].strip().lower()
+            for token in self.headers.get("Accept-Encoding", "").split(",")
+        }
+        mtime = os.stat(path).st_mtime_ns
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding in accepted:
+                try:
+                    if os.stat(path + suffix).st_mtime_ns >= mtime:
+                        return encoding, path + suffix
+                except FileNotFoundError:
+                    continue
+        return None, path
+
+    def not_modified(self, etag, mtime):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*"
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+        return False
+
+    def copyfile(self, source, outputfile):
+        # Zero-copy for real files; socket.sendfile falls back to send() where sendfile is unavailable.
+        if isinstance(source, io.BufferedReader):
+            self.connection.sendfile(source)
+        else:
+            super().copyfile(source, outputfile)
+
+
+class Reloader:
+    # Shared between the watch thread and every open /__livereload stream.
+    # Each rebuild bumps the generation; streams wake up and tell their browser to reload.
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    # Serves the site like SimpleHTTPRequestHandler, plus a server-sent events stream
+    # that fires after every rebuild and a small script injected into HTML pages to listen to it.
+    reloader = None
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            return self.stream_reloads()
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            return self.send_page(path)
+        return super().do_GET()
+
+    def send_page(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        marker = body.rfind(b"</body>")
+        script = RELOAD_SCRIPT.encode()
+        body = body[:marker] + script + body[marker:] if marker != -1 else body + script
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.close_connection = True
+
+        generation = self.reloader.generation
+        try:
+            while True:
+                latest = self.reloader.wait(generation, timeout=15)
+                # A comment line doubles as a keepalive that notices closed tabs.
+                self.wfile.write(b"data: reload\n\n" if latest != generation else b": ping\n\n")
+                self.wfile.flush()
+                generation = latest
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+def watch_and_rebuild(reloader, content, template, dest, static=None, graph=None, index=None):
+    from main import rebuild_paths
+    from watcher import Watcher
+
+    roots = [content, template] + ([static] if static else [])
+    for changed in Watcher(roots):
+        logger.info("Detected %d changed file(s), rebuilding", len(changed))
+        # A rebuild that blows up (bad template, unreadable state) must not end the watch thread:
+        # log it and keep watching, so the next save gets another try
+        try:
+            failures = rebuild_paths(changed, content, template, dest, static, graph, index)
+        except Exception:
+            logger.exception("Rebuild failed")
+        else:
+            if failures:
+                logger.warning("%d page(s) failed to rebuild", len(failures))
+        reloader.notify()
 
 
 def run(
@@ -9,20 +215,91 @@ def run(
     port=8888,
     directory=None,
 ):
-    if directory:  # Change the current working directory if directory is specified
-        os.chdir(directory)
+    if directory:
+        # Resolved per request rather than chdir'd into, so a build published with --atomic
+        # (which swaps the directory for a new one) is picked up without a restart
+        handler_class = partial(handler_class, directory=os.path.abspath(directory))
     server_address = ("", port)
     httpd = server_class(server_address, handler_class)
     print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
     httpd.serve_forever()
 
 
+# Build the site once (incrementally), then keep rebuilding changed pages in-process
+# while serving, pushing a reload to connected browsers after each rebuild.
+def run_watch(port, directory, content, template, static=None, state_dir=None, verbosity=0, log_format="text"):
+    from assets import sync_assets
+    from depgraph import DependencyGraph
+    from main import configure_logging, generate_pages_incremental
+    from siteindex import SiteIndex
+
+    configure_logging(verbosity, log_format)
+
+    directory = os.path.abspath(directory)
+    content = os.path.abspath(content)
+    template = os.path.abspath(template)
+    static = os.path.abspath(static) if static else None
+    state_dir = state_dir or os.path.join(os.path.dirname(template), ".ssg")
+
+    generate_pages_incremental(content, template, directory, os.path.join(state_dir, "manifest.json"))
+    if static:
+        sync_assets(static, directory, os.path.join(state_dir, "assets.json"))
+
+    # The graph the incremental build just saved tells the watcher exactly which pages a template edit touches;
+    # the site index is kept current alongside it
+    graph = DependencyGraph.load(os.path.join(state_dir, "depgraph.json"))
+    index = SiteIndex(os.path.join(state_dir, "site.db"))
+
+    reloader = Reloader()
+    LiveReloadHandler.reloader = reloader
+    watch_thread = threading.Thread(
+        target=watch_and_rebuild, args=(reloader, content, template, directory, static, graph, index), daemon=True
+    )
+    watch_thread.start()
+    print(f"Watching {content} and {template} for changes...")
+    run(server_class=ThreadingHTTPServer, handler_class=LiveReloadHandler, port=port, directory=directory)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="HTTP Server")
     parser.add_argument(
         "--dir", type=str, help="Directory to serve files from", default="."
     )
     parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--watch", action="store_true", help="Rebuild changed pages and live-reload browsers while serving"
+    )
+    parser.add_argument("--content", type=str, help="Markdown sources to watch", default="content")
+    parser.add_argument("--template", type=str, help="Template to watch", default="template.html")
+    parser.add_argument("--static", type=str, help="Static assets to watch and copy", default=None)
+    parser.add_argument(
+        "--production", action="store_true", help="Threaded keep-alive server with caching headers and sendfile"
+    )
+    parser.add_argument("--max-age", type=int, help="Cache-Control max-age for non-HTML files", default=300)
+    parser.add_argument(
+        "--precompress", action="store_true", help="With --production, write missing .gz/.br siblings before serving"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_const", const=-1, dest="verbosity", default=0,
+        help="Only log warnings and errors"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_const", const=1, dest="verbosity", help="Log every file processed"
+    )
+    parser.add_argument("--log-format", choices=("text", "json"), help="Log line format", default="text")
     args = parser.parse_args()
 
-    run(port=args.port, directory=args.dir)
+    if args.watch:
+        run_watch(args.port, args.dir, args.content, args.template, args.static, verbosity=args.verbosity,
+                  log_format=args.log_format)
+    elif args.production:
+        StaticHandler.max_age = args.max_age
+        if args.precompress:
+            from compress import precompress
+            from main import configure_logging
+
+            configure_logging(args.verbosity, args.log_format)
+            precompress(args.dir)
+        run(server_class=ThreadingHTTPServer, handler_class=StaticHandler, port=args.port, directory=args.dir)
+    else:
+        run(port=args.port, directory=args.dir)
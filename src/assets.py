@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from scanner import scan_files
+from writer import remove_file
+
+
+logger = logging.getLogger("ssg.assets")
+
+
+def _same_contents(first, second, chunk_size=1 << 20):
+    digests = []
+    for path in (first, second):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        digests.append(digest.digest())
+    return digests[0] == digests[1]
+
+
+#Copy with copy_file_range where the OS has it: the kernel moves the bytes without
+#a round trip through user space, and filesystems that support it (btrfs, XFS, NFS 4.2)
+#turn it into a reflink that shares the blocks instead of copying them.
+def _copy_file(src_path, dest_path):
+    if not hasattr(os, 'copy_file_range'):
+        shutil.copyfile(src_path, dest_path)
+        return
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+        remaining = os.fstat(src.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError:
+            #Not supported between these filesystems, start over the portable way.
+            src.seek(0)
+            dest.seek(0)
+            dest.truncate()
+            shutil.copyfileobj(src, dest)
+
+
+#Put one asset in place. The new file is created next to the destination and renamed over it,
+#so an old hardlink at dest_path (shared with the source) is never written through.
+def copy_asset(src_path, dest_path, link=False):
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + '.sync-tmp'
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    if link:
+        try:
+            os.link(src_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+            return
+        except OSError:
+            #Cross-device or unsupported, fall back to a copy.
+            pass
+    _copy_file(src_path, tmp_path)
+    #Carry the source mtime over so the next sync can tell the file is unchanged.
+    stat = os.stat(src_path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, dest_path)
+
+
+#Mirror static_dir into dest_dir without touching files that are already up to date.
+#A file is copied when the destination is missing or differs in size or mtime; with
+#check_hash, same-size files with a different mtime are compared by content first.
+#Copies run on a thread pool (the work is I/O bound). Files that came from static_dir on the
+#previous sync (remembered in state_path) but are gone now are removed from dest_dir;
+#everything else there, such as generated pages, is left alone.
+#Returns (copied, skipped, removed) counts.
+def sync_assets(static_dir, dest_dir, state_path=None, jobs=8, link=False, check_hash=False):
+    current = scan_files(static_dir)
+    previous = {}
+    if state_path:
+        try:
+            with open(state_path, 'r') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+
+    def sync_one(relative):
+        src_path = os.path.join(static_dir, relative)
+        dest_path = os.path.join(dest_dir, relative)
+        size, mtime_ns = current[relative]
+        try:
+            dest_stat = os.stat(dest_path)
+        except FileNotFoundError:
+            dest_stat = None
+        if dest_stat is not None and dest_stat.st_size == size:
+            if dest_stat.st_mtime_ns == mtime_ns:
+                return False
+            if check_hash and _same_contents(src_path, dest_path):
+                os.utime(dest_path, ns=(dest_stat.st_atime_ns, mtime_ns))
+                return False
+        copy_asset(src_path, dest_path, link)
+        logger.debug("Copied file: %s", src_path)
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        copied = sum(executor.map(sync_one, sorted(current)))
+
+    removed = 0
+    for relative in sorted(set(previous) - set(current)):
+        remove_file(os.path.join(dest_dir, relative), dest_dir)
+        logger.info("Removed stale asset: %s", relative)
+        removed += 1
+
+    if state_path:
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with open(state_path + '.tmp', 'w') as f:
+            json.dump(current, f)
+        os.replace(state_path + '.tmp', state_path)
+
+    logger.info("Assets: %d copied, %d unchanged, %d removed", copied, len(current) - copied, removed)
+    return copied, len(current) - copied, removed
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import zlib
+from collections import OrderedDict
+
+
+#Bump when the layout of an entry changes.
+CACHE_FORMAT = 3
+
+#Modules whose source decides what a page renders to, or what goes into the page info cached
+#with it (front matter parsing, references, title and summary in render.render_markdown);
+#editing any of them invalidates the cache. Read by file name, without importing them.
+CONVERTER_MODULES = ['htmlnode', 'textnode', 'highlight', 'images', 'frontmatter', 'depgraph', 'render']
+
+_converter_version = None
+
+
+#Hash of the converter source code (plus cache format and Python version), computed once per process.
+def converter_version():
+    global _converter_version
+    if _converter_version is None:
+        digest = hashlib.sha256(f"{CACHE_FORMAT}:{sys.version_info[:2]}".encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for module in CONVERTER_MODULES:
+            with open(os.path.join(here, module + '.py'), 'rb') as f:
+                digest.update(f.read())
+        _converter_version = digest.hexdigest()[:16]
+    return _converter_version
+
+
+class PageCache:
+    #On-disk cache from a markdown content hash to the rendered page body and the page info
+    #generate_page gathered while rendering it (title, metadata, summary, links, images).
+    #Entries are zlib-compressed JSON, one file each, sharded by the first two hash digits
+    #under a directory named after the converter version. Opening the cache deletes the
+    #directories of other converter versions. A hit touches the entry's mtime so
+    #prune() can evict least recently used entries once the cache outgrows max_bytes.
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = converter_version()
+        self.root = os.path.join(cache_dir, self.version)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+        for name in os.listdir(cache_dir):
+            if name != self.version:
+                shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+    def key(self, markdown):
+        return hashlib.sha256(markdown.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    #Returns (html, info) or None.
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                html, info = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return html, info
+
+    def put(self, key, html, info):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(json.dumps([html, info]).encode('utf-8'))
+        #Write then rename, so parallel workers never read a half-written entry.
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    #Evict least recently used entries until the cache fits in max_bytes.
+    #Run once per build, from the main process.
+    def prune(self):
+        entries = []
+        total = 0
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+class MemoryPageCache:
+    #The PageCache interface over a dict, for a long-running process such as the build daemon:
+    #a hit costs no disk read, decompression or JSON decoding. Entries are evicted least
+    #recently used first once their rendered HTML outgrows max_bytes. With a backing
+    #PageCache, misses fall through to it and puts are written to it as well, so entries
+    #outlive the process; prune() prunes it only when something was written since last time.
+    #Entries are handed out as stored, callers must not mutate them.
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, backing=None):
+        self.max_bytes = max_bytes
+        self.backing = backing
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    def key(self, markdown):
+        return hashlib.sha256(markdown.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        entry = self.backing.get(key) if self.backing is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._store(key, entry)
+        return entry
+
+    def put(self, key, html, info):
+        self._store(key, (html, info))
+        if self.backing is not None:
+            self.backing.put(key, html, info)
+            self._dirty = True
+
+    def _store(self, key, entry):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[0])
+        self.entries[key] = entry
+        self.size += len(entry[0])
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, (html, _) = self.entries.popitem(last=False)
+            self.size -= len(html)
+
+    def prune(self):
+        if self.backing is None or not self._dirty:
+            return 0
+        self._dirty = False
+        return self.backing.prune()
@@ -0,0 +1,111 @@
+import gzip
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger("ssg.compress")
+
+#Text formats worth compressing; images, fonts and archives are already compressed.
+COMPRESSIBLE = ('.html', '.htm', '.css', '.js', '.mjs', '.json', '.xml', '.svg', '.txt', '.map', '.rss', '.atom')
+
+
+def _gzip(data):
+    #mtime=0 keeps the output byte-identical between builds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+#(suffix, encoder) for every format this Python can write; .br needs the brotli module.
+def encoders():
+    available = [('.gz', _gzip)]
+    if brotli is not None:
+        available.insert(0, ('.br', _brotli))
+    return available
+
+
+#Write the compressed siblings of one file that are missing or older than it.
+#Each sibling is stamped with the source's mtime, which is how both the next run and
+#server.py tell that it matches the source. Returns the number of siblings written.
+def compress_file(path, encoders):
+    stat = os.stat(path)
+    data = None
+    written = 0
+    for suffix, encode in encoders:
+        target = path + suffix
+        try:
+            if os.stat(target).st_mtime_ns == stat.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        tmp_path = target + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(encode(data))
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, target)
+        written += 1
+    return written
+
+
+#Write .br (when available) and .gz siblings for the text files under dest_dir that are
+#at least min_size bytes, on a thread pool (zlib and brotli release the GIL while they work).
+#The siblings written are remembered in state_path; one of those left behind by a source
+#that is gone, or is now under min_size, is removed. Any other .gz or .br (an archive the
+#site ships as it is, even one named like a sibling) is never touched, and without a
+#state_path nothing is removed.
+#Returns (written, up to date, removed) counts.
+def precompress(dest_dir, jobs=8, min_size=1024, extensions=COMPRESSIBLE, state_path=None):
+    previous = []
+    if state_path:
+        try:
+            with open(state_path, 'r') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = []
+    owned = set(previous)
+
+    available = encoders()
+    suffixes = tuple(suffix for suffix, _ in available)
+    sources = []
+    removed = 0
+    for directory, _, files in os.walk(dest_dir):
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if name.endswith(extensions):
+                if os.path.getsize(path) >= min_size:
+                    sources.append(path)
+                continue
+            base = os.path.splitext(path)[0]
+            relative = os.path.relpath(path, dest_dir)
+            if relative in owned and (not os.path.isfile(base) or os.path.getsize(base) < min_size):
+                os.remove(path)
+                owned.discard(relative)
+                removed += 1
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        written = sum(executor.map(compress_file, sources, [available] * len(sources)))
+
+    if state_path:
+        owned.update(os.path.relpath(path, dest_dir) + suffix for path in sources for suffix in suffixes)
+        owned = sorted(relative for relative in owned if os.path.isfile(os.path.join(dest_dir, relative)))
+        os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+        with open(state_path + '.tmp', 'w') as f:
+            json.dump(owned, f)
+        os.replace(state_path + '.tmp', state_path)
+
+    up_to_date = len(sources) * len(available) - written
+    logger.info("Precompressed (%s): %d written, %d up to date, %d removed", ", ".join(suffixes), written, up_to_date,
+                removed)
+    return written, up_to_date, removed
@@ -0,0 +1,285 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+
+#The client side (request() and the build/rebuild/ping/stop commands) only needs the
+#standard library; the build modules are imported by the daemon when it starts, so a
+#client call costs an interpreter start and one round trip over the socket.
+logger = logging.getLogger("ssg.daemon")
+
+SOCKET_NAME = 'daemon.sock'
+
+
+def default_socket_path(state_dir):
+    return os.path.join(state_dir, SOCKET_NAME)
+
+
+class _LogCapture(logging.Handler):
+    #Collects the messages logged while one request runs, to send back with the response.
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+class BuildDaemon:
+    #Long-lived builder for one site. Started with one incremental build, then keeps in
+    #memory what a fresh `main.py` run would redo every time: the imported converters and
+    #their compiled regexes, parsed templates (template.load_template's cache), the
+    #dependency graph and site index, a page cache and a snapshot of every file under the
+    #content dir, the template and the static dir.
+    #  build             - rescan, and rebuild whatever changed since the last snapshot
+    #  rebuild <paths>   - rebuild the given files (directories expand to the files in them)
+    #                      whether or not they look changed, without a full rescan
+    #Requests are handled one at a time; each returns the paths rebuilt, the pages that
+    #failed, the log lines and the time taken.
+    #Like watch mode, rebuilds don't touch the manifest: the next `--incremental` run
+    #regenerates the pages rebuilt here once.
+
+    def __init__(self, content, template, dest, state_dir=None, static=None, cache=None):
+        self.content = os.path.abspath(content)
+        self.template = os.path.abspath(template)
+        self.dest = os.path.abspath(dest)
+        self.static = os.path.abspath(static) if static else None
+        self.state_dir = os.path.abspath(state_dir or os.path.join(os.path.dirname(self.template), '.ssg'))
+        self.cache = cache
+        self.graph = None
+        self.index = None
+        self.state = {}
+        self.lock = threading.Lock()
+
+    @property
+    def roots(self):
+        return [self.content, self.template] + ([self.static] if self.static else [])
+
+    def start(self):
+        from assets import sync_assets
+        from depgraph import DependencyGraph
+        from main import generate_pages_incremental
+        from siteindex import SiteIndex
+        from watcher import snapshot
+
+        generate_pages_incremental(self.content, self.template, self.dest,
+                                   os.path.join(self.state_dir, 'manifest.json'), cache=self.cache)
+        if self.static:
+            sync_assets(self.static, self.dest, os.path.join(self.state_dir, 'assets.json'))
+        self.graph = DependencyGraph.load(os.path.join(self.state_dir, 'depgraph.json'))
+        self.index = SiteIndex(os.path.join(self.state_dir, 'site.db'))
+        self.state = snapshot(self.roots)
+
+    def close(self):
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+    def _rebuild(self, paths):
+        from main import rebuild_paths
+
+        failures = rebuild_paths(paths, self.content, self.template, self.dest, self.static, self.graph, self.index,
+                                 self.cache)
+        return {"rebuilt": sorted(paths), "failures": [list(failure) for failure in failures]}
+
+    def build(self):
+        from watcher import diff_snapshots, snapshot
+
+        new_state = snapshot(self.roots)
+        changed = diff_snapshots(self.state, new_state)
+        self.state = new_state
+        return self._rebuild(changed)
+
+    def rebuild(self, paths):
+        from watcher import snapshot
+
+        changed = set()
+        for path in (os.path.abspath(path) for path in paths):
+            current = snapshot([path])
+            previous = [known for known in self.state if known == path or known.startswith(path + os.sep)]
+            for known in previous:
+                self.state.pop(known)
+            self.state.update(current)
+            changed.update(current)
+            changed.update(previous)
+            if not current and not previous:
+                #Never seen and not there: let rebuild_paths treat it as removed.
+                changed.add(path)
+        return self._rebuild(changed)
+
+    #Run one request ({"command": ..., ...}) and return the response.
+    def handle(self, request):
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if command not in ("build", "rebuild"):
+            return {"ok": False, "error": f"Unknown command: {command!r}"}
+
+        capture = _LogCapture()
+        capture.setFormatter(logging.Formatter("%(message)s"))
+        root_logger = logging.getLogger("ssg")
+        with self.lock:
+            start = time.perf_counter()
+            root_logger.addHandler(capture)
+            try:
+                if command == "build":
+                    response = self.build()
+                else:
+                    response = self.rebuild(request.get("paths", []))
+                response["ok"] = not response["failures"]
+            except Exception as e:
+                logger.exception("%s request failed", command)
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            finally:
+                root_logger.removeHandler(capture)
+            response["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        response["log"] = capture.lines
+        return response
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    #One JSON request per line, each answered with one JSON response line; a client may keep
+    #the connection open for as many requests as it likes.
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request is not an object")
+            except ValueError as e:
+                request, response = {}, {"ok": False, "error": f"Bad request: {e}"}
+            else:
+                if request.get("command") == "shutdown":
+                    response = {"ok": True}
+                else:
+                    response = self.server.daemon.handle(request)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if request.get("command") == "shutdown":
+                #shutdown() waits for serve_forever to return, so it can't run on this thread.
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, daemon):
+        self.daemon = daemon
+        _claim_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        #Anyone who can connect can make the daemon write files: owner only.
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+#Remove a socket file left behind by a daemon that died; refuse if one is still answering.
+def _claim_socket(socket_path):
+    if not os.path.exists(socket_path):
+        os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(socket_path)
+            return
+    raise RuntimeError(f"A build daemon is already listening on {socket_path}")
+
+
+#Start the daemon (one incremental build) and serve requests on socket_path until a
+#shutdown request arrives.
+def serve(daemon, socket_path):
+    daemon.start()
+    server = DaemonServer(socket_path, daemon)
+    logger.info("Build daemon listening on %s", socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        daemon.close()
+    logger.info("Build daemon stopped")
+
+
+#Send one request to the daemon at socket_path and return its response.
+def request(socket_path, command, timeout=None, **fields):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"command": command, **fields}).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("The build daemon closed the connection without answering")
+    return json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build daemon: keeps a site's build state warm between builds")
+    parser.add_argument("command", choices=("serve", "build", "rebuild", "ping", "stop"),
+                        help="serve starts the daemon, the others talk to a running one")
+    parser.add_argument("paths", nargs="*", help="Files or directories to rebuild (rebuild only)")
+    parser.add_argument("--content", type=str, help="Directory holding the markdown sources", default="content")
+    parser.add_argument("--template", type=str, help="HTML template file", default="template.html")
+    parser.add_argument("--dest", type=str, help="Directory to write the site to", default="public")
+    parser.add_argument("--static", type=str, help="Static assets to sync into the destination", default=None)
+    parser.add_argument("--state-dir", type=str, help="Where build state (manifest, caches) is kept", default=None)
+    parser.add_argument("--socket", type=str, help="Daemon socket (default: daemon.sock in the state dir)",
+                        default=None)
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep rendered pages in memory, backed by the on-disk page cache")
+    parser.add_argument("--cache-size", type=int, help="Page cache size limit in MB (each of memory and disk)",
+                        default=256)
+    parser.add_argument("--timeout", type=float, help="Seconds a client waits for an answer", default=None)
+    args = parser.parse_args()
+
+    state_dir = args.state_dir or os.path.join(os.path.dirname(os.path.abspath(args.template)), '.ssg')
+    socket_path = args.socket or default_socket_path(state_dir)
+
+    if args.command == "serve":
+        import highlight
+        from cache import MemoryPageCache, PageCache
+        from main import configure_logging
+
+        configure_logging()
+        highlight.configure(os.path.join(state_dir, 'highlight'))
+        cache = None
+        if args.cache:
+            cache_bytes = args.cache_size * 1024 * 1024
+            cache = MemoryPageCache(cache_bytes, PageCache(os.path.join(state_dir, 'cache'), cache_bytes))
+        serve(BuildDaemon(args.content, args.template, args.dest, state_dir, args.static, cache), socket_path)
+        return
+
+    fields = {"paths": [os.path.abspath(path) for path in args.paths]} if args.command == "rebuild" else {}
+    try:
+        response = request(socket_path, "shutdown" if args.command == "stop" else args.command, args.timeout,
+                           **fields)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No build daemon is listening on {socket_path}", file=sys.stderr)
+        raise SystemExit(2)
+
+    for line in response.get("log", []):
+        print(line, file=sys.stderr)
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+    if args.command in ("build", "rebuild") and "rebuilt" in response:
+        print(f"{len(response['rebuilt'])} path(s) rebuilt, {len(response['failures'])} failed "
+              f"in {response['elapsed_ms']} ms")
+    if not response.get("ok"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import json
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+
+GRAPH_VERSION = 1
+
+
+#Walk a node tree and return the (links, images) it references, in document order.
+def collect_references(node, links=None, images=None):
+    links = [] if links is None else links
+    images = [] if images is None else images
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if type(current) is str:
+            continue
+        if current.tag == 'a' and 'href' in current.props:
+            links.append(current.props['href'])
+        elif current.tag == 'img' and 'src' in current.props:
+            images.append(current.props['src'])
+        stack.extend(reversed(current.children))
+    return links, images
+
+
+#Site URL of a generated page, from its output path relative to the destination dir.
+def page_url(output):
+    url = '/' + output.replace(os.sep, '/')
+    if url.endswith('/index.html'):
+        url = url[:-len('index.html')]
+    return url
+
+
+#Resolve a reference found on a page to a site-absolute path, or None for anything that
+#doesn't point into the site (other hosts, mailto:, pure #fragments).
+def normalize_url(url, from_url='/'):
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = parts.path
+    if not path.startswith('/'):
+        base = from_url if from_url.endswith('/') else posixpath.dirname(from_url) + '/'
+        path = base + path
+    normalized = posixpath.normpath(path)
+    if path.endswith('/') and normalized != '/':
+        normalized += '/'
+    return normalized
+
+
+#Output files (relative to the destination dir) that could serve a site path.
+def url_to_outputs(url):
+    relative = url.lstrip('/')
+    if not relative or url.endswith('/'):
+        return [relative + 'index.html']
+    return [relative, relative + '.html', relative + '/index.html']
+
+
+class DependencyGraph:
+    #Persistent record of what every page depends on:
+    #  template - the template file it was rendered with
+    #  links    - site paths of the pages it links to
+    #  assets   - site paths of the images it embeds
+    #plus a reverse index (target -> pages) rebuilt on load, so the pages affected by a
+    #changed template, a moved asset or a removed page are one lookup away.
+    #Pages are keyed by their source path relative to the content dir.
+
+    def __init__(self, path, pages=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.reverse = {}
+        for page, deps in self.pages.items():
+            self._index(page, deps)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != GRAPH_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": GRAPH_VERSION, "pages": self.pages}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _targets(self, deps):
+        yield 'template:' + deps["template"]
+        for link in deps["links"]:
+            yield 'link:' + link
+        for asset in deps["assets"]:
+            yield 'asset:' + asset
+
+    def _index(self, page, deps):
+        for target in self._targets(deps):
+            self.reverse.setdefault(target, set()).add(page)
+
+    def _unindex(self, page, deps):
+        for target in self._targets(deps):
+            dependents = self.reverse.get(target)
+            if dependents:
+                dependents.discard(page)
+                if not dependents:
+                    del self.reverse[target]
+
+    #Record a page's dependencies; links and images are raw references as found on the page.
+    def update_page(self, page, output, template, links, images):
+        url = page_url(output)
+        deps = {
+            "output": output,
+            "template": os.path.abspath(template),
+            "links": sorted({target for target in (normalize_url(link, url) for link in links) if target}),
+            "assets": sorted({target for target in (normalize_url(image, url) for image in images) if target}),
+        }
+        self.remove_page(page)
+        self.pages[page] = deps
+        self._index(page, deps)
+
+    def remove_page(self, page):
+        deps = self.pages.pop(page, None)
+        if deps is not None:
+            self._unindex(page, deps)
+
+    def pages_using_template(self, template):
+        return set(self.reverse.get('template:' + os.path.abspath(template), ()))
+
+    def pages_embedding(self, asset_url):
+        return set(self.reverse.get('asset:' + asset_url, ()))
+
+    #Pages linking to url, whichever of the equivalent spellings (/a, /a.html, /a/) they used.
+    def pages_linking_to(self, url):
+        spellings = {url}
+        if url.endswith('/'):
+            spellings.update({url + 'index.html', url.rstrip('/') or '/'})
+        elif url.endswith('.html'):
+            spellings.add(url[:-len('.html')])
+        dependents = set()
+        for spelling in spellings:
+            dependents |= self.reverse.get('link:' + spelling, set())
+        return dependents
+
+    #Every page that has to be rebuilt (or re-checked) when the given templates or assets change.
+    def affected_pages(self, templates=(), asset_urls=()):
+        affected = set()
+        for template in templates:
+            affected |= self.pages_using_template(template)
+        for url in asset_urls:
+            affected |= self.pages_embedding(url)
+        return affected
+
+    #Internal links and images that point at nothing in dest_dir, as sorted (page, target) pairs.
+    #Answered from the graph alone: no page is parsed again.
+    def broken_links(self, dest_dir):
+        broken = []
+        known = {}
+        for target in self.reverse:
+            kind, _, url = target.partition(':')
+            if kind not in ('link', 'asset'):
+                continue
+            if url not in known:
+                known[url] = any(os.path.isfile(os.path.join(dest_dir, candidate)) for candidate in url_to_outputs(url))
+            if not known[url]:
+                broken.extend((page, url) for page in self.reverse[target])
+        return sorted(broken)
@@ -0,0 +1,99 @@
+import re
+
+
+#A page may open with a metadata header, fenced by '---' (YAML-like) or '+++' (TOML-like):
+#
+#   ---                              +++
+#   title: Riding the Rohirrim       title = "Riding the Rohirrim"
+#   date: 2024-03-01                 date = 2024-03-01
+#   tags: [travel, horses]           tags = ["travel", "horses"]
+#   ---                              +++
+#
+#Only flat key/value pairs are understood: strings (quoted or not), integers, true/false
+#and one-line [lists]. The YAML form also takes a list as indented '- item' lines.
+DELIMITERS = {'---': ':', '+++': '='}
+
+_key = re.compile(r'^([A-Za-z_][\w-]*)\s*$')
+
+
+def _scalar(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in '"\'':
+        return text[1:-1]
+    if text in ('true', 'false'):
+        return text == 'true'
+    if re.fullmatch(r'-?\d+', text):
+        return int(text)
+    return text
+
+
+def _value(text):
+    text = text.strip()
+    if text.startswith('[') and text.endswith(']'):
+        inner = text[1:-1].strip()
+        return [_scalar(item) for item in inner.split(',')] if inner else []
+    return _scalar(text)
+
+
+#Parse the lines between the delimiters into a dict; separator is ':' or '='.
+def parse_front_matter(text, separator=':'):
+    metadata = {}
+    list_key = None
+    for number, line in enumerate(text.split('\n'), 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if separator == ':' and stripped.startswith('- ') and list_key is not None:
+            metadata[list_key].append(_scalar(stripped[2:]))
+            continue
+        key, found, value = line.partition(separator)
+        if not found or not _key.match(key):
+            raise ValueError(f"Invalid front matter line {number}: {line!r}")
+        key = key.strip()
+        if separator == ':' and not value.strip():
+            #'tags:' followed by '- item' lines
+            metadata[key] = []
+            list_key = key
+            continue
+        metadata[key] = _value(value)
+        list_key = None
+    return metadata
+
+
+#Split a page into (metadata, markdown body). Pages without a header get ({}, markdown).
+def split_front_matter(markdown):
+    first_line, _, rest = markdown.partition('\n')
+    separator = DELIMITERS.get(first_line.strip())
+    if separator is None:
+        return {}, markdown
+    delimiter = first_line.strip()
+    match = re.search(rf'^{re.escape(delimiter)}[ \t]*$', rest, re.MULTILINE)
+    if match is None:
+        raise ValueError(f"Front matter opened with {delimiter} is never closed")
+    return parse_front_matter(rest[:match.start()], separator), rest[match.end() + 1:]
+
+
+#split_front_matter for a file on disk, reading only the header.
+#Returns (metadata, byte offset where the markdown body starts).
+def read_front_matter(path):
+    with open(path, 'rb') as f:
+        first_line = f.readline()
+        separator = DELIMITERS.get(first_line.decode('utf-8').strip())
+        if separator is None:
+            return {}, 0
+        delimiter = first_line.strip()
+        lines = []
+        for line in f:
+            if line.strip() == delimiter:
+                return parse_front_matter(b''.join(lines).decode('utf-8'), separator), f.tell()
+            lines.append(line)
+    raise ValueError(f"Front matter opened with {delimiter.decode()} is never closed")
+
+
+#Tags may be written as a list or as one comma separated string.
+def normalize_tags(tags):
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    return [str(tag).strip() for tag in tags if str(tag).strip()]
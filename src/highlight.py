@@ -0,0 +1,213 @@
+import hashlib
+import os
+import re
+import shutil
+import sys
+from collections import OrderedDict
+
+
+#Syntax highlighting for fenced code blocks. Each language is a list of (token class, regex)
+#rules folded into one pattern, so a block is tokenized in a single finditer pass; text no
+#rule matches is passed through escaped. Token classes are the short names Pygments uses
+#(k keyword, s string, c comment, m number, ...), so any Pygments CSS theme styles the output.
+#Languages without a lexer come out escaped but unhighlighted.
+
+_escapes = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+def escape(text):
+    return text.translate(_escapes)
+
+
+def _words(*words):
+    return r'\b(?:' + '|'.join(words) + r')\b'
+
+
+_NUMBER = r'\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)\b'
+_DOUBLE = r'"(?:[^"\\\n]|\\.)*"'
+_SINGLE = r"'(?:[^'\\\n]|\\.)*'"
+
+LANGUAGES = {
+    "python": [
+        ("c", r'#[^\n]*'),
+        ("s", r'(?<!\w)(?i:[rbuf]{0,2})(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|' + _DOUBLE + '|' + _SINGLE + ')'),
+        ("nd", r'@[\w.]+'),
+        ("k", _words('and', 'as', 'assert', 'async', 'await', 'break', 'class', 'continue', 'def', 'del', 'elif',
+                     'else', 'except', 'finally', 'for', 'from', 'global', 'if', 'import', 'in', 'is', 'lambda',
+                     'nonlocal', 'not', 'or', 'pass', 'raise', 'return', 'try', 'while', 'with', 'yield')),
+        ("kc", _words('True', 'False', 'None')),
+        ("nb", _words('print', 'len', 'range', 'open', 'super', 'self', 'isinstance', 'dict', 'list', 'set',
+                      'str', 'int', 'float', 'tuple', 'type', 'object', 'Exception')),
+        ("m", _NUMBER),
+    ],
+    "javascript": [
+        ("c", r'//[^\n]*|/\*[\s\S]*?\*/'),
+        ("s", _DOUBLE + '|' + _SINGLE + r'|`(?:[^`\\]|\\.)*`'),
+        ("k", _words('async', 'await', 'break', 'case', 'catch', 'class', 'const', 'continue', 'default', 'delete',
+                     'do', 'else', 'export', 'extends', 'finally', 'for', 'from', 'function', 'if', 'import', 'in',
+                     'instanceof', 'interface', 'let', 'new', 'of', 'return', 'switch', 'throw', 'try', 'type',
+                     'typeof', 'var', 'void', 'while', 'yield')),
+        ("kc", _words('true', 'false', 'null', 'undefined', 'this')),
+        ("m", _NUMBER),
+    ],
+    "json": [
+        ("nt", _DOUBLE + r'(?=\s*:)'),
+        ("s", _DOUBLE),
+        ("kc", _words('true', 'false', 'null')),
+        ("m", r'-?' + _NUMBER),
+    ],
+    "bash": [
+        ("c", r'(?<![^\s;])#[^\n]*'),
+        ("s", _DOUBLE + '|' + r"'[^']*'"),
+        ("nv", r'\$(?:\{[^}\n]*\}|\w+|[@*#?$!0-9-])'),
+        ("k", _words('if', 'then', 'else', 'elif', 'fi', 'for', 'while', 'until', 'do', 'done', 'case', 'esac',
+                     'in', 'function', 'return', 'export', 'local', 'readonly')),
+        ("nb", _words('echo', 'cd', 'exit', 'set', 'source', 'test', 'read', 'printf')),
+    ],
+    "html": [
+        ("c", r'<!--[\s\S]*?-->'),
+        ("nt", r'</?[A-Za-z][\w:.-]*|/?>'),
+        ("na", r'\b[\w:.-]+(?==)'),
+        ("s", _DOUBLE + '|' + _SINGLE),
+    ],
+    "css": [
+        ("c", r'/\*[\s\S]*?\*/'),
+        ("s", _DOUBLE + '|' + _SINGLE),
+        ("k", r'[\w-]+(?=\s*:[^{};]*[;}])'),
+        ("m", r'#[0-9a-fA-F]{3,8}\b|-?\d+(?:\.\d+)?(?:%|[a-z]+)?'),
+    ],
+}
+
+ALIASES = {
+    "py": "python", "python3": "python", "js": "javascript", "ts": "javascript", "typescript": "javascript",
+    "jsx": "javascript", "sh": "bash", "shell": "bash", "zsh": "bash", "console": "bash", "xml": "html",
+    "svg": "html",
+}
+
+
+class Lexer:
+    def __init__(self, rules):
+        #Rules use only non-capturing groups, so match.lastindex says which rule matched.
+        self.classes = [None] + [token_class for token_class, _ in rules]
+        self.pattern = re.compile('|'.join(f'({regex})' for _, regex in rules))
+
+    def highlight(self, code):
+        out = []
+        position = 0
+        classes = self.classes
+        for match in self.pattern.finditer(code):
+            start = match.start()
+            if start == match.end():
+                continue
+            if start > position:
+                out.append(escape(code[position:start]))
+            out.append(f'<span class="{classes[match.lastindex]}">{escape(match.group())}</span>')
+            position = match.end()
+        out.append(escape(code[position:]))
+        return ''.join(out)
+
+
+LEXERS = {name: Lexer(rules) for name, rules in LANGUAGES.items()}
+
+
+def lexer_for(language):
+    if not language:
+        return None
+    language = language.lower()
+    return LEXERS.get(ALIASES.get(language, language))
+
+
+#The escaped, highlighted HTML for code in language (escaped only if there's no lexer for it).
+def highlight(code, language=None):
+    lexer = lexer_for(language)
+    return lexer.highlight(code) if lexer is not None else escape(code)
+
+
+_highlighter_version = None
+
+
+#Hash of this module's source (and the Python version): the lexers decide the cached output.
+def highlighter_version():
+    global _highlighter_version
+    if _highlighter_version is None:
+        digest = hashlib.sha256(str(sys.version_info[:2]).encode())
+        with open(__file__, 'rb') as f:
+            digest.update(f.read())
+        _highlighter_version = digest.hexdigest()[:16]
+    return _highlighter_version
+
+
+class HighlightCache:
+    #highlight() memoized by (language, code hash): a bounded LRU in memory and, with a
+    #cache_dir, one file per snippet on disk under a directory named after the highlighter
+    #version (other versions' directories are deleted on open). The same snippets turn up
+    #on page after page of API docs, so most lookups never run a lexer.
+
+    def __init__(self, max_entries=2048, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.root = None
+        if cache_dir:
+            self.root = os.path.join(cache_dir, highlighter_version())
+            os.makedirs(self.root, exist_ok=True)
+            for name in os.listdir(cache_dir):
+                if name != highlighter_version():
+                    shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, code, language=None):
+        lexer = lexer_for(language)
+        if lexer is None:
+            return escape(code)
+        key = hashlib.sha256(f"{language.lower()}\0{code}".encode('utf-8')).hexdigest()
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+        if self.root is not None:
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    html = f.read()
+            except OSError:
+                html = None
+        if html is None:
+            self.misses += 1
+            html = lexer.highlight(code)
+            if self.root is not None:
+                self._write(key, html)
+        else:
+            self.hits += 1
+
+        self.entries[key] = html
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return html
+
+    def _write(self, key, html):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            #Write then rename, so parallel workers never read a half-written entry.
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+        except OSError:
+            #A cache that can't be written is only a slower cache.
+            pass
+
+
+#The cache convert_code_block goes through; memory only until configure() gives it a directory.
+active = HighlightCache()
+
+
+def configure(cache_dir=None, max_entries=2048):
+    global active
+    active = HighlightCache(max_entries, cache_dir)
@@ -1,30 +1,47 @@
 from textnode import TextNode,text_to_textnodes
+from types import MappingProxyType
+import highlight
+import profiler
+import io
 import re
 
     #tag,value,children,props
     #Should hold string representing HTML tag type
     #The text within the html tags
-    #list of HTMLNode objects representing children of this node
+    #list of HTMLNode objects (or plain strings for untagged text) representing children of this node
     #Dictionary of k-v pairs representing attributes of the html flags
     #ex:{"href": "https://www.google.com"}
 
+#Shared, read-only stand-ins for "no children" / "no props", so leaves don't each allocate their own.
+EMPTY_CHILDREN = ()
+EMPTY_PROPS = MappingProxyType({})
+
 class HTMLNode:
     #Base model for our HTML nodes, turning into either parent or child.
     #All values default to none unless otherwise
+    #Slotted: no per-instance __dict__, a node is just its four references.
+    __slots__ = ('tag', 'value', 'children', 'props')
 
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
-        self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self.children = children if children is not None else EMPTY_CHILDREN
+        self.props = props if props else EMPTY_PROPS
         #print(f"Initialized HTMLNode: tag={self.tag}, props={self.props}, children={self.children}")
                                             
 
     def to_html(self):
         raise NotImplementedError
+
+    #Write this node's HTML straight into a file object (or io.StringIO) piece by piece,
+    #so no string for a whole subtree is ever built.
+    def write_html(self, out):
+        raise NotImplementedError
     
     #Method turns Urls/Images into html compatible string, used by children.
     def props_to_html(self):
+        if not self.props:
+            return ''
         props_list = [f'{key}="{value}"' for key,value in self.props.items()]
         return ' '.join(props_list)
 
@@ -34,6 +51,7 @@ class HTMLNode:
      return f"HTMLNode({self.tag},{self.value},{self.children},{self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
     SELF_CLOSING_TAGS = {'img', 'br', 'hr'}
 
     def __init__(self, tag, value=None, props=None):
@@ -51,9 +69,14 @@ class LeafNode(HTMLNode):
         else:
             return f"<{self.tag} {props_string}>{self.value}</{self.tag}>" if props_string else f"<{self.tag}>{self.value}</{self.tag}>"
 
+    def write_html(self, out):
+        out.write(self.to_html())
+
 
 class ParentNode(HTMLNode):
     #Must have children, designed to encapsulate multiple leaf nodes recursively.
+    #Children may be plain strings, which are written as-is (an untagged LeafNode without the node).
+    __slots__ = ()
 
     def __init__(self, tag, children,props=None):
         super().__init__(tag=tag,value=None,children=children,props=props)
@@ -63,19 +86,25 @@ class ParentNode(HTMLNode):
         
     #ParentNode must have a tag, parent node is to organize blocks of text, not the text iself.
     def to_html(self):
-        #print(f"Processing Node: tag={self.tag}, props={self.props}")
-
-        children_html = "".join(child.to_html() for child in self.children)
+        out = io.StringIO()
+        self.write_html(out)
+        return out.getvalue()
 
+    #Children write themselves into the same buffer, so each piece of text is copied once
+    #no matter how deep it sits in the tree.
+    def write_html(self, out):
         if self.tag is None:
             raise ValueError("ParentNode tag cannot be 'None'")
 
         props_string = self.props_to_html()
 
-        if props_string:
-            return f"<{self.tag} {props_string}>{children_html}</{self.tag}>"
-        else:
-            return f"<{self.tag}>{children_html}</{self.tag}>"
+        out.write(f"<{self.tag} {props_string}>" if props_string else f"<{self.tag}>")
+        for child in self.children:
+            if type(child) is str:
+                out.write(child)
+            else:
+                child.write_html(out)
+        out.write(f"</{self.tag}>")
 
         
 #Converting text_node's .text and/or url to a leafnode via it's text_type.
@@ -109,23 +138,91 @@ def markdown_to_blocks(markdown):
     # Splitting markdown text into blocks based on double newline characters
     return re.split(r'\n\n+', markdown.strip())
 
+#Lazy version of markdown_to_blocks over an iterable of lines (such as an open file):
+#yields the same blocks, holding only the current block in memory.
+def iter_blocks(lines):
+    started = False
+    current = []
+    held = None         # last non-blank block, yielded once we know it isn't the final one
+    blank_blocks = []   # whitespace-only blocks, dropped if nothing but whitespace follows
+
+    def finish(block_lines):
+        nonlocal started
+        block = ''.join(block_lines)
+        if block.endswith('\n'):
+            block = block[:-1]
+        if not started:
+            #Leading whitespace is stripped, like markdown.strip() does
+            block = block.lstrip()
+            if not block:
+                return
+            started = True
+        return block
+
+    for line in lines:
+        if line != '\n':
+            current.append(line)
+            continue
+        if not current:
+            continue
+        block = finish(current)
+        current = []
+        if block is None:
+            continue
+        if not block.strip():
+            blank_blocks.append(block)
+            continue
+        if held is not None:
+            yield held
+        yield from blank_blocks
+        blank_blocks = []
+        held = block
+
+    if current:
+        block = finish(current)
+        if block is not None and block.strip():
+            if held is not None:
+                yield held
+            yield from blank_blocks
+            held = block
+    if held is None:
+        #All whitespace: markdown_to_blocks gives one empty block
+        yield ''
+    else:
+        yield held.rstrip()
+
+#A block that is nothing but one link or one image becomes that element on its own;
+#anything after it makes the block a paragraph.
+_link_block = re.compile(r'\[[^\]\n]*\]\([^)\n]*\)')
+_image_block = re.compile(r'!\[[^\]\n]*\]\([^)\n]*\)')
+
+#First character of a block -> the type it is if the rest of the rule holds, else a paragraph.
+#Each rule is (prefix the block must start with, or a pattern the whole block must match, type).
+BLOCK_RULES = {
+    '#': ('#', "heading"),
+    '`': ('```', "code_block"),
+    '>': ('>', "quote"),
+    '-': ('- ', "list"),
+    '!': (_image_block, "image"),
+    '[': (_link_block, "link"),
+}
+
 #Takes list of blocks and populates a list of typings in same order
+#One dict lookup on the first character picks the only rule that can apply.
 def block_to_block_type(block):
-    block = block.strip()
-    if block.startswith('#'):
-        return "heading"
-    elif block.startswith('```'):
-        return "code_block"
-    elif block.startswith('>'):
-        return "quote"
-    elif block.startswith('- ') or block[0].isdigit() and block[1:3] == '. ':
-        return "list"
-    elif block.startswith('!['):
-        return "image"
-    elif block.startswith('['):
-        return "link"
-    else:
+    first = block[:1]
+    if first.isspace():
+        block = block.lstrip()
+        first = block[:1]
+    rule = BLOCK_RULES.get(first)
+    if rule is None:
+        if first.isdigit() and block[1:3] == '. ':
+            return "list"
         return "paragraph"
+    test, block_type = rule
+    if test.__class__ is str:
+        return block_type if block.startswith(test) else "paragraph"
+    return block_type if test.fullmatch(block.rstrip()) else "paragraph"
 
     
 def convert_text_node(node):
@@ -152,56 +249,76 @@ def convert_text_node(node):
         raise ValueError(f"Unknown text_type: {node.text_type}")
 
 
-    
+
+#text_to_textnodes, timed as the "inline" stage when a build is being profiled.
+def parse_inline(text):
+    if not profiler.active.enabled:
+        return text_to_textnodes(text)
+    with profiler.stage("inline"):
+        return text_to_textnodes(text)
+
+
+#Tag for each inline text type, per kind of block: headings have always used <b>/<i>,
+#the other blocks <strong>/<em>.
+INLINE_TAGS = {"bold": 'strong', "italic": 'em', "code": 'code'}
+HEADING_INLINE_TAGS = {"bold": 'b', "italic": 'i', "code": 'code'}
+
+
+#The inline markup of a block's text as child nodes; the one text node -> node mapping
+#shared by every block converter. Plain text stays a str child.
+def inline_to_nodes(text, tags=INLINE_TAGS):
+    children = []
+    append = children.append
+    for text_node in parse_inline(text):
+        text_type = text_node.text_type
+        if text_type == "text":
+            append(text_node.text)
+        elif text_type == "link":
+            append(LeafNode('a', text_node.text, {'href': text_node.url}))
+        elif text_type == "image":
+            append(LeafNode('img', None, {'alt': text_node.text, 'src': text_node.url}))
+        else:
+            append(LeafNode(tags[text_type], text_node.text))
+    return children
+
+
 def convert_heading(block):
     """Convert a heading block to the corresponding heading HTML node."""
     heading_level = block.count('#', 0, block.find(' '))
     heading_text = block[heading_level:].strip()
-    text_nodes = text_to_textnodes(heading_text)
-    children = []
-
-    for text_node in text_nodes:
-        if text_node.text_type == "text":
-            children.append(LeafNode(tag=None, value=text_node.text))
-        elif text_node.text_type == "bold":
-            children.append(LeafNode(tag='b', value=text_node.text))
-        elif text_node.text_type == "italic":
-            children.append(LeafNode(tag='i', value=text_node.text))
-        elif text_node.text_type == "link":
-            children.append(LeafNode(tag='a', value=text_node.text, attributes={'href': text_node.url}))
-        elif text_node.text_type == "image":
-            children.append(LeafNode(tag='img', value=None, attributes={'alt': text_node.text, 'src': text_node.url}))
-
-    return ParentNode(tag=f'h{heading_level}', children=children)
+    return ParentNode(f'h{heading_level}', inline_to_nodes(heading_text, HEADING_INLINE_TAGS))
 
 
 
 def convert_paragraph(block):
     """Convert a paragraph block to a paragraph HTML node."""
-    text_nodes = text_to_textnodes(block.strip())
-    children = []
+    return ParentNode('p', inline_to_nodes(block.strip()))
 
-    for text_node in text_nodes:
-        if text_node.text_type == "text":
-            children.append(LeafNode(tag=None, value=text_node.text))
-        elif text_node.text_type == "bold":
-            children.append(LeafNode(tag='strong', value=text_node.text))
-        elif text_node.text_type == "italic":
-            children.append(LeafNode(tag='em', value=text_node.text))
-        elif text_node.text_type == "link":
-             children.append(LeafNode(tag='a', value=text_node.text, props={'href': text_node.url}))
-        elif text_node.text_type == "image":
-            children.append(LeafNode(tag='img', value=None, props={'alt': text_node.text, 'src': text_node.url}))
 
-    return ParentNode(tag='p', children=children)
 
+_language_name = re.compile(r'[\w+#.-]+')
 
 
+#A fenced block's opening line may name its language (```python); the code is escaped and,
+#for a language highlight knows, highlighted (memoized by highlight.active).
 def convert_code_block(block):
-    # Remove the triple backticks and any surrounding whitespace
-    code_content = block.strip('`').strip()
+    block = block.strip()
+    opening, newline, code = block.partition('\n')
+    if not newline:
+        # All on one line: just remove the backticks around it
+        language, code = None, block.strip('`').strip()
+    else:
+        info = opening.strip('`').split(None, 1)
+        #Only word-like names are taken: the name ends up in a class attribute
+        language = info[0] if info and _language_name.fullmatch(info[0]) else None
+        # Drop the closing fence, keeping the code's own indentation
+        code = code.rstrip().rstrip('`').rstrip().strip('\n')
     # Create the inner code node
-    code_node = LeafNode(tag='code', value=code_content)
+    if language:
+        code_node = LeafNode(tag='code', value=highlight.active.get(code, language),
+                             props={'class': f'language-{language}'})
+    else:
+        code_node = LeafNode(tag='code', value=highlight.escape(code))
     # Create the outer pre node that contains the code node
     pre_node = ParentNode(tag='pre', children=[code_node])
     return pre_node
@@ -219,22 +336,7 @@ def convert_quote(block):
     
     # Combine all the quoted lines into a single string
     combined_text = ' '.join(quoted_text)
-    text_nodes = text_to_textnodes(combined_text)
-    children = []
-
-    for text_node in text_nodes:
-        if text_node.text_type == "text":
-            children.append(LeafNode(tag=None, value=text_node.text))
-        elif text_node.text_type == "bold":
-            children.append(LeafNode(tag='strong', value=text_node.text))
-        elif text_node.text_type == "italic":
-            children.append(LeafNode(tag='em', value=text_node.text))
-        elif text_node.text_type == "link":
-            children.append(LeafNode(tag='a', value=text_node.text, attributes={'href': text_node.url}))
-        elif text_node.text_type == "image":
-            children.append(LeafNode(tag='img', value=None, attributes={'alt': text_node.text, 'src': text_node.url}))
-
-    return ParentNode(tag='blockquote', children=children)
+    return ParentNode('blockquote', inline_to_nodes(combined_text))
 
 
 def convert_list(block):
@@ -248,23 +350,7 @@ def convert_list(block):
 
     for item in items:
         item_text = item.lstrip('- 1234567890.').strip()  # Adjust stripping for ordered and unordered lists
-        text_nodes = text_to_textnodes(item_text)
-        li_children = []
-
-        for text_node in text_nodes:
-            if text_node.text_type == "text":
-                li_children.append(LeafNode(tag=None, value=text_node.text))
-            elif text_node.text_type == "bold":
-                li_children.append(LeafNode(tag='strong', value=text_node.text))
-            elif text_node.text_type == "italic":
-                li_children.append(LeafNode(tag='em', value=text_node.text))
-            elif text_node.text_type == "link":
-                li_children.append(LeafNode(tag='a', value=text_node.text, attributes={'href': text_node.url}))
-            elif text_node.text_type == "image":
-                li_children.append(LeafNode(tag='img', value=None, attributes={'alt': text_node.text, 'src': text_node.url}))
-        
-        li_node = ParentNode(tag='li', children=li_children)
-        children.append(li_node)
+        children.append(ParentNode('li', inline_to_nodes(item_text)))
 
     return ParentNode(tag=tag, children=children)
 
@@ -274,7 +360,7 @@ def convert_list(block):
 def convert_image(markdown_image):
     import re
     # Example markdown image: ![Alt text](/path/to/image)
-    match = re.match(r"!\[(.*?)\]\((.*?)\)", markdown_image)
+    match = re.match(r"!\[(.*?)\]\((.*?)\)", markdown_image.strip())
     if not match:
         raise ValueError("Invalid markdown image format")
 
@@ -287,7 +373,7 @@ def convert_image(markdown_image):
 def convert_link(markdown_link):
     import re
     # Example markdown link: [Example Text](http://example.com)
-    match = re.match(r"\[(.*?)\]\((.*?)\)", markdown_link)
+    match = re.match(r"\[(.*?)\]\((.*?)\)", markdown_link.strip())
     if not match:
         raise ValueError("Invalid markdown link format")
 
@@ -299,34 +385,83 @@ def convert_link(markdown_link):
 
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    html_blocks = []
-
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == "heading":
-            html_blocks.append(convert_heading(block))
-        elif block_type == "paragraph":
-            html_blocks.append(convert_paragraph(block))
-        elif block_type == "code_block":
-            html_blocks.append(convert_code_block(block))
-        elif block_type == "quote":
-            html_blocks.append(convert_quote(block))
-        elif block_type == "list":
-            html_blocks.append(convert_list(block))
-        elif block_type == "image":
-            html_blocks.append(convert_image(block))
-        elif block_type == "link":
-            html_blocks.append(convert_link(block))
-        else:
-            raise ValueError(f"Unsupported block type: {block_type}")
+#Block type -> converter, and the profiler stage each conversion is charged to.
+BLOCK_CONVERTERS = {
+    "heading": convert_heading,
+    "paragraph": convert_paragraph,
+    "code_block": convert_code_block,
+    "quote": convert_quote,
+    "list": convert_list,
+    "image": convert_image,
+    "link": convert_link,
+}
+CONVERT_STAGES = {block_type: f"convert:{block_type}" for block_type in BLOCK_CONVERTERS}
+
+
+#Convert one block to its HTML node via its block type.
+def block_to_html_node(block):
+    block_type = block_to_block_type(block)
+    if not profiler.active.enabled:
+        return BLOCK_CONVERTERS[block_type](block)
+    with profiler.stage(CONVERT_STAGES[block_type]):
+        return BLOCK_CONVERTERS[block_type](block)
+
+
+#The text of a node without any markup.
+def node_text(node):
+    if type(node) is str:
+        return node
+    if node.value is not None:
+        return node.value
+    return ''.join(node_text(child) for child in node.children)
+
+
+#With an info dict, the page's title (its first '# ' heading, as written) and summary (the
+#text of its first paragraph) are filled in while the blocks are converted, so the page is
+#not scanned a second time for them.
+def markdown_to_html_node(markdown, info=None):
+    with profiler.stage("block_split"):
+        blocks = markdown_to_blocks(markdown)
+    html_blocks = [block_to_html_node(block) for block in blocks]
+    if info is not None:
+        for block, node in zip(blocks, html_blocks):
+            if 'title' not in info and block.startswith('# '):
+                info['title'] = block.split('\n', 1)[0][2:].strip()
+            elif 'summary' not in info and node.tag == 'p':
+                info['summary'] = node_text(node)
+            if 'title' in info and 'summary' in info:
+                break
 
     html_node = ParentNode(tag='div', children=html_blocks)
     #print(f"Generated HTML Node: {html_node.to_html()[:100]}...")  # Show first 100 chars only
     return html_node
 
 
+class MarkdownFileStream:
+    #Stands in for markdown_to_html_node(...) of a whole file when the file is too big to hold:
+    #write_html reads the file line by line and converts and writes one block at a time,
+    #so peak memory is bounded by the largest block, not by the file.
+    #on_node, if given, sees each block's node before it is written.
+    #offset skips that many bytes first (a front matter header).
+    __slots__ = ('path', 'on_node', 'offset')
+
+    def __init__(self, path, on_node=None, offset=0):
+        self.path = path
+        self.on_node = on_node
+        self.offset = offset
+
+    def write_html(self, out):
+        out.write('<div>')
+        with open(self.path, 'r') as f:
+            f.seek(self.offset)
+            for block in iter_blocks(f):
+                node = block_to_html_node(block)
+                if self.on_node is not None:
+                    self.on_node(node)
+                node.write_html(out)
+        out.write('</div>')
+
+
 #=======================================================================================================
 
 
@@ -0,0 +1,377 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+from assets import copy_asset
+from depgraph import normalize_url
+from scanner import scan_files
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+logger = logging.getLogger("ssg.images")
+
+#Image stage for the static dir: every image's pixel size is read from its file header
+#(no decoding), and with Pillow installed, narrower copies are made for srcset. Pages are
+#then rendered with width/height (and srcset/sizes) on each <img> whose src is a
+#site-absolute path to one of these images.
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+DEFAULT_WIDTHS = (480, 960, 1600)
+
+#Bump when variants would come out differently (encoder settings, naming).
+VARIANT_FORMAT = 1
+
+#Pillow format and encoder options per suffix; GIFs (often animated) get no variants.
+VARIANT_ENCODERS = {
+    '.jpg': ('JPEG', {"quality": 82, "optimize": True, "progressive": True}),
+    '.jpeg': ('JPEG', {"quality": 82, "optimize": True, "progressive": True}),
+    '.png': ('PNG', {"optimize": True}),
+    '.webp': ('WEBP', {"quality": 80, "method": 4}),
+}
+
+#JPEG start-of-frame markers (baseline, progressive, lossless, ...); they carry the size.
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            #Any number of 0xFF fill bytes may come before a marker.
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            #Markers without a segment.
+            continue
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        if marker in _JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:])
+            return width, height
+        f.seek(struct.unpack('>H', length)[0] - 2, os.SEEK_CUR)
+
+
+def _webp_size(header):
+    chunk = header[12:16]
+    if chunk == b'VP8 ' and len(header) >= 30:
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(header) >= 25:
+        bits = struct.unpack('<I', header[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X' and len(header) >= 30:
+        return int.from_bytes(header[24:27], 'little') + 1, int.from_bytes(header[27:30], 'little') + 1
+    return None
+
+
+#(width, height) of a PNG, JPEG, GIF or WebP file, read from its header without decoding
+#the image; None for anything else. JPEGs are walked segment by segment to their frame
+#header, seeking over the segments before it (EXIF, ICC profiles) rather than reading them.
+def image_size(path):
+    with open(path, 'rb') as f:
+        header = f.read(32)
+        if header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+            return struct.unpack('>II', header[16:24])
+        if header[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', header[6:10])
+        if header.startswith(b'RIFF') and header[8:12] == b'WEBP':
+            return _webp_size(header)
+        if header.startswith(b'\xff\xd8'):
+            return _jpeg_size(f)
+    return None
+
+
+def is_image(path):
+    return path.lower().endswith(IMAGE_SUFFIXES)
+
+
+#Where a width-pixel variant of an image goes, next to it: photo.jpg -> photo-480w.jpg.
+def variant_name(relative, width):
+    stem, suffix = os.path.splitext(relative)
+    return f"{stem}-{width}w{suffix}"
+
+
+def _cache_path(cache_root, digest, width, suffix):
+    return os.path.join(cache_root, digest[:2], f"{digest}-{width}w{suffix.lower()}")
+
+
+def _hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _make_variant(image, width, suffix, path):
+    image_format, options = VARIANT_ENCODERS[suffix]
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS)
+    if image_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    resized.save(tmp_path, image_format, **options)
+    os.replace(tmp_path, path)
+
+
+#Worker side of sync_images: size, content hash and variants of one image. Variants are
+#kept in the cache under the hash of the image's bytes, so an image that was processed
+#before (under any name, in any earlier build) is never decoded again.
+def _process_image(src_path, cache_root, widths):
+    size = image_size(src_path)
+    if size is None:
+        raise ValueError("not a PNG, JPEG, GIF or WebP image")
+    width, height = size
+    digest = _hash_file(src_path)
+    suffix = os.path.splitext(src_path)[1].lower()
+    variants = []
+    if Image is not None and suffix in VARIANT_ENCODERS:
+        image = None
+        for variant_width in sorted(set(widths)):
+            if variant_width >= width:
+                break
+            path = _cache_path(cache_root, digest, variant_width, suffix)
+            if not os.path.exists(path):
+                if image is None:
+                    image = Image.open(src_path)
+                    image.load()
+                _make_variant(image, variant_width, suffix, path)
+            variants.append(variant_width)
+    return {"width": width, "height": height, "hash": digest, "variants": variants}
+
+
+def _settings(widths):
+    #Pillow showing up (or going away) changes what every image should have.
+    return [VARIANT_FORMAT, sorted(set(widths)), Image is not None]
+
+
+class ImageIndex:
+    #What the last sync_images found for every image under the static dir, saved as
+    #images.json in the state dir and loaded by whatever renders pages. Keyed by site path
+    #(/images/a.png): the size and mtime the file had (to skip it next time), its pixel
+    #size, content hash and the widths of the variants made from it.
+
+    def __init__(self, path=None, settings=None, images=None, mtime_ns=None):
+        self.path = path
+        self.settings = settings
+        self.images = images if images is not None else {}
+        self.mtime_ns = mtime_ns
+        self._attributes = {}
+
+    #Variant widths the index was made with.
+    @property
+    def widths(self):
+        return self.settings[1] if self.settings else list(DEFAULT_WIDTHS)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return cls(path, data["settings"], data["images"], mtime_ns)
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"settings": self.settings, "images": self.images}, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+
+    def _entry(self, src):
+        entry = self.images.get(src)
+        if entry is not None:
+            return src, entry
+        if not src.startswith('/'):
+            #Relative to the page; resolving it needs the page's URL, which isn't known here.
+            return None, None
+        url = normalize_url(src)
+        return url, self.images.get(url)
+
+    #The attributes to add to an <img> with this src, or None for images not in the index.
+    #Worked out once per src: the same images turn up on page after page.
+    def attributes(self, src):
+        if src not in self._attributes:
+            self._attributes[src] = self._make_attributes(src)
+        return self._attributes[src]
+
+    def _make_attributes(self, src):
+        url, entry = self._entry(src)
+        if entry is None:
+            return None
+        attributes = {"width": str(entry["width"]), "height": str(entry["height"])}
+        if entry["variants"]:
+            candidates = [f"{quote(variant_name(url, width))} {width}w" for width in entry["variants"]]
+            candidates.append(f"{quote(url)} {entry['width']}w")
+            attributes["srcset"] = ", ".join(candidates)
+            attributes["sizes"] = f"(max-width: {entry['width']}px) 100vw, {entry['width']}px"
+        return attributes
+
+    #Give every known <img> in a node tree its attributes. Nodes get a new props dict rather
+    #than having theirs changed (props may be shared), and attributes already set are kept.
+    def annotate(self, node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if type(current) is str:
+                continue
+            if current.tag == 'img' and 'src' in current.props:
+                attributes = self.attributes(current.props['src'])
+                if attributes:
+                    props = dict(current.props)
+                    for name, value in attributes.items():
+                        props.setdefault(name, value)
+                    current.props = props
+            stack.extend(current.children)
+
+    #Short hash of what annotate() would add for these srcs ('' when none are known). Stored
+    #with a cached render, so the render is redone when one of its images changes.
+    def signature(self, srcs):
+        if not self.images:
+            return ''
+        found = [(src, self._entry(src)[1]) for src in srcs]
+        found = [(src, entry["width"], entry["height"], entry["variants"]) for src, entry in found if entry]
+        if not found:
+            return ''
+        return hashlib.sha256(json.dumps(found).encode('utf-8')).hexdigest()[:16]
+
+
+#The index pages are rendered with; empty (nothing annotated) until sync_images or configure().
+active = ImageIndex()
+
+
+def configure(index_path=None):
+    global active
+    active = ImageIndex.load(index_path) if index_path else ImageIndex()
+
+
+#Make sure the active index is the one saved at index_path, reloading it if it was saved
+#again since it was loaded (a worker process catching up with the parent).
+def refresh(index_path):
+    if index_path is None:
+        if active.path is not None:
+            configure()
+        return
+    try:
+        mtime_ns = os.stat(index_path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if index_path != active.path or mtime_ns != active.mtime_ns:
+        configure(index_path)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+#Bring the image index at index_path and the variants in dest_dir up to date with the
+#images in static_dir. Images whose size and mtime match the index are skipped; the rest
+#are read, hashed and (with Pillow) resized on a process pool, with variants served from
+#the content-addressed cache (images/ beside index_path) whenever the bytes were seen
+#before. Variants of removed images are removed. The new index becomes the active one.
+#Returns the site paths of images whose attributes changed (added, resized or removed),
+#for the caller to rebuild the pages embedding them.
+def sync_images(static_dir, dest_dir, index_path, widths=DEFAULT_WIDTHS, jobs=1):
+    global active
+    previous = ImageIndex.load(index_path)
+    settings = _settings(widths)
+    cache_dir = os.path.join(os.path.dirname(index_path), 'images')
+    cache_root = os.path.join(cache_dir, f"v{VARIANT_FORMAT}")
+    os.makedirs(cache_root, exist_ok=True)
+    for name in os.listdir(cache_dir):
+        if name != f"v{VARIANT_FORMAT}":
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+    files = {relative: state for relative, state in scan_files(static_dir).items() if is_image(relative)}
+    entries = {}
+    todo = []
+    for relative, state in files.items():
+        url = '/' + relative.replace(os.sep, '/')
+        known = previous.images.get(url)
+        suffix = os.path.splitext(relative)[1]
+        if known is not None and previous.settings == settings and known["state"] == list(state) and all(
+                os.path.exists(os.path.join(dest_dir, variant_name(relative, width))) or
+                os.path.exists(_cache_path(cache_root, known["hash"], width, suffix)) for width in known["variants"]):
+            entries[url] = known
+        else:
+            todo.append((relative, url, state))
+
+    if jobs is None or jobs <= 0:
+        jobs = os.cpu_count() or 1
+    sources = [os.path.join(static_dir, relative) for relative, _, _ in todo]
+    if jobs == 1 or len(todo) <= 1:
+        results = [_try_process(path, cache_root, widths) for path in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as executor:
+            results = list(executor.map(_try_process, sources, [cache_root] * len(sources), [widths] * len(sources)))
+
+    processed = set()
+    for (relative, url, state), (result, error) in zip(todo, results):
+        if error:
+            logger.warning("Skipping image %s: %s", relative, error)
+            continue
+        entries[url] = {"state": list(state), **result}
+        processed.add(url)
+
+    wanted = set()
+    for url, entry in entries.items():
+        relative = url.lstrip('/').replace('/', os.sep)
+        suffix = os.path.splitext(relative)[1]
+        for width in entry["variants"]:
+            dest_path = os.path.join(dest_dir, variant_name(relative, width))
+            wanted.add(dest_path)
+            if url in processed or not os.path.exists(dest_path):
+                copy_asset(_cache_path(cache_root, entry["hash"], width, suffix), dest_path)
+    for url, entry in previous.images.items():
+        relative = url.lstrip('/').replace('/', os.sep)
+        for width in entry["variants"]:
+            dest_path = os.path.join(dest_dir, variant_name(relative, width))
+            if dest_path not in wanted:
+                _remove_file(dest_path)
+
+    changed = set()
+    for url in set(previous.images) | set(entries):
+        old, new = previous.images.get(url), entries.get(url)
+        if old is None or new is None or [old[k] for k in ("width", "height", "variants")] != \
+                [new[k] for k in ("width", "height", "variants")]:
+            changed.add(url)
+
+    active = ImageIndex(index_path, settings, entries)
+    active.save()
+    removed = len(set(previous.images) - set(entries))
+    logger.info("Images: %d processed, %d unchanged, %d removed%s", len(processed), len(entries) - len(processed),
+                removed, "" if Image is not None else " (no variants: Pillow is not installed)")
+    return sorted(changed)
+
+
+#_process_image, with an error reported instead of raised so one bad file doesn't stop the rest.
+def _try_process(src_path, cache_root, widths):
+    try:
+        return _process_image(src_path, cache_root, widths), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
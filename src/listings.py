@@ -0,0 +1,248 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from depgraph import page_url
+from htmlnode import LeafNode, ParentNode
+from manifest import hash_file
+from template import TemplateResolver, load_template
+from writer import remove_file, write_if_changed
+
+
+logger = logging.getLogger("ssg.listings")
+
+#Bump when the markup of a derived page changes, so every one of them is regenerated.
+LISTINGS_VERSION = 1
+
+
+#Split items into pages of per_page; an empty list still makes one (empty) page.
+def paginate(items, per_page):
+    return [items[i:i + per_page] for i in range(0, len(items), per_page)] or [[]]
+
+
+#Output path of page `number` of a paginated listing rooted at directory base
+#('' for the site root): base/index.html, then base/page/2/index.html and so on.
+def listing_output(base, number, first_taken=False):
+    if number == 1 and not first_taken:
+        return os.path.join(base, 'index.html')
+    return os.path.join(base, 'page', str(number), 'index.html')
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'tag'
+
+
+#Tag -> the directory name of its listing under tags/. Tags that slugify alike ("C++" and
+#"C") would write to the same pages, so all but the first (in tag order) get a numeric
+#suffix, one no other tag slugifies to, and a warning says which.
+def tag_slugs(tags):
+    slugs = {tag: slugify(tag) for tag in sorted(tags)}
+    wanted = set(slugs.values())
+    owners = {}
+    for tag, slug in slugs.items():
+        if slug in owners:
+            number = 2
+            while f"{slug}-{number}" in owners or f"{slug}-{number}" in wanted:
+                number += 1
+            logger.warning("Tags %r and %r both slugify to %r, listing %r under tags/%s-%d/",
+                           owners[slug], tag, slug, tag, slug, number)
+            slug = slugs[tag] = f"{slug}-{number}"
+        owners[slug] = tag
+    return slugs
+
+
+def _listing_node(title, entries, newer=None, older=None):
+    children = [LeafNode('h1', title)]
+    items = []
+    for entry in entries:
+        parts = [LeafNode('a', entry['title'], {'href': entry['url']})]
+        if entry.get('date'):
+            parts.append(LeafNode('time', entry['date']))
+        if entry.get('summary'):
+            parts.append(LeafNode('p', entry['summary']))
+        items.append(ParentNode('li', parts))
+    if items:
+        children.append(ParentNode('ul', items))
+    links = []
+    if newer:
+        links.append(LeafNode('a', 'Newer', {'href': newer}))
+    if older:
+        links.append(LeafNode('a', 'Older', {'href': older}))
+    if links:
+        children.append(ParentNode('nav', links))
+    return ParentNode('div', children)
+
+
+def render_sitemap(entries, site_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for url, date in entries:
+        lastmod = f"<lastmod>{escape(date)}</lastmod>" if date else ''
+        lines.append(f"<url><loc>{escape(site_url + url)}</loc>{lastmod}</url>")
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+def _rfc822(date):
+    try:
+        parsed = datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed)
+
+
+def render_feed(entries, site_url, site_title):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<rss version="2.0"><channel>',
+             f"<title>{escape(site_title)}</title>", f"<link>{escape(site_url + '/')}</link>",
+             f"<description>{escape(site_title)}</description>"]
+    for entry in entries:
+        link = escape(site_url + entry['url'])
+        item = [f"<title>{escape(entry['title'])}</title>", f"<link>{link}</link>", f"<guid>{link}</guid>"]
+        published = _rfc822(entry['date'])
+        if published:
+            item.append(f"<pubDate>{published}</pubDate>")
+        if entry.get('summary'):
+            item.append(f"<description>{escape(entry['summary'])}</description>")
+        lines.append('<item>' + ''.join(item) + '</item>')
+    lines.append('</channel></rss>')
+    return '\n'.join(lines) + '\n'
+
+
+class ListingPlanner:
+    #Works out every derived page from a SiteIndex:
+    #  <section>/index.html, <section>/page/N/index.html  - newest first listing of each content
+    #      directory; when the section has its own index.md, page 1 moves to <section>/page/1/
+    #  tags/index.html, tags/<tag>/..., paginated the same way - one listing per tag
+    #  sitemap.xml and feed.xml (RSS 2.0, the newest dated pages)
+    #Each planned page is (output, digest, render) where digest covers everything the page
+    #shows, so unchanged listings can be skipped without rendering them.
+
+    def __init__(self, index, content_root, template_path, per_page=10, site_url='', site_title='Site', feed_size=20):
+        self.index = index
+        self.resolver = TemplateResolver(content_root, template_path)
+        self.content_root = content_root
+        self.per_page = per_page
+        self.site_url = site_url.rstrip('/')
+        self.site_title = site_title
+        self.feed_size = feed_size
+        self.template_hashes = {}
+
+    def _entry(self, page):
+        return {key: page[key] for key in ('url', 'title', 'date', 'summary')}
+
+    def _digest(self, *parts):
+        return hashlib.sha256(json.dumps([LISTINGS_VERSION, *parts], sort_keys=True).encode()).hexdigest()
+
+    def _template_hash(self, template_path):
+        if template_path not in self.template_hashes:
+            self.template_hashes[template_path] = hash_file(template_path)
+        return self.template_hashes[template_path]
+
+    def _paginated(self, base, title, entries, template_path, first_taken=False):
+        chunks = paginate(entries, self.per_page)
+        outputs = [listing_output(base, number, first_taken) for number in range(1, len(chunks) + 1)]
+        planned = []
+        for number, chunk in enumerate(chunks):
+            newer = page_url(outputs[number - 1]) if number > 0 else None
+            older = page_url(outputs[number + 1]) if number + 1 < len(chunks) else None
+            page_title = title if number == 0 else f"{title} (page {number + 1})"
+            digest = self._digest(page_title, chunk, newer, older, self._template_hash(template_path))
+
+            def render(page_title=page_title, chunk=chunk, newer=newer, older=older):
+                out = io.StringIO()
+                load_template(template_path).render(
+                    out, {"Title": page_title, "Content": _listing_node(page_title, chunk, newer, older)})
+                return out.getvalue()
+
+            planned.append((outputs[number], digest, render))
+        return planned
+
+    def plan(self):
+        planned = []
+        pages = self.index.pages()
+        owned = {page['output'] for page in pages}
+
+        for section in self.index.sections():
+            base = section.replace('/', os.sep)
+            members = [self._entry(page) for page in self.index.pages(section)
+                       if os.path.basename(page['source']) != 'index.md']
+            if not members:
+                continue
+            title = section.rsplit('/', 1)[-1].replace('-', ' ').title() if section else self.site_title
+            template_path = self.resolver.for_dir(os.path.join(self.content_root, base))
+            planned.extend(self._paginated(base, title, members, template_path,
+                                           first_taken=os.path.join(base, 'index.html') in owned))
+
+        tags = self.index.tags()
+        if tags:
+            slugs = tag_slugs(tags)
+            tag_entries = [{'url': page_url(os.path.join('tags', slugs[tag], 'index.html')),
+                            'title': f"{tag} ({count})", 'date': None, 'summary': None}
+                           for tag, count in tags.items()]
+            planned.extend(self._paginated('tags', 'Tags', tag_entries, self.resolver.default_template))
+            for tag in tags:
+                members = [self._entry(page) for page in self.index.pages_tagged(tag)]
+                planned.extend(self._paginated(os.path.join('tags', slugs[tag]), f"Tagged {tag}", members,
+                                               self.resolver.default_template))
+
+        listing_outputs = [output for output, _, _ in planned]
+        sitemap_entries = [(page['url'], page['date']) for page in sorted(pages, key=lambda page: page['url'])]
+        sitemap_entries += [(page_url(output), None) for output in sorted(listing_outputs)]
+        planned.append(('sitemap.xml', self._digest('sitemap', self.site_url, sitemap_entries),
+                        lambda: render_sitemap(sitemap_entries, self.site_url)))
+
+        feed_entries = [self._entry(page) for page in pages if page['date']][:self.feed_size]
+        planned.append(('feed.xml', self._digest('feed', self.site_url, self.site_title, feed_entries),
+                        lambda: render_feed(feed_entries, self.site_url, self.site_title)))
+        return planned
+
+
+#Write the derived pages planned from the index into dest_dir. The digest of every page
+#written is remembered in state_path; a page whose digest (its members, their titles,
+#dates and summaries, its pagination and template) is unchanged and whose output exists
+#is skipped without being rendered. Derived pages that are no longer planned are removed.
+#Returns (written, unchanged, removed) counts.
+def generate_listings(index, dest_dir, content_root, template_path, state_path, per_page=10, site_url='',
+                      site_title='Site', feed_size=20):
+    try:
+        with open(state_path, 'r') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    planner = ListingPlanner(index, content_root, template_path, per_page, site_url, site_title, feed_size)
+    current = {}
+    written = 0
+    for output, digest, render in planner.plan():
+        current[output] = digest
+        dest_path = os.path.join(dest_dir, output)
+        if previous.get(output) == digest and os.path.exists(dest_path):
+            continue
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        write_if_changed(dest_path, render().encode('utf-8'))
+        logger.debug("Generated listing: %s", output)
+        written += 1
+
+    removed = 0
+    owned = {page['output'] for page in index.pages()}
+    for output in sorted(set(previous) - set(current)):
+        #A content page may have taken the place of a listing since; leave it alone.
+        if output not in owned:
+            remove_file(os.path.join(dest_dir, output), dest_dir)
+        removed += 1
+
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump(current, f, sort_keys=True)
+    os.replace(state_path + '.tmp', state_path)
+
+    logger.info("Listings: %d written, %d unchanged, %d removed", written, len(current) - written, removed)
+    return written, len(current) - written, removed
@@ -1,13 +1,35 @@
 from textnode import TextNode
 from htmlnode import HTMLNode,markdown_to_html_node, markdown_to_blocks
+from manifest import BuildManifest, hash_file
+from template import TEMPLATE_FILE_NAME, TemplateResolver, load_template
+from cache import PageCache
+from assets import copy_asset, sync_assets
+from compress import precompress
+from writer import OutputWriter, StagedOutput, remove_file, write_if_changed
+from depgraph import DependencyGraph, page_url
+from render import page_context, render_markdown, stream_markdown
+from siteindex import SiteIndex
+from listings import generate_listings
+from scanner import TreeSnapshot, iter_pages
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import highlight
+import images
+import profiler
+import argparse
+import json
+import logging
 import os
 import shutil
 
 
+#Per-file progress is logged at DEBUG (shown with --verbose), build summaries at INFO.
+logger = logging.getLogger("ssg")
+
 
 def clear_directory(directory):
     if os.path.exists(directory):
-        print("Clearing directory")
+        logger.info("Clearing directory")
         shutil.rmtree(directory)
     os.mkdir(directory)
 
@@ -17,92 +39,464 @@ def recursive_copy(src,dst):
     if not os.path.exists(dst):
         os.mkdir(dst)
        
-    #List all items in the source directory and assign them a path
-    for item in os.listdir(src):
-        src_item_path = os.path.join(src, item)
-        dst_item_path = os.path.join(dst, item)
-
-        if os.path.isfile(src_item_path):
-        #copy file
-            shutil.copy(src_item_path, dst_item_path)
-            print(f"Copied file: {src_item_path}")
-        elif os.path.isdir(src_item_path):
-            #Recursively copy dir
-            recursive_copy(src_item_path,dst_item_path) 
-
-def extract_title(markdown):
-    lines = markdown.strip().split('\n')
-    for line in lines:
-        if line.startswith('# '):
-            return line[2:].strip()
-    raise ValueError('No h1 header found in the markdown.')
-
-
-        
-
-def generate_page(from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-
-    # Read markdown file
-    with open(from_path, 'r') as f:
-        markdown_content = f.read()
-    #print(f"Markdown Content:{markdown_content[:100]}...")
-
-    # Read template file
-    with open(template_path, 'r') as f:
-        template_content = f.read()
-    #print(f"Template Content:{template_content}...")
-
-    # Convert markdown to HTML Node
-    html_node = markdown_to_html_node(markdown_content)
-    #print(f"HTML Node Content:{html_node}...")
-
-    # Use the to_html() method to get a string representation
-    html_content = html_node.to_html()
-    #print(f"HTML Content:{html_content}...")
-
-    # Extract title
-    title = extract_title(markdown_content)
-    #print(f"Title: {title}")
-
-    # Replace placeholders in template
-    final_html = template_content.replace('{{ Title }}', title).replace('{{ Content }}', html_content)
-    #print(f"Final HTML Content:{final_html}...")
-
-
-    # Ensure destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-
-    # Write final HTML to dest_path
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
-
-    print("Page generated successfully!")
-
-def generate_page_recursive(dir_path_content, template_path, dest_dir_path):
+    #List all items in the source directory; scandir knows each one's type without a stat
+    with os.scandir(src) as entries:
+        for entry in entries:
+            dst_item_path = os.path.join(dst, entry.name)
+
+            if entry.is_file():
+            #copy file
+                shutil.copy(entry.path, dst_item_path)
+                logger.debug("Copied file: %s", entry.path)
+            elif entry.is_dir():
+                #Recursively copy dir
+                recursive_copy(entry.path,dst_item_path) 
+
+#With a PageCache, a page whose markdown was rendered before skips parsing entirely.
+#Files of stream_threshold bytes or more are streamed block by block into the output
+#instead of being read, parsed and serialized whole (and bypass the cache).
+#Each step is reported to the active profiler, a no-op unless the build runs with --profile.
+#With an OutputWriter the rendered page is handed to it instead of being written here.
+#Returns the page info (see render._new_page_info).
+def generate_page(from_path, template_path, dest_path, cache=None, stream_threshold=None, writer=None):
+    logger.debug("Generating page from %s to %s using %s", from_path, dest_path, template_path)
+
+    if stream_threshold and os.path.getsize(from_path) >= stream_threshold:
+        logger.debug("Streaming large page: %s", from_path)
+        template = load_template(template_path)
+        content, info = stream_markdown(from_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        #Too big to hand to a writer; written next to dest_path and renamed over it instead.
+        with open(dest_path + '.write-tmp', 'w', encoding='utf-8') as f:
+            template.render(f, page_context(info, content))
+        os.replace(dest_path + '.write-tmp', dest_path)
+        logger.debug("Page generated successfully!")
+        return info
+
+    with profiler.active.page(from_path):
+        # Read markdown file
+        with profiler.stage("read"):
+            with open(from_path, 'r') as f:
+                markdown_content = f.read()
+
+        # Load the compiled template (parsed once per build, re-read only when it changes)
+        with profiler.stage("template_load"):
+            template = load_template(template_path)
+
+        html_content, info = render_markdown(markdown_content, cache)
+        context = page_context(info, html_content)
+
+        # The template's own text is pre-encoded: the page goes out as byte chunks, never joined
+        with profiler.stage("template_fill"):
+            page = template.render_bytes(context)
+
+        if writer is not None:
+            with profiler.stage("write"):
+                writer.write(dest_path, page)
+            logger.debug("Page generated successfully!")
+            return info
+
+        # Ensure destination directory exists
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+        with profiler.stage("write"):
+            write_if_changed(dest_path, page)
+
+    logger.debug("Page generated successfully!")
+    return info
+
+def generate_page_recursive(dir_path_content, template_path, dest_dir_path, stream_threshold=None):
     
-    dir_list = os.listdir(dir_path_content)
+    with os.scandir(dir_path_content) as entries:
+        dir_list = list(entries)
+
+    #A template.html inside a content directory overrides the template for that subtree
+    local_template_path = os.path.join(dir_path_content, TEMPLATE_FILE_NAME)
+    if any(entry.name == TEMPLATE_FILE_NAME and entry.is_file() for entry in dir_list):
+        template_path = local_template_path
 
-    for item in dir_list:
-        item_full_path = os.path.join(dir_path_content, item)
-        print(f"Processing: {item_full_path}")
+    for entry in dir_list:
+        item, item_full_path = entry.name, entry.path
+        logger.debug("Processing: %s", item_full_path)
 
-        if os.path.isfile(item_full_path) and item.endswith('.md'):
+        if entry.is_file() and item.endswith('.md'):
             dest_file_name = item.replace('.md', '.html')
             dest_file_path = os.path.join(dest_dir_path, dest_file_name)
-            print(f"Generating HTML file: {dest_file_path}")
+            logger.debug("Generating HTML file: %s", dest_file_path)
 
-            generate_page(item_full_path,template_path,dest_file_path)
+            generate_page(item_full_path,template_path,dest_file_path,stream_threshold=stream_threshold)
             
 
-        elif os.path.isdir(item_full_path):
+        elif entry.is_dir():
             new_dest_dir_path = os.path.join(dest_dir_path,item)
-            print(f"Creating/Ensuring directory: {new_dest_dir_path}")
+            logger.debug("Creating/Ensuring directory: %s", new_dest_dir_path)
 
             os.makedirs(new_dest_dir_path, exist_ok=True)
-            generate_page_recursive(item_full_path,template_path,new_dest_dir_path)
-
-
+            generate_page_recursive(item_full_path,template_path,new_dest_dir_path,stream_threshold)
+
+
+
+
+#Pair every .md file under the content dir with its .html output path, in a stable order.
+def find_pages(dir_path_content, dest_dir_path):
+    return list(iter_pages(dir_path_content, dest_dir_path))
+
+
+class _RecordCollector(logging.Handler):
+    #Holds log records back (in a picklable form) so they can be replayed in page order.
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        self.records.append(record)
+
+
+#Worker side of build_pages: generate one batch of (src, dest, template) pages, holding back
+#each page's log records so the parent can replay them in page order.
+#Pages are written by an OutputWriter thread; a page whose write fails is reported as failed.
+#With profile set (only done for worker processes) the batch is timed by a fresh profiler
+#whose page timings are returned alongside, for the parent to merge.
+#highlight_dir is the parent's highlight cache directory, for workers to share, and
+#images_path the image index it renders with.
+def _generate_batch(batch, cache=None, profile=False, stream_threshold=None, highlight_dir=None, images_path=None):
+    if highlight_dir != highlight.active.cache_dir:
+        highlight.configure(highlight_dir)
+    images.refresh(images_path)
+    own_profiler = profile
+    if own_profiler:
+        profiler.enable()
+
+    results = []
+    writer = OutputWriter()
+    handlers, propagate = logger.handlers, logger.propagate
+    logger.propagate = False
+    try:
+        for src_path, dest_path, template_path in batch:
+            collector = _RecordCollector()
+            logger.handlers = [collector]
+            info, error = None, None
+            try:
+                info = generate_page(src_path, template_path, dest_path, cache, stream_threshold, writer)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            results.append((src_path, collector.records, error, info))
+    finally:
+        logger.handlers, logger.propagate = handlers, propagate
+        write_errors = writer.close()
+
+    for i, (src_path, dest_path, _) in enumerate(batch):
+        if dest_path in write_errors:
+            results[i] = (src_path, results[i][1], write_errors[dest_path], None)
+
+    profile_pages = None
+    if own_profiler:
+        profile_pages = profiler.active.pages
+        profiler.disable()
+    return results, profile_pages
+
+
+#Generate (src, dest) pages, fanning them out over a process pool when jobs > 1.
+#Pages are handed out in chunks to keep pickling overhead down; results come back
+#in submission order so output and error reports are the same on every run.
+#With content_root set, per-directory templates under it take precedence over template_path.
+#With a PageCache, unchanged markdown is served from it and the cache is pruned afterwards.
+#on_page(src_path, dest_path, template_path, info) is called in page order for every page
+#that built, with the info generate_page returned.
+#Returns a list of (src_path, error message) for pages that failed.
+def build_pages(pages, template_path, jobs=1, chunk_size=None, content_root=None, cache=None,
+                stream_threshold=None, on_page=None):
+    if jobs is None or jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if content_root:
+        resolver = TemplateResolver(content_root, template_path)
+        pages = [(src_path, dest_path, resolver.for_page(src_path)) for src_path, dest_path in pages]
+    else:
+        pages = [(src_path, dest_path, template_path) for src_path, dest_path in pages]
+    profile = profiler.active.enabled
+    targets = {src_path: (dest_path, page_template) for src_path, dest_path, page_template in pages}
+    if jobs == 1 or len(pages) <= 1:
+        failures = _report_batches([_generate_batch(pages, cache, stream_threshold=stream_threshold,
+                                                    highlight_dir=highlight.active.cache_dir,
+                                                    images_path=images.active.path)], targets, on_page)
+    else:
+        if not chunk_size:
+            chunk_size = max(1, min(64, len(pages) // (jobs * 4)))
+        batches = [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+        with ProcessPoolExecutor(max_workers=min(jobs, len(batches))) as executor:
+            failures = _report_batches(executor.map(_generate_batch, batches, repeat(cache), repeat(profile),
+                                                      repeat(stream_threshold), repeat(highlight.active.cache_dir),
+                                                      repeat(images.active.path)),
+                                       targets, on_page)
+
+    if cache is not None:
+        cache.prune()
+    return failures
+
+
+def _report_batches(results, targets, on_page=None):
+    failures = []
+    for batch, profile_pages in results:
+        for src_path, records, error, info in batch:
+            for record in records:
+                logger.handle(record)
+            if error:
+                logger.error("Failed to generate %s: %s", src_path, error)
+                failures.append((src_path, error))
+            elif on_page is not None:
+                on_page(src_path, *targets[src_path], info)
+        if profile_pages:
+            profiler.active.merge(profile_pages)
+    return failures
+
+
+def raise_for_failures(failures):
+    if failures:
+        raise RuntimeError(f"{len(failures)} page(s) failed to build, first: {failures[0][0]}: {failures[0][1]}")
+
+
+#Delete a generated file and any directories the deletion leaves empty, stopping at the output root.
+def remove_output(dest_path, dest_dir_path):
+    if remove_file(dest_path, dest_dir_path):
+        logger.info("Removed stale output: %s", dest_path)
+
+
+#Where generate_page_recursive would write the page for a source file.
+def output_path_for(src_path, dir_path_content, dest_dir_path):
+    relative = os.path.relpath(src_path, dir_path_content)
+    directory, name = os.path.split(relative)
+    return os.path.join(dest_dir_path, directory, name.replace('.md', '.html'))
+
+
+def _is_within(path, directory):
+    return path.startswith(os.path.abspath(directory) + os.sep)
+
+
+#on_page callback for build_pages that records every built page in a DependencyGraph
+#and/or a SiteIndex.
+#With a BuildManifest, pages found in entries (see manifest_entries) are recorded in it too.
+def record_pages(dir_path_content, dest_dir_path, graph=None, index=None, manifest=None, entries=None):
+    def record(src_path, dest_path, template_path, info):
+        source = os.path.relpath(src_path, dir_path_content)
+        output = os.path.relpath(dest_path, dest_dir_path)
+        if graph is not None:
+            graph.update_page(source, output, template_path, info["links"], info["images"])
+        if index is not None:
+            index.update_page(source, output, info)
+        if manifest is not None and source in entries:
+            manifest.record(*entries[source])
+    return record
+
+
+#Manifest entries (source, hash, output, template hash) for every page in a TreeSnapshot
+#of the content dir, hashed before the build reads them, so a full build leaves the same
+#manifest an incremental one would and the next --incremental run starts from it.
+def manifest_entries(dir_path_content, template_path, scan):
+    resolver = TemplateResolver(dir_path_content, template_path)
+    template_hashes = {}
+    entries = {}
+    for source in scan.files:
+        directory, name = os.path.split(source)
+        src_path = os.path.join(dir_path_content, source)
+        page_template = resolver.for_page(src_path)
+        if page_template not in template_hashes:
+            template_hashes[page_template] = hash_file(page_template)
+        entries[source] = (source, hash_file(src_path), os.path.join(directory, name.replace('.md', '.html')),
+                           template_hashes[page_template])
+    return entries
+
+
+#Log every page that still links to or embeds one of the removed site paths.
+def warn_dangling_references(graph, removed_urls):
+    for url in removed_urls:
+        for page in sorted(graph.pages_linking_to(url) | graph.pages_embedding(url)):
+            logger.warning("%s still references removed %s", page, url)
+
+
+#Rebuild only what a set of changed files affects: changed pages are regenerated (or their
+#output removed when the source is gone), a changed template regenerates every page in its
+#scope and changed static files are copied over. Returns failures like build_pages.
+#With an active image index, changed images are synced into it and, with a graph, the pages
+#embedding an image whose size or variants changed are regenerated.
+#With a DependencyGraph, an edited template regenerates exactly the pages rendered with it,
+#the graph is kept up to date (and saved) and pages left pointing at a removed page or
+#asset are reported. A SiteIndex is kept up to date the same way. A page cache is used as in build_pages.
+def rebuild_paths(changed_paths, dir_path_content, template_path, dest_dir_path, static_dir=None, graph=None,
+                  index=None, cache=None):
+    pages = {}
+    template_scopes = set()
+    removed_urls = []
+    images_changed = False
+
+    for path in sorted(os.path.abspath(p) for p in changed_paths):
+        in_content = _is_within(path, dir_path_content)
+        if path == os.path.abspath(template_path) or (in_content and os.path.basename(path) == TEMPLATE_FILE_NAME):
+            dependents = graph.pages_using_template(path) if graph is not None and os.path.isfile(path) else None
+            if dependents:
+                for source in dependents:
+                    pages[os.path.join(os.path.abspath(dir_path_content), source)] = os.path.join(
+                        dest_dir_path, graph.pages[source]["output"])
+            elif path == os.path.abspath(template_path):
+                template_scopes.add(os.path.abspath(dir_path_content))
+            else:
+                #Added or removed, so which pages it applies to changes: redo its whole subtree.
+                template_scopes.add(os.path.dirname(path))
+        elif in_content and path.endswith('.md'):
+            dest_path = output_path_for(path, dir_path_content, dest_dir_path)
+            if os.path.isfile(path):
+                pages[path] = dest_path
+            else:
+                remove_output(dest_path, dest_dir_path)
+                if index is not None:
+                    index.remove_page(os.path.relpath(path, dir_path_content))
+                if graph is not None:
+                    graph.remove_page(os.path.relpath(path, dir_path_content))
+                    removed_urls.append(page_url(os.path.relpath(dest_path, dest_dir_path)))
+        elif static_dir and _is_within(path, static_dir):
+            dest_path = os.path.join(dest_dir_path, os.path.relpath(path, static_dir))
+            images_changed = images_changed or images.is_image(path)
+            if os.path.isfile(path):
+                copy_asset(path, dest_path)
+                logger.debug("Copied file: %s", path)
+            else:
+                remove_output(dest_path, dest_dir_path)
+                removed_urls.append(page_url(os.path.relpath(dest_path, dest_dir_path)))
+
+    if images_changed and images.active.path is not None:
+        changed_urls = images.sync_images(static_dir, dest_dir_path, images.active.path, images.active.widths)
+        if graph is not None:
+            for source in graph.affected_pages(asset_urls=changed_urls):
+                pages[os.path.join(os.path.abspath(dir_path_content), source)] = os.path.join(
+                    dest_dir_path, graph.pages[source]["output"])
+
+    if template_scopes:
+        for src_path, dest_path in find_pages(dir_path_content, dest_dir_path):
+            src_path = os.path.abspath(src_path)
+            if any(_is_within(src_path, scope) for scope in template_scopes):
+                pages[src_path] = dest_path
+
+    failures = build_pages(sorted(pages.items()), template_path, content_root=dir_path_content, cache=cache,
+                           on_page=record_pages(dir_path_content, dest_dir_path, graph, index))
+    if graph is not None:
+        warn_dangling_references(graph, removed_urls)
+        graph.save()
+    if index is not None:
+        index.save()
+    return failures
+
+
+#Only regenerate pages whose markdown (or template) changed since the last build,
+#using the manifest at manifest_path to remember hashes and outputs between runs.
+#The dependency graph (depgraph.json) and site index (site.db) next to the manifest are
+#kept in step; a page either doesn't know yet is regenerated once so it gets recorded.
+#The size and mtime of every page are kept too (pages.json), so only pages that look
+#changed since the last build are read and hashed.
+#Pages embedding one of changed_images (site paths, as sync_images returns) are regenerated.
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, manifest_path, jobs=1, chunk_size=None,
+                               cache=None, stream_threshold=None, changed_images=()):
+    state_dir = os.path.dirname(manifest_path)
+    manifest = BuildManifest.load(manifest_path)
+    graph = DependencyGraph.load(os.path.join(state_dir, 'depgraph.json'))
+    index = SiteIndex(os.path.join(state_dir, 'site.db'))
+    indexed = index.sources()
+    resolver = TemplateResolver(dir_path_content, template_path)
+    template_hashes = {}
+    previous_scan = TreeSnapshot.load(os.path.join(state_dir, 'pages.json'))
+    scan = TreeSnapshot.scan(previous_scan.path, dir_path_content, '.md')
+    image_pages = graph.affected_pages(asset_urls=changed_images)
+
+    seen = set()
+    stale = []
+    hashes = {}
+    rehashed = 0
+    for source, file_state in scan.files.items():
+        directory, name = os.path.split(source)
+        src_path = os.path.join(dir_path_content, source)
+        output = os.path.join(directory, name.replace('.md', '.html'))
+        dest_path = os.path.join(dest_dir_path, output)
+        known = manifest.pages.get(source)
+        if known is not None and previous_scan.unchanged(source, file_state):
+            source_hash = known["hash"]
+        else:
+            source_hash = hash_file(src_path)
+            rehashed += 1
+        page_template = resolver.for_page(src_path)
+        if page_template not in template_hashes:
+            template_hashes[page_template] = hash_file(page_template)
+        entry = (source, source_hash, output, template_hashes[page_template])
+        seen.add(source)
+
+        if manifest.is_stale(*entry) or not os.path.exists(dest_path) or source not in graph.pages or \
+                source not in indexed or source in image_pages:
+            stale.append((src_path, dest_path))
+            hashes[src_path] = entry
+        else:
+            manifest.record(*entry)
+
+    #Failed pages stay out of the manifest so the next build retries them.
+    failures = build_pages(stale, template_path, jobs, chunk_size, content_root=dir_path_content, cache=cache,
+                           stream_threshold=stream_threshold,
+                           on_page=record_pages(dir_path_content, dest_dir_path, graph, index))
+    failed = {src_path for src_path, _ in failures}
+    for src_path, _ in stale:
+        if src_path in failed:
+            manifest.forget(hashes[src_path][0])
+        else:
+            manifest.record(*hashes[src_path])
+    generated = len(stale) - len(failed)
+
+    #Sources that disappeared take their generated pages with them.
+    for source in sorted(manifest.sources() - seen):
+        output = manifest.forget(source)
+        if output:
+            remove_output(os.path.join(dest_dir_path, output), dest_dir_path)
+    for source in sorted(set(graph.pages) - seen):
+        graph.remove_page(source)
+    for source in sorted(indexed - seen):
+        index.remove_page(source)
+
+    manifest.save()
+    scan.save()
+    graph.save()
+    index.save()
+    index.close()
+    logger.debug("Hashed %d of %d pages, the rest are unchanged since the last scan", rehashed, len(seen))
+    logger.info("Incremental build: %d of %d pages regenerated", generated, len(seen))
+    raise_for_failures(failures)
+    return generated
+
+
+#Report internal links and images that resolve to no file in dest_dir, straight from the
+#dependency graph of the last build. Returns the (page, target) pairs found.
+def check_links(graph_path, dest_dir_path):
+    broken = DependencyGraph.load(graph_path).broken_links(dest_dir_path)
+    for page, target in broken:
+        logger.warning("Broken link in %s: %s", page, target)
+    logger.info("Link check: %d broken link(s)", len(broken))
+    return broken
+
+
+class JsonLogFormatter(logging.Formatter):
+    #One JSON object per line, for CI log collectors.
+    def format(self, record):
+        return json.dumps({"time": record.created, "level": record.levelname, "message": record.getMessage()})
+
+
+def configure_logging(verbosity=0, log_format="text"):
+    level = {-1: logging.WARNING, 0: logging.INFO}.get(verbosity, logging.DEBUG)
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter() if log_format == "json" else logging.Formatter("%(message)s"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+#Build state that describes the output tree (as opposed to caches keyed by content).
+STAGED_STATE = ('manifest.json', 'pages.json', 'depgraph.json', 'site.db', 'assets.json', 'images.json',
+                'listings.json', 'precompress.json')
 
 
 def main():
@@ -110,8 +504,142 @@ def main():
     template_path='/home/crimsonchamp/workspace/github.com/Crimsonchamp/ssgenerator/template.html'
     destination_path='/home/crimsonchamp/workspace/github.com/Crimsonchamp/ssgenerator/public'
 
-
-    generate_page_recursive(from_path,template_path,destination_path)
+    parser = argparse.ArgumentParser(description="Static site generator")
+    parser.add_argument("--content", type=str, help="Directory holding the markdown sources", default=from_path)
+    parser.add_argument("--template", type=str, help="HTML template file", default=template_path)
+    parser.add_argument("--dest", type=str, help="Directory to write the site to", default=destination_path)
+    parser.add_argument("--incremental", action="store_true", help="Only rebuild pages that changed since the last build")
+    parser.add_argument("--jobs", type=int, help="Worker processes for page generation (0 = one per CPU)", default=1)
+    parser.add_argument("--chunk-size", type=int, help="Pages handed to a worker at a time", default=None)
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap scanning, reading, converting and writing pages (full builds only)")
+    parser.add_argument("--readers", type=int, help="Threads reading markdown with --pipeline", default=4)
+    parser.add_argument("--cache", action="store_true", help="Reuse rendered pages from the on-disk cache")
+    parser.add_argument("--cache-size", type=int, help="Page cache size limit in MB", default=256)
+    parser.add_argument("--state-dir", type=str, help="Where build state (manifest, caches) is kept", default=None)
+    parser.add_argument("--static", type=str, help="Static assets to sync into the destination", default=None)
+    parser.add_argument("--asset-jobs", type=int, help="Threads copying static assets", default=8)
+    parser.add_argument("--link-assets", action="store_true", help="Hardlink assets instead of copying them")
+    parser.add_argument("--asset-hash", action="store_true",
+                        help="Compare contents before recopying a same-size asset with a new mtime")
+    parser.add_argument("--images", action="store_true",
+                        help="Give static images width/height on every page and make resized variants for srcset")
+    parser.add_argument("--image-widths", type=str, help="Comma separated widths of the image variants, in pixels",
+                        default=",".join(str(width) for width in images.DEFAULT_WIDTHS))
+    parser.add_argument("--stream-threshold", type=int,
+                        help="Stream markdown files of this many MB or more block by block (0 = never)", default=32)
+    parser.add_argument("--precompress", action="store_true",
+                        help="Write .gz (and .br, with the brotli module) siblings of HTML and text files")
+    parser.add_argument("--precompress-min-size", type=int, help="Smallest file to precompress, in bytes",
+                        default=1024)
+    parser.add_argument("--listings", action="store_true",
+                        help="Generate section and tag listings, sitemap.xml and feed.xml from the site index")
+    parser.add_argument("--per-page", type=int, help="Entries per listing page", default=10)
+    parser.add_argument("--site-url", type=str, help="Absolute site URL for the sitemap and feed", default='')
+    parser.add_argument("--site-title", type=str, help="Site name used by the feed and the top listing",
+                        default='Site')
+    parser.add_argument("--feed-size", type=int, help="Newest dated pages in feed.xml", default=20)
+    parser.add_argument("--atomic", action="store_true",
+                        help="Build into a staging copy of the destination and swap it in when the build succeeds")
+    parser.add_argument("--check-links", action="store_true",
+                        help="After the build, report internal links and images that point at nothing")
+    parser.add_argument("--profile", type=str, help="Time every build stage per page and write a JSON report here",
+                        default=None)
+    parser.add_argument("--profile-top", type=int, help="Slowest pages to list after a profiled build", default=10)
+    parser.add_argument("-q", "--quiet", action="store_const", const=-1, dest="verbosity", default=0,
+                        help="Only log warnings and errors")
+    parser.add_argument("-v", "--verbose", action="store_const", const=1, dest="verbosity",
+                        help="Log every file processed")
+    parser.add_argument("--log-format", choices=("text", "json"), help="Log line format", default="text")
+    args = parser.parse_args()
+    if args.pipeline and (args.incremental or args.profile):
+        parser.error("--pipeline can't be combined with --incremental or --profile")
+    if args.images and not args.static:
+        parser.error("--images needs --static")
+    try:
+        image_widths = [int(width) for width in args.image_widths.split(',') if width.strip()]
+    except ValueError:
+        parser.error(f"--image-widths must be numbers, got {args.image_widths!r}")
+
+    configure_logging(args.verbosity, args.log_format)
+    if args.profile:
+        profiler.enable()
+
+    state_dir = args.state_dir or os.path.join(os.path.dirname(os.path.abspath(args.template)), '.ssg')
+    cache = PageCache(os.path.join(state_dir, 'cache'), args.cache_size * 1024 * 1024) if args.cache else None
+    highlight.configure(os.path.join(state_dir, 'highlight'))
+    stream_threshold = args.stream_threshold * 1024 * 1024
+
+    #With --atomic everything below writes into a staging copy that only replaces args.dest at the end,
+    #and the state saved on the way is rolled back with it if the build fails.
+    staged = None
+    if args.atomic:
+        staged = StagedOutput(args.dest, [os.path.join(state_dir, name) for name in STAGED_STATE])
+    dest = staged.root if staged else args.dest
+    try:
+        if args.static:
+            sync_assets(args.static, dest, os.path.join(state_dir, 'assets.json'), jobs=args.asset_jobs,
+                        link=args.link_assets, check_hash=args.asset_hash)
+        changed_images = []
+        if args.images:
+            changed_images = images.sync_images(args.static, dest, os.path.join(state_dir, 'images.json'),
+                                                image_widths, jobs=args.jobs)
+
+        if args.incremental:
+            generate_pages_incremental(args.content, args.template, dest, os.path.join(state_dir, 'manifest.json'),
+                                       jobs=args.jobs, chunk_size=args.chunk_size, cache=cache,
+                                       stream_threshold=stream_threshold, changed_images=changed_images)
+        else:
+            #A full build describes every page, so it starts the manifest, dependency graph and site
+            #index over; pages that fail stay out of the manifest, as in an incremental build.
+            manifest = BuildManifest(os.path.join(state_dir, 'manifest.json'))
+            scan = TreeSnapshot.scan(os.path.join(state_dir, 'pages.json'), args.content, '.md')
+            entries = manifest_entries(args.content, args.template, scan)
+            graph = DependencyGraph(os.path.join(state_dir, 'depgraph.json'))
+            index = SiteIndex(os.path.join(state_dir, 'site.db'))
+            index.clear()
+            on_page = record_pages(args.content, dest, graph, index, manifest, entries)
+            if args.pipeline:
+                from pipeline import PipelinedBuild
+                build = PipelinedBuild(args.content, args.template, dest, args.jobs, args.readers,
+                                       args.chunk_size or 8, cache=cache, stream_threshold=stream_threshold)
+                failures = build.run(on_page)
+            else:
+                pages = find_pages(args.content, dest)
+                failures = build_pages(pages, args.template, args.jobs, args.chunk_size, content_root=args.content,
+                                       cache=cache, stream_threshold=stream_threshold, on_page=on_page)
+            manifest.save()
+            scan.save()
+            graph.save()
+            index.save()
+            index.close()
+            raise_for_failures(failures)
+
+        if args.listings:
+            index = SiteIndex(os.path.join(state_dir, 'site.db'))
+            generate_listings(index, dest, args.content, args.template, os.path.join(state_dir, 'listings.json'),
+                              per_page=args.per_page, site_url=args.site_url, site_title=args.site_title,
+                              feed_size=args.feed_size)
+            index.close()
+
+        if args.precompress:
+            precompress(dest, jobs=args.asset_jobs, min_size=args.precompress_min_size,
+                        state_path=os.path.join(state_dir, 'precompress.json'))
+    except BaseException:
+        if staged:
+            staged.discard()
+        raise
+    if staged:
+        staged.publish()
+
+    if args.check_links:
+        broken = check_links(os.path.join(state_dir, 'depgraph.json'), args.dest)
+        if broken:
+            raise SystemExit(1)
+
+    if args.profile:
+        profiler.active.report(args.profile)
+        print(profiler.active.summary(args.profile_top))
 
 
 
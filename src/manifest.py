@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+
+
+MANIFEST_VERSION = 2
+
+
+#Hash a file's bytes in chunks so large pages never sit in memory twice.
+def hash_file(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    #Persistent record of what the last build produced.
+    #pages maps a source path (relative to the content dir) to its content hash,
+    #output path (relative to the destination dir) and the hash of the template it used.
+
+    def __init__(self, path, pages=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        #A missing or unreadable manifest just means "build everything".
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        data = {"version": MANIFEST_VERSION, "pages": self.pages}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        #Replace in one step so an interrupted build never leaves half a manifest.
+        os.replace(tmp_path, self.path)
+
+    def is_stale(self, source, source_hash, output, template_hash):
+        entry = self.pages.get(source)
+        if entry is None:
+            return True
+        return entry["hash"] != source_hash or entry["output"] != output or entry["template"] != template_hash
+
+    def record(self, source, source_hash, output, template_hash):
+        self.pages[source] = {"hash": source_hash, "output": output, "template": template_hash}
+
+    def forget(self, source):
+        #Returns the output path the removed source used to produce.
+        entry = self.pages.pop(source, None)
+        return entry["output"] if entry else None
+
+    def sources(self):
+        return set(self.pages)
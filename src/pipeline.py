@@ -0,0 +1,213 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import highlight
+import images
+from main import generate_page
+from render import render_page
+from scanner import iter_pages
+from template import TemplateResolver
+from writer import OutputWriter
+
+
+logger = logging.getLogger("ssg.pipeline")
+
+#End of stream marker passed down the queues.
+_DONE = object()
+
+
+#CPU stage: render a batch of read pages. A page read as None was too big to read whole;
+#generate_page streams it straight to its output instead.
+#Returns (src, page (byte chunks) or None, info, error) per page.
+def _render_batch(batch, cache=None, stream_threshold=None, highlight_dir=None, images_path=None):
+    if highlight_dir != highlight.active.cache_dir:
+        highlight.configure(highlight_dir)
+    images.refresh(images_path)
+    results = []
+    for src_path, dest_path, template_path, markdown in batch:
+        try:
+            if markdown is None:
+                results.append((src_path, None, generate_page(src_path, template_path, dest_path, cache,
+                                                              stream_threshold), None))
+            else:
+                page, info = render_page(markdown, template_path, cache)
+                results.append((src_path, page, info, None))
+        except Exception as e:
+            results.append((src_path, None, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class PipelinedBuild:
+    #A full build as four overlapping stages joined by bounded queues, so reading the next
+    #pages never waits for the current ones to be parsed and the other way round:
+    #  scan   - one thread walks the content dir (iter_pages) and resolves each page's template
+    #  read   - `readers` threads read the markdown; reads release the GIL, so they keep
+    #           going while pages are converted
+    #  render - this thread groups read pages into batches of chunk_size for a pool of `jobs`
+    #           worker processes (or renders them itself with jobs=1), at most two batches
+    #           per worker in flight
+    #  write  - an OutputWriter thread writes the rendered pages
+    #The queues hold queue_size pages each, so a slow stage holds the ones before it back
+    #instead of letting pages pile up in memory. Most useful where reads are slow: network
+    #filesystems and cold caches.
+
+    def __init__(self, dir_path_content, template_path, dest_dir_path, jobs=1, readers=4, chunk_size=8,
+                 queue_size=64, cache=None, stream_threshold=None):
+        if jobs is None or jobs <= 0:
+            jobs = os.cpu_count() or 1
+        self.dir_path_content = dir_path_content
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.jobs = jobs
+        self.readers = max(1, readers)
+        self.chunk_size = max(1, chunk_size)
+        self.cache = cache
+        self.stream_threshold = stream_threshold
+        self.paths = queue.Queue(maxsize=queue_size)
+        self.texts = queue.Queue(maxsize=queue_size)
+        self.order = []
+        self.targets = {}
+        self.failures = {}
+        self.scan_error = None
+        self.stop = threading.Event()
+
+    def _put(self, q, item):
+        #Gives up once the build is being torn down, so no stage blocks on a queue nobody drains.
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _scan(self):
+        try:
+            resolver = TemplateResolver(self.dir_path_content, self.template_path)
+            for src_path, dest_path in iter_pages(self.dir_path_content, self.dest_dir_path):
+                self.order.append(src_path)
+                if not self._put(self.paths, (src_path, dest_path, resolver.for_page(src_path))):
+                    return
+        except Exception as e:
+            self.scan_error = e
+        finally:
+            for _ in range(self.readers):
+                self._put(self.paths, _DONE)
+
+    def _read(self):
+        while True:
+            item = self._get(self.paths)
+            if item is _DONE:
+                self._put(self.texts, _DONE)
+                return
+            src_path, dest_path, template_path = item
+            try:
+                with open(src_path, 'r') as f:
+                    if self.stream_threshold and os.fstat(f.fileno()).st_size >= self.stream_threshold:
+                        markdown = None
+                    else:
+                        markdown = f.read()
+            except Exception as e:
+                self._put(self.texts, (src_path, dest_path, template_path, e))
+                continue
+            if not self._put(self.texts, (src_path, dest_path, template_path, markdown)):
+                return
+
+    #Next batch of read pages, None once every reader has finished.
+    def _next_batch(self, state):
+        batch = []
+        while len(batch) < self.chunk_size and state["readers"]:
+            try:
+                item = self.texts.get(block=not batch)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                state["readers"] -= 1
+                continue
+            src_path, dest_path, template_path, markdown = item
+            self.targets[src_path] = (dest_path, template_path)
+            if isinstance(markdown, Exception):
+                self.failures[src_path] = f"{type(markdown).__name__}: {markdown}"
+            else:
+                batch.append(item)
+        return batch or (None if not state["readers"] else [])
+
+    def _collect(self, results, writer, done):
+        for src_path, page, info, error in results:
+            if error:
+                self.failures[src_path] = error
+                continue
+            if page is not None:
+                writer.write(self.targets[src_path][0], page)
+            done[src_path] = info
+
+    #Run the build. on_page(src, dest, template, info) is called for every page that built,
+    #in page order, once its output is written. Returns failures like build_pages; a content
+    #dir that can't be walked raises, as find_pages would.
+    def run(self, on_page=None):
+        threads = [threading.Thread(target=self._scan, daemon=True)]
+        threads += [threading.Thread(target=self._read, daemon=True) for _ in range(self.readers)]
+        for thread in threads:
+            thread.start()
+
+        writer = OutputWriter()
+        done = {}
+        state = {"readers": self.readers}
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        try:
+            pending = set()
+            while True:
+                batch = self._next_batch(state)
+                if batch is None:
+                    break
+                if not batch:
+                    continue
+                if executor is None:
+                    self._collect(_render_batch(batch, self.cache, self.stream_threshold, highlight.active.cache_dir,
+                                                images.active.path), writer, done)
+                    continue
+                pending.add(executor.submit(_render_batch, batch, self.cache, self.stream_threshold,
+                                             highlight.active.cache_dir, images.active.path))
+                if len(pending) >= self.jobs * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        self._collect(future.result(), writer, done)
+            for future in pending:
+                self._collect(future.result(), writer, done)
+        finally:
+            self.stop.set()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            write_errors = writer.close()
+            for thread in threads:
+                thread.join()
+
+        if self.scan_error is not None:
+            raise self.scan_error
+
+        failures = []
+        for src_path in self.order:
+            dest_path, template_path = self.targets[src_path]
+            error = self.failures.get(src_path) or write_errors.get(dest_path)
+            if error:
+                logger.error("Failed to generate %s: %s", src_path, error)
+                failures.append((src_path, error))
+            elif on_page is not None:
+                on_page(src_path, dest_path, template_path, done[src_path])
+
+        if self.cache is not None:
+            self.cache.prune()
+        logger.info("Pipelined build: %d of %d pages generated", len(self.targets) - len(failures),
+                    len(self.targets))
+        return failures
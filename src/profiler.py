@@ -0,0 +1,128 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+
+_null_context = nullcontext()
+
+
+class NullProfiler:
+    #Stand-in used when profiling is off: every stage is the same shared no-op context.
+    enabled = False
+
+    def page(self, name):
+        return _null_context
+
+    def stage(self, name):
+        return _null_context
+
+
+class BuildProfiler:
+    #Records wall and CPU time per stage for every page.
+    #Stages nest (parse contains convert:* which contains inline); each stage is charged
+    #its own time only, so a page's stages add up to its total.
+    enabled = True
+
+    def __init__(self):
+        self.pages = {}
+        self._current = None
+        self._stack = []
+
+    @contextmanager
+    def page(self, name):
+        self._current = self.pages.setdefault(name, {})
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            with self.stage('other'):
+                yield
+        finally:
+            totals = self._current.setdefault('total', [0.0, 0.0])
+            totals[0] += time.perf_counter() - start_wall
+            totals[1] += time.process_time() - start_cpu
+            self._current = None
+
+    @contextmanager
+    def stage(self, name):
+        if self._current is None:
+            yield
+            return
+        frame = [time.perf_counter(), time.process_time(), 0.0, 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            wall = time.perf_counter() - frame[0]
+            cpu = time.process_time() - frame[1]
+            timings = self._current.setdefault(name, [0.0, 0.0])
+            timings[0] += wall - frame[2]
+            timings[1] += cpu - frame[3]
+            if self._stack:
+                self._stack[-1][2] += wall
+                self._stack[-1][3] += cpu
+
+    #Fold in pages profiled elsewhere (e.g. in a worker process).
+    def merge(self, pages):
+        for name, stages in pages.items():
+            target = self.pages.setdefault(name, {})
+            for stage, (wall, cpu) in stages.items():
+                timings = target.setdefault(stage, [0.0, 0.0])
+                timings[0] += wall
+                timings[1] += cpu
+
+    def stage_totals(self):
+        totals = {}
+        for stages in self.pages.values():
+            for stage, (wall, cpu) in stages.items():
+                timings = totals.setdefault(stage, [0.0, 0.0])
+                timings[0] += wall
+                timings[1] += cpu
+        return totals
+
+    def slowest(self, top_n=10):
+        return sorted(self.pages.items(), key=lambda item: item[1].get('total', [0.0])[0], reverse=True)[:top_n]
+
+    def report(self, path):
+        data = {
+            "stages": {stage: {"wall": wall, "cpu": cpu} for stage, (wall, cpu) in self.stage_totals().items()},
+            "pages": {
+                name: {stage: {"wall": wall, "cpu": cpu} for stage, (wall, cpu) in stages.items()}
+                for name, stages in self.pages.items()
+            },
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    def summary(self, top_n=10):
+        totals = self.stage_totals()
+        wall, cpu = totals.pop('total', [0.0, 0.0])
+        lines = [f"Profiled {len(self.pages)} pages: {wall:.4f} s wall, {cpu:.4f} s cpu",
+                 "Stage totals (wall s / cpu s):"]
+        for stage, (wall, cpu) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            lines.append(f"  {stage:<22} {wall:>9.4f} {cpu:>9.4f}")
+        lines.append(f"Slowest {top_n} pages (wall s):")
+        for name, stages in self.slowest(top_n):
+            wall = stages.get('total', [0.0])[0]
+            worst = max((item for item in stages.items() if item[0] != 'total'), key=lambda item: item[1][0],
+                        default=('-', [0.0]))
+            lines.append(f"  {wall:>9.4f}  {name}  (mostly {worst[0]})")
+        return '\n'.join(lines)
+
+
+#The profiler the instrumented code reports to; a NullProfiler unless enable() was called.
+active = NullProfiler()
+
+
+def enable():
+    global active
+    active = BuildProfiler()
+    return active
+
+
+def disable():
+    global active
+    active = NullProfiler()
+
+
+def stage(name):
+    return active.stage(name)
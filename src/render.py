@@ -0,0 +1,156 @@
+import logging
+import mmap
+import os
+
+import images
+import profiler
+from depgraph import collect_references
+from frontmatter import normalize_tags, read_front_matter, split_front_matter
+from htmlnode import MarkdownFileStream, iter_blocks, markdown_to_html_node, node_text
+from template import load_template
+
+
+logger = logging.getLogger("ssg.render")
+
+#Markdown -> page content and page info (title, summary, front matter, references): the part
+#of a build the page cache depends on, kept apart from main's build plumbing so the cache
+#version (cache.CONVERTER_MODULES) only changes when this does.
+
+
+def extract_title(markdown):
+    lines = markdown.strip().split('\n')
+    for line in lines:
+        if line.startswith('# '):
+            return line[2:].strip()
+    raise ValueError('No h1 header found in the markdown.')
+
+#extract_title for a file on disk, searching a memory map instead of reading the file in.
+#start skips that many bytes first (a front matter header).
+def extract_title_from_file(path, start=0):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError('No h1 header found in the markdown.')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            #The first line counts from the first non-whitespace character, as with markdown.strip()
+            while start < len(mm) and mm[start:start + 1].isspace():
+                start += 1
+            if mm[start:start + 2] != b'# ':
+                start = mm.find(b'\n# ', start)
+                if start == -1:
+                    raise ValueError('No h1 header found in the markdown.')
+                start += 1
+            end = mm.find(b'\n', start)
+            line = mm[start:end if end != -1 else len(mm)]
+    return line[2:].decode('utf-8').strip()
+
+#The title render_markdown gives a file on disk without reading the whole file in: the first
+#block that is a '# ' heading (so not a line inside a code block), read block by block and
+#stopping there, with extract_title_from_file as the fallback.
+def extract_heading_title_from_file(path, start=0):
+    with open(path, 'r') as f:
+        f.seek(start)
+        for block in iter_blocks(f):
+            if block.startswith('# '):
+                return block.split('\n', 1)[0][2:].strip()
+    return extract_title_from_file(path, start)
+
+
+#Page info gathered while rendering: title, summary (first paragraph), meta (the front
+#matter, with tags as a list) and the links and images the page references.
+def _new_page_info(meta):
+    meta = dict(meta)
+    if 'tags' in meta:
+        meta['tags'] = normalize_tags(meta['tags'])
+    info = {"meta": meta, "links": [], "images": []}
+    if meta.get('title'):
+        info['title'] = str(meta['title'])
+    return info
+
+
+#Template fields: every front matter field under its own name, plus Title and Content.
+def page_context(info, content):
+    context = dict(info["meta"])
+    context["Title"] = info["title"]
+    context["Content"] = content
+    return context
+
+
+#Markdown text -> (content, page info): served from the cache when the text was rendered
+#before, else front matter, parse, title and references. content is the node tree, or the
+#serialized HTML when caching or profiling.
+#Images in the active image index get their size (and srcset) attributes; a cached render
+#made before one of its images changed is not used.
+def render_markdown(markdown_content, cache=None):
+    cached = None
+    if cache is not None:
+        with profiler.stage("cache"):
+            cache_key = cache.key(markdown_content)
+            cached = cache.get(cache_key)
+            if cached is not None and cached[1].get("image_signature", '') != \
+                    images.active.signature(cached[1]["images"]):
+                cached = None
+
+    if cached is not None:
+        logger.debug("Using cached render")
+        html_content, info = cached
+    else:
+        with profiler.stage("front_matter"):
+            meta, body = split_front_matter(markdown_content)
+            info = _new_page_info(meta)
+
+        # Convert markdown to HTML Node, picking up the title and summary on the way
+        with profiler.stage("parse"):
+            html_node = markdown_to_html_node(body, info)
+
+        if 'title' not in info:
+            #No heading block starts with '# '; fall back to the line scan
+            with profiler.stage("title"):
+                info['title'] = extract_title(body)
+
+        # Collect what the page links to and embeds
+        with profiler.stage("references"):
+            collect_references(html_node, info["links"], info["images"])
+
+        if info["images"] and images.active.images:
+            with profiler.stage("images"):
+                images.active.annotate(html_node)
+                info["image_signature"] = images.active.signature(info["images"])
+
+        if cache is not None or profiler.active.enabled:
+            #Serialize up front when caching, or when profiling so serialization is timed on its own
+            with profiler.stage("serialize"):
+                html_content = html_node.to_html()
+            if cache is not None:
+                with profiler.stage("cache"):
+                    cache.put(cache_key, html_content, info)
+        else:
+            html_content = html_node
+
+    return html_content, info
+
+
+#Markdown text -> (the full page filled into the template at template_path, as a list of
+#UTF-8 byte chunks (see Template.render_bytes), page info).
+def render_page(markdown_content, template_path, cache=None):
+    html_content, info = render_markdown(markdown_content, cache)
+    return load_template(template_path).render_bytes(page_context(info, html_content)), info
+
+
+#The streamed counterpart of render_markdown for a file too big to read whole: (content,
+#page info) where content is a MarkdownFileStream. The title is found before the page is
+#written; the summary, references and image attributes are filled in as the blocks go by,
+#so info is only complete once content has been written out.
+def stream_markdown(path):
+    meta, offset = read_front_matter(path)
+    info = _new_page_info(meta)
+    if 'title' not in info:
+        info['title'] = extract_heading_title_from_file(path, offset)
+
+    def on_node(node):
+        collect_references(node, info["links"], info["images"])
+        if images.active.images:
+            images.active.annotate(node)
+        if 'summary' not in info and node.tag == 'p':
+            info['summary'] = node_text(node)
+
+    return MarkdownFileStream(path, on_node=on_node, offset=offset), info
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+
+#Entries whose mtime is within this long of the scan that recorded them are re-checked:
+#filesystems with coarse timestamps can give a file rewritten just after the scan the
+#mtime it was recorded with.
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+#Content discovery on os.scandir: the DirEntry type information comes from the directory
+#listing itself, so telling files from directories costs no stat calls, and a file is
+#stat-ed at most once (only when its size and mtime are wanted).
+
+
+def _name(entry):
+    return entry.name
+
+
+#(relative path, DirEntry) for every file under root, depth first with each directory's
+#entries in name order (the order find_pages has always returned pages in). Files come out
+#as their directory is listed, before the rest of the tree has been walked.
+def walk_files(root, follow_symlinks=True, _prefix=''):
+    with os.scandir(root) as entries:
+        entries = sorted(entries, key=_name)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=follow_symlinks):
+            yield from walk_files(entry.path, follow_symlinks, _prefix + entry.name + os.sep)
+        elif entry.is_file():
+            yield _prefix + entry.name, entry
+
+
+#(src, dest) for every .md page under the content dir, dest being its .html output under
+#dest_dir_path.
+def iter_pages(dir_path_content, dest_dir_path):
+    for relative, entry in walk_files(dir_path_content):
+        if entry.name.endswith('.md'):
+            directory = relative[:len(relative) - len(entry.name)]
+            yield entry.path, os.path.join(dest_dir_path, directory + entry.name.replace('.md', '.html'))
+
+
+#Relative path -> (size, mtime_ns) for every file under root (only names ending in suffix,
+#if given), in walk_files order. One stat per file; symlinked directories are only
+#followed with follow_symlinks.
+def scan_files(root, suffix=None, follow_symlinks=False):
+    files = {}
+    for relative, entry in walk_files(root, follow_symlinks=follow_symlinks):
+        if suffix is None or entry.name.endswith(suffix):
+            stat = entry.stat()
+            files[relative] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class TreeSnapshot:
+    #The scan_files result of the last build, kept on disk so the next one can tell which
+    #files changed without reading them: a file whose size and mtime are the same as last
+    #time is taken to be unchanged.
+    #A file modified in the same clock tick as the scan that recorded it can keep its size and
+    #mtime through the change, so entries whose mtime isn't clearly older than that scan are
+    #never trusted (the same rule git uses for its index).
+
+    def __init__(self, path, files=None, scanned_at=0):
+        self.path = path
+        self.files = files if files is not None else {}
+        self.scanned_at = scanned_at
+
+    #Scan root (see scan_files) into a new snapshot to be saved at path. Symlinked
+    #directories are followed, as iter_pages follows them when it finds the pages.
+    @classmethod
+    def scan(cls, path, root, suffix=None):
+        scanned_at = time.time_ns()
+        return cls(path, scan_files(root, suffix, follow_symlinks=True), scanned_at)
+
+    @classmethod
+    def load(cls, path):
+        #Missing or unreadable: nothing is known to be unchanged.
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return cls(path, {relative: tuple(state) for relative, state in data["files"].items()},
+                       data["scanned_at"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(path)
+
+    #Whether relative had this (size, mtime_ns) when this snapshot was taken, early enough
+    #to be sure it hasn't changed since.
+    def unchanged(self, relative, state):
+        return self.files.get(relative) == tuple(state) and state[1] < self.scanned_at - RACY_WINDOW_NS
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({"scanned_at": self.scanned_at, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+
+from depgraph import page_url
+
+
+INDEX_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    source  TEXT PRIMARY KEY,
+    output  TEXT NOT NULL,
+    url     TEXT NOT NULL,
+    section TEXT NOT NULL,
+    title   TEXT NOT NULL,
+    date    TEXT,
+    summary TEXT,
+    meta    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    source TEXT NOT NULL REFERENCES pages(source) ON DELETE CASCADE,
+    tag    TEXT NOT NULL,
+    PRIMARY KEY (source, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags(tag);
+CREATE INDEX IF NOT EXISTS pages_by_section ON pages(section, date);
+"""
+
+
+class SiteIndex:
+    #Every page's metadata, kept in SQLite (.ssg/site.db) so listings, tag pages and feeds
+    #can be built from queries instead of reopening every source file:
+    #  pages(source, output, url, section, title, date, summary, meta as JSON)
+    #  tags(source, tag)
+    #section is the page's directory relative to the content dir ('' at the top).
+    #Pages are keyed by their source path relative to the content dir, like the manifest.
+    #Changes are committed by save().
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        #Built in one thread and updated from another by the watch server, never concurrently.
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA foreign_keys = ON')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+            self.db.executescript('DROP TABLE IF EXISTS tags; DROP TABLE IF EXISTS pages;')
+            self.db.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        self.db.executescript(_SCHEMA)
+
+    def update_page(self, source, output, info):
+        meta = info["meta"]
+        date = meta.get('date')
+        self.remove_page(source)
+        self.db.execute(
+            'INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (source, output, page_url(output), os.path.dirname(source).replace(os.sep, '/'), info["title"],
+             str(date) if date is not None else None, info.get("summary"), json.dumps(meta, sort_keys=True)))
+        self.db.executemany('INSERT OR IGNORE INTO tags VALUES (?, ?)',
+                            [(source, tag) for tag in meta.get('tags', [])])
+
+    def remove_page(self, source):
+        self.db.execute('DELETE FROM pages WHERE source = ?', (source,))
+
+    def clear(self):
+        self.db.execute('DELETE FROM pages')
+
+    def sources(self):
+        return {row[0] for row in self.db.execute('SELECT source FROM pages')}
+
+    def _rows(self, query, params=()):
+        cursor = self.db.execute(query, params)
+        names = [column[0] for column in cursor.description]
+        pages = []
+        for row in cursor:
+            page = dict(zip(names, row))
+            page['meta'] = json.loads(page['meta'])
+            page['tags'] = page['meta'].get('tags', [])
+            pages.append(page)
+        return pages
+
+    #Pages newest first (undated last), optionally only those directly in one section.
+    def pages(self, section=None):
+        if section is None:
+            return self._rows('SELECT * FROM pages ORDER BY date IS NULL, date DESC, source')
+        return self._rows('SELECT * FROM pages WHERE section = ? ORDER BY date IS NULL, date DESC, source',
+                          (section,))
+
+    def pages_tagged(self, tag):
+        return self._rows('SELECT pages.* FROM pages JOIN tags USING (source) WHERE tag = ? '
+                          'ORDER BY date IS NULL, date DESC, source', (tag,))
+
+    #tag -> number of pages carrying it.
+    def tags(self):
+        return dict(self.db.execute('SELECT tag, COUNT(*) FROM tags GROUP BY tag ORDER BY tag'))
+
+    def sections(self):
+        return [row[0] for row in self.db.execute('SELECT DISTINCT section FROM pages ORDER BY section')]
+
+    def save(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
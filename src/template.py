@@ -0,0 +1,129 @@
+import io
+import os
+import re
+
+
+#A directory under content/ holding this file uses it for its pages (and subdirectories)
+#instead of the site-wide template.
+TEMPLATE_FILE_NAME = 'template.html'
+
+_placeholder = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+#path -> (mtime_ns, size, Template)
+_template_cache = {}
+
+
+class Template:
+    #A template parsed once into a list of segments: (False, literal text) or
+    #(True, placeholder name, placeholder as written).
+    #Rendering writes each segment once, no intermediate copies of the whole page.
+    #byte_segments are the same with the text already UTF-8 encoded, for render_bytes.
+
+    def __init__(self, source, path=None):
+        self.path = path
+        self.segments = []
+        self.fields = set()
+        position = 0
+        for match in _placeholder.finditer(source):
+            if match.start() > position:
+                self.segments.append((False, source[position:match.start()]))
+            self.segments.append((True, match.group(1), match.group(0)))
+            self.fields.add(match.group(1))
+            position = match.end()
+        if position < len(source):
+            self.segments.append((False, source[position:]))
+        self.byte_segments = [(False, segment[1].encode('utf-8')) if not segment[0] else
+                              (True, segment[1], segment[2].encode('utf-8')) for segment in self.segments]
+
+    #context maps placeholder names to values. Nodes are streamed with write_html,
+    #lists are comma joined, anything else goes through str().
+    #Placeholders missing from the context are left in the output untouched.
+    def render(self, out, context):
+        for segment in self.segments:
+            if not segment[0]:
+                out.write(segment[1])
+                continue
+            if segment[1] not in context:
+                out.write(segment[2])
+                continue
+            field = context[segment[1]]
+            if hasattr(field, 'write_html'):
+                field.write_html(out)
+            elif isinstance(field, (list, tuple)):
+                out.write(', '.join(str(item) for item in field))
+            else:
+                out.write(str(field))
+
+    #render() as a list of UTF-8 byte strings, to be written with one os.writev (see
+    #writer.write_chunks). The template's own text was encoded when it was parsed, so only the
+    #fields are encoded per page. A node field (the page content) is still rendered into a
+    #StringIO and encoded as one string: one chunk per field, not per node.
+    def render_bytes(self, context):
+        chunks = []
+        for segment in self.byte_segments:
+            if not segment[0]:
+                chunks.append(segment[1])
+                continue
+            if segment[1] not in context:
+                chunks.append(segment[2])
+                continue
+            field = context[segment[1]]
+            if hasattr(field, 'write_html'):
+                out = io.StringIO()
+                field.write_html(out)
+                field = out.getvalue()
+            elif isinstance(field, (list, tuple)):
+                field = ', '.join(str(item) for item in field)
+            else:
+                field = str(field)
+            chunks.append(field.encode('utf-8'))
+        return chunks
+
+    def __repr__(self):
+        return f"Template({self.path},{sorted(self.fields)})"
+
+
+#Return the compiled template for path, re-reading it only when its mtime or size changed.
+def load_template(path):
+    stat = os.stat(path)
+    cached = _template_cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(path, 'r') as f:
+        template = Template(f.read(), path)
+    _template_cache[path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
+
+
+def clear_template_cache():
+    _template_cache.clear()
+
+
+class TemplateResolver:
+    #Finds the template for each page: the nearest template.html in the page's directory
+    #or one of its parents inside the content dir, else the site-wide default.
+    #Lookups are remembered per directory for the lifetime of the resolver (one build).
+
+    def __init__(self, content_root, default_template):
+        self.content_root = os.path.abspath(content_root)
+        self.default_template = default_template
+        self._by_dir = {}
+
+    def for_dir(self, directory):
+        directory = os.path.abspath(directory)
+        if directory in self._by_dir:
+            return self._by_dir[directory]
+
+        local = os.path.join(directory, TEMPLATE_FILE_NAME)
+        if os.path.isfile(local):
+            template_path = local
+        elif directory == self.content_root or not directory.startswith(self.content_root + os.sep):
+            template_path = self.default_template
+        else:
+            template_path = self.for_dir(os.path.dirname(directory))
+        self._by_dir[directory] = template_path
+        return template_path
+
+    def for_page(self, page_path):
+        return self.for_dir(os.path.dirname(page_path))
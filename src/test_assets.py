@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from assets import sync_assets
+
+
+class TestSyncAssets(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, 'static')
+        self.dest = os.path.join(root, 'public')
+        self.state = os.path.join(root, '.ssg', 'assets.json')
+        os.makedirs(os.path.join(self.static, 'images'))
+        self.write(os.path.join(self.static, 'index.css'), 'body {}')
+        self.write(os.path.join(self.static, 'images', 'logo.png'), 'png bytes')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def sync(self, **kwargs):
+        with self.assertLogs('ssg', level='INFO'):
+            return sync_assets(self.static, self.dest, self.state, jobs=2, **kwargs)
+
+    def test_second_sync_copies_nothing(self):
+        self.assertEqual(self.sync(), (2, 0, 0))
+        self.assertEqual(self.sync(), (0, 2, 0))
+
+    def test_changed_file_recopied(self):
+        self.sync()
+        self.write(os.path.join(self.static, 'index.css'), 'body { color: red }')
+        self.assertEqual(self.sync(), (1, 1, 0))
+        with open(os.path.join(self.dest, 'index.css')) as f:
+            self.assertEqual(f.read(), 'body { color: red }')
+
+        #Removed assets are pruned, generated pages next to them are kept.
+    def test_prune_only_synced_files(self):
+        self.sync()
+        self.write(os.path.join(self.dest, 'index.html'), '<p>page</p>')
+        os.remove(os.path.join(self.static, 'images', 'logo.png'))
+        self.assertEqual(self.sync(), (0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'images')))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'index.html')))
+
+        #Hardlinked assets share the source inode; a source saved as a new file is relinked.
+    def test_hardlink_sync(self):
+        self.sync(link=True)
+        src = os.path.join(self.static, 'index.css')
+        dest = os.path.join(self.dest, 'index.css')
+        self.assertTrue(os.path.samefile(src, dest))
+        self.write(src + '.new', 'body { margin: 0 }')
+        os.replace(src + '.new', src)
+        self.assertEqual(self.sync(link=True), (1, 1, 0))
+        self.assertTrue(os.path.samefile(src, dest))
+
+    def test_hash_check_skips_touched_file(self):
+        self.sync()
+        os.utime(os.path.join(self.static, 'index.css'), ns=(0, 10**18))
+        self.assertEqual(self.sync(check_hash=True), (0, 2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import cache
+from cache import PageCache
+from main import generate_page
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, 'cache')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        page_cache = PageCache(self.cache_dir)
+        key = page_cache.key('# Hi')
+        self.assertIsNone(page_cache.get(key))
+        info = {'title': 'Hi', 'meta': {'tags': ['a']}, 'links': ['/a'], 'images': []}
+        page_cache.put(key, '<div><h1>Hi</h1></div>', info)
+        self.assertEqual(PageCache(self.cache_dir).get(key), ('<div><h1>Hi</h1></div>', info))
+
+        #Entries written by another converter version are dropped on open.
+    def test_version_change_invalidates(self):
+        page_cache = PageCache(self.cache_dir)
+        key = page_cache.key('# Hi')
+        page_cache.put(key, 'html', {'title': 'Hi'})
+        with mock.patch.object(cache, '_converter_version', 'someotherversion'):
+            self.assertIsNone(PageCache(self.cache_dir).get(key))
+        self.assertEqual(os.listdir(self.cache_dir), ['someotherversion'])
+
+        #Front matter parsing and the page info built in render are part of the version too.
+    def test_version_covers_page_info_modules(self):
+        with mock.patch.object(cache, '_converter_version', None):
+            version = cache.converter_version()
+        for module in ('frontmatter', 'render'):
+            without = [name for name in cache.CONVERTER_MODULES if name != module]
+            with mock.patch.object(cache, '_converter_version', None), \
+                    mock.patch.object(cache, 'CONVERTER_MODULES', without):
+                self.assertNotEqual(cache.converter_version(), version)
+
+    def test_prune_evicts_least_recently_used(self):
+        page_cache = PageCache(self.cache_dir, max_bytes=0)
+        keys = [page_cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            page_cache.put(key, 'x' * 100, {'title': 'T'})
+            os.utime(page_cache._path(key), ns=(i * 10**9, i * 10**9))
+        size = os.path.getsize(page_cache._path(keys[0]))
+        page_cache.max_bytes = 2 * size
+        page_cache.get(keys[0])
+        self.assertEqual(page_cache.prune(), 1)
+        self.assertIsNone(page_cache.get(keys[1]))
+        self.assertIsNotNone(page_cache.get(keys[0]))
+
+        #A cache hit produces the same page without touching the parser.
+    def test_generate_page_cache_hit(self):
+        root = self.tmp.name
+        src, template, dest = (os.path.join(root, name) for name in ('page.md', 'template.html', 'page.html'))
+        with open(src, 'w') as f:
+            f.write('# Title\n\nSome **text**')
+        with open(template, 'w') as f:
+            f.write('<title>{{ Title }}</title>{{ Content }}')
+        page_cache = PageCache(self.cache_dir)
+        with redirect_stdout(StringIO()):
+            generate_page(src, template, dest, page_cache)
+            with open(dest) as f:
+                first = f.read()
+            with mock.patch('main.markdown_to_html_node', side_effect=AssertionError('parsed')):
+                generate_page(src, template, dest, page_cache)
+        with open(dest) as f:
+            self.assertEqual(f.read(), first)
+        self.assertEqual(page_cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import compress
+from compress import precompress
+
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, 'public')
+        self.state = os.path.join(self.tmp.name, '.ssg')
+        self.page = os.path.join(self.dest, 'blog', 'index.html')
+        self.write(self.page, '<p>hello</p>' * 200)
+        self.write(os.path.join(self.dest, 'small.css'), 'body {}')
+        self.write(os.path.join(self.dest, 'logo.png'), 'x' * 4096)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def run_gzip_only(self, **kwargs):
+        kwargs.setdefault('state_path', os.path.join(self.state, 'precompress.json'))
+        with mock.patch.object(compress, 'brotli', None), self.assertLogs('ssg', level='INFO'):
+            return precompress(self.dest, jobs=2, **kwargs)
+
+        #Only text files over the threshold get a sibling, stamped with the source mtime.
+    def test_writes_gzip_siblings(self):
+        self.assertEqual(self.run_gzip_only(), (1, 0, 0))
+        with gzip.open(self.page + '.gz', 'rt') as f:
+            self.assertEqual(f.read(), '<p>hello</p>' * 200)
+        self.assertEqual(os.stat(self.page + '.gz').st_mtime_ns, os.stat(self.page).st_mtime_ns)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'small.css.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'logo.png.gz')))
+
+    def test_up_to_date_siblings_skipped(self):
+        self.run_gzip_only()
+        self.assertEqual(self.run_gzip_only(), (0, 1, 0))
+        self.write(self.page, '<p>changed</p>' * 200)
+        os.utime(self.page, ns=(0, os.stat(self.page).st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.run_gzip_only(), (1, 0, 0))
+        with gzip.open(self.page + '.gz', 'rt') as f:
+            self.assertEqual(f.read(), '<p>changed</p>' * 200)
+
+        #Only siblings precompress wrote go with their source; a shipped dump.xml.gz stays.
+    def test_orphaned_siblings_removed(self):
+        self.run_gzip_only()
+        os.remove(self.page)
+        self.write(os.path.join(self.dest, 'archive.tar.gz'), 'not ours')
+        self.write(os.path.join(self.dest, 'data', 'dump.xml.gz'), 'not ours either')
+        self.assertEqual(self.run_gzip_only(), (0, 0, 1))
+        self.assertFalse(os.path.exists(self.page + '.gz'))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'archive.tar.gz')))
+        self.assertEqual(self.run_gzip_only(), (0, 0, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'data', 'dump.xml.gz')))
+
+        #Without a state file nothing is known to be ours, so nothing is removed.
+        self.write(self.page, '<p>hello</p>' * 200)
+        self.run_gzip_only(state_path=None)
+        os.remove(self.page)
+        self.assertEqual(self.run_gzip_only(state_path=None), (0, 0, 0))
+
+    def test_min_size(self):
+        self.assertEqual(self.run_gzip_only(min_size=1), (2, 0, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'small.css.gz')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from cache import MemoryPageCache, PageCache
+from daemon import BuildDaemon, DaemonServer, request
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "needs Unix domain sockets")
+class TestBuildDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.template = os.path.join(root, 'template.html')
+        os.makedirs(self.content)
+        self.write(self.template, '<title>{{ Title }}</title>{{ Content }}')
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome')
+
+        self.daemon = BuildDaemon(self.content, self.template, self.dest)
+        with self.assertLogs('ssg', level='INFO'):
+            self.daemon.start()
+        self.socket_path = os.path.join(root, '.ssg', 'daemon.sock')
+        self.server = DaemonServer(self.socket_path, self.daemon)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.daemon.close()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+        #Bump the mtime past the snapshot's, however coarse the filesystem clock.
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as f:
+            return f.read()
+
+    def test_build_rebuilds_only_changes(self):
+        self.assertTrue(request(self.socket_path, 'ping')['ok'])
+        self.assertEqual(request(self.socket_path, 'build')['rebuilt'], [])
+
+        page = os.path.join(self.content, 'index.md')
+        self.write(page, '# Home again\n\nWelcome')
+        response = request(self.socket_path, 'build')
+        self.assertEqual((response['ok'], response['rebuilt']), (True, [page]))
+        self.assertIn('<title>Home again</title>', self.read('index.html'))
+
+        self.write(self.template, '<h6>{{ Title }}</h6>')
+        request(self.socket_path, 'build')
+        self.assertEqual(self.read('index.html'), '<h6>Home again</h6>')
+
+    def test_rebuild_paths_and_failures(self):
+        post = os.path.join(self.content, 'blog', 'post.md')
+        os.makedirs(os.path.dirname(post))
+        self.write(post, 'no heading here')
+        response = request(self.socket_path, 'rebuild', paths=[os.path.dirname(post)])
+        self.assertFalse(response['ok'])
+        self.assertEqual([source for source, _ in response['failures']], [post])
+        self.assertTrue(any('Failed to generate' in line for line in response['log']))
+
+        #Already in the snapshot, so a plain build has nothing left to do.
+        self.assertEqual(request(self.socket_path, 'build')['rebuilt'], [])
+
+        os.remove(post)
+        response = request(self.socket_path, 'rebuild', paths=[post])
+        self.assertEqual((response['ok'], response['rebuilt']), (True, [post]))
+
+    def test_bad_requests(self):
+        self.assertFalse(request(self.socket_path, 'explode')['ok'])
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(b'not json\n')
+            self.assertIn(b'Bad request', sock.makefile('rb').readline())
+
+    def test_second_daemon_refused(self):
+        with self.assertRaises(RuntimeError):
+            DaemonServer(self.socket_path, self.daemon)
+
+
+class TestMemoryPageCache(unittest.TestCase):
+
+    def test_lru_over_backing_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            backing = PageCache(os.path.join(root, 'cache'))
+            cache = MemoryPageCache(max_bytes=10, backing=backing)
+            cache.put('a', '123456', {'title': 'A'})
+            cache.put('b', '123456', {'title': 'B'})
+            self.assertEqual(list(cache.entries), ['b'])
+            #Evicted from memory, still served from disk.
+            self.assertEqual(cache.get('a'), ('123456', {'title': 'A'}))
+            self.assertEqual(list(cache.entries), ['a'])
+            self.assertIsNone(cache.get('c'))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
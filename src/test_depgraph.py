@@ -0,0 +1,122 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import DependencyGraph, collect_references, normalize_url, page_url
+from htmlnode import markdown_to_html_node
+from main import generate_pages_incremental, rebuild_paths
+from template import TEMPLATE_FILE_NAME
+
+
+class TestReferences(unittest.TestCase):
+
+    def test_collect_references(self):
+        node = markdown_to_html_node('# T\n\nSee [a](/a) and ![pic](/img/p.png)\n\n```\n[not](/code)\n```\n\n[b](b.html)')
+        self.assertEqual(collect_references(node), (['/a', 'b.html'], ['/img/p.png']))
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url('../b.html#top', '/blog/post/'), '/blog/b.html')
+        self.assertEqual(normalize_url('c', '/blog/a.html'), '/blog/c')
+        self.assertEqual(normalize_url('/docs/'), '/docs/')
+        self.assertIsNone(normalize_url('https://example.com/x'))
+        self.assertIsNone(normalize_url('mailto:me@example.com'))
+        self.assertIsNone(normalize_url('#section'))
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join('blog', 'index.html')), '/blog/')
+        self.assertEqual(page_url('about.html'), '/about.html')
+
+
+class TestDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'depgraph.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reverse_index_survives_reload(self):
+        graph = DependencyGraph(self.path)
+        graph.update_page('a.md', 'a.html', 'template.html', ['/b', 'c.html'], ['/img/x.png'])
+        graph.update_page('d.md', 'd.html', 'other.html', ['/b.html'], [])
+        graph.save()
+
+        graph = DependencyGraph.load(self.path)
+        self.assertEqual(graph.pages_using_template('template.html'), {'a.md'})
+        self.assertEqual(graph.pages_linking_to('/b.html'), {'a.md', 'd.md'})
+        self.assertEqual(graph.pages_embedding('/img/x.png'), {'a.md'})
+        self.assertEqual(graph.affected_pages(templates=['other.html'], asset_urls=['/img/x.png']), {'a.md', 'd.md'})
+
+        graph.update_page('a.md', 'a.html', 'template.html', [], [])
+        graph.remove_page('d.md')
+        self.assertEqual(graph.pages_linking_to('/b.html'), set())
+        self.assertEqual(graph.reverse, {'template:' + os.path.abspath('template.html'): {'a.md'}})
+
+    def test_broken_links(self):
+        dest = os.path.join(self.tmp.name, 'public')
+        os.makedirs(os.path.join(dest, 'blog'))
+        for name in ('about.html', os.path.join('blog', 'index.html')):
+            open(os.path.join(dest, name), 'w').close()
+        graph = DependencyGraph(self.path)
+        graph.update_page('index.md', 'index.html', 'template.html', ['/about', '/blog/', 'blog', '/gone'],
+                          ['/missing.png'])
+        self.assertEqual(graph.broken_links(dest), [('index.md', '/gone'), ('index.md', '/missing.png')])
+
+
+class TestGraphBuilds(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.state = os.path.join(root, '.ssg')
+        self.template = os.path.join(root, 'template.html')
+        with open(self.template, 'w') as f:
+            f.write('{{ Content }}')
+        os.makedirs(os.path.join(self.content, 'docs'))
+        with open(os.path.join(self.content, 'docs', TEMPLATE_FILE_NAME), 'w') as f:
+            f.write('<main>{{ Content }}</main>')
+        self.write('index.md', '# Home\n\n[guide](/docs/guide.html)')
+        self.write(os.path.join('docs', 'guide.md'), '# Guide\n\n![logo](../logo.png)')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, markdown):
+        with open(os.path.join(self.content, name), 'w') as f:
+            f.write(markdown)
+
+    def test_incremental_build_records_graph(self):
+        with self.assertLogs('ssg', level='INFO'):
+            generate_pages_incremental(self.content, self.template, self.dest, os.path.join(self.state, 'manifest.json'))
+        graph = DependencyGraph.load(os.path.join(self.state, 'depgraph.json'))
+        self.assertEqual(graph.pages_linking_to('/docs/guide.html'), {'index.md'})
+        self.assertEqual(graph.pages_embedding('/logo.png'), {os.path.join('docs', 'guide.md')})
+        self.assertEqual(graph.pages_using_template(self.template), {'index.md'})
+
+    def test_template_edit_rebuilds_only_its_pages(self):
+        with self.assertLogs('ssg', level='INFO'):
+            generate_pages_incremental(self.content, self.template, self.dest, os.path.join(self.state, 'manifest.json'))
+        graph = DependencyGraph.load(os.path.join(self.state, 'depgraph.json'))
+        with self.assertLogs('ssg', level='DEBUG') as log:
+            self.assertEqual(rebuild_paths([self.template], self.content, self.template, self.dest, graph=graph), [])
+        generated = [line for line in log.output if 'Generating page from' in line]
+        self.assertEqual(len(generated), 1)
+        self.assertIn('index.md', generated[0])
+
+    def test_removed_page_reports_dangling_links(self):
+        with self.assertLogs('ssg', level='INFO'):
+            generate_pages_incremental(self.content, self.template, self.dest, os.path.join(self.state, 'manifest.json'))
+        graph = DependencyGraph.load(os.path.join(self.state, 'depgraph.json'))
+        guide = os.path.join(self.content, 'docs', 'guide.md')
+        os.remove(guide)
+        with self.assertLogs('ssg', level='WARNING') as log:
+            rebuild_paths([guide], self.content, self.template, self.dest, graph=graph)
+        self.assertIn('index.md still references removed /docs/guide.html', log.output[-1])
+        self.assertEqual(graph.broken_links(self.dest), [('index.md', '/docs/guide.html')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from frontmatter import normalize_tags, read_front_matter, split_front_matter
+from htmlnode import markdown_to_html_node
+from main import generate_page
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    def test_yaml_like(self):
+        meta, body = split_front_matter('---\ntitle: "A: B"\ndate: 2024-03-01\ndraft: false\nweight: 3\n'
+                                        'tags: [travel, "horses"]\n---\n# Heading\n')
+        self.assertEqual(meta, {'title': 'A: B', 'date': '2024-03-01', 'draft': False, 'weight': 3,
+                                'tags': ['travel', 'horses']})
+        self.assertEqual(body, '# Heading\n')
+
+    def test_yaml_block_list(self):
+        meta, _ = split_front_matter('---\n# a comment\ntags:\n  - one\n  - two\nauthor: Bilbo\n---\nbody')
+        self.assertEqual(meta, {'tags': ['one', 'two'], 'author': 'Bilbo'})
+
+    def test_toml_like(self):
+        meta, body = split_front_matter('+++\ntitle = "Hi"\ntags = ["a", "b"]\n+++\nbody')
+        self.assertEqual((meta, body), ({'title': 'Hi', 'tags': ['a', 'b']}, 'body'))
+
+    def test_no_header_and_errors(self):
+        self.assertEqual(split_front_matter('# Title\n---\n'), ({}, '# Title\n---\n'))
+        with self.assertRaises(ValueError):
+            split_front_matter('---\ntitle: x\n')
+        with self.assertRaises(ValueError):
+            split_front_matter('---\nnot a pair\n---\n')
+
+    def test_normalize_tags(self):
+        self.assertEqual(normalize_tags('a, b ,'), ['a', 'b'])
+        self.assertEqual(normalize_tags(['x', 2]), ['x', '2'])
+        self.assertEqual(normalize_tags(None), [])
+
+    def test_read_front_matter_offset(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'page.md')
+            with open(path, 'w') as f:
+                f.write('---\ntitle: Ünïcode\n---\n# Body\n')
+            meta, offset = read_front_matter(path)
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                self.assertEqual((meta, f.read()), ({'title': 'Ünïcode'}, b'# Body\n'))
+
+
+class TestPageInfo(unittest.TestCase):
+
+        #Title and summary come out of the same pass that builds the tree.
+    def test_title_and_summary_in_one_pass(self):
+        info = {}
+        markdown_to_html_node('Intro with **bold** and [a link](/x).\n\n# The Title\n\nSecond', info)
+        self.assertEqual(info, {'summary': 'Intro with bold and a link.', 'title': 'The Title'})
+
+    def test_generate_page_uses_front_matter(self):
+        with tempfile.TemporaryDirectory() as root:
+            src, template, dest = (os.path.join(root, name) for name in ('page.md', 'template.html', 'page.html'))
+            with open(src, 'w') as f:
+                f.write('---\ntitle: From Header\ndate: 2024-01-02\ntags: [a, b]\n---\n# Heading\n\nFirst words.\n')
+            with open(template, 'w') as f:
+                f.write('<title>{{ Title }}</title><time>{{ date }}</time><p>{{ tags }}</p>{{ Content }}')
+            for stream_threshold in (None, 1):
+                info = generate_page(src, template, dest, stream_threshold=stream_threshold)
+                with open(dest) as f:
+                    self.assertEqual(f.read(), '<title>From Header</title><time>2024-01-02</time><p>a, b</p>'
+                                               '<div><h1>Heading</h1><p>First words.</p></div>')
+                self.assertEqual((info['title'], info['summary'], info['meta']['tags']),
+                                 ('From Header', 'First words.', ['a', 'b']))
+
+
+if __name__ == "__main__":
+    unittest.main()
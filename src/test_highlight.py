@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import highlight
+from highlight import HighlightCache, escape, highlighter_version
+from htmlnode import markdown_to_html_node
+
+
+class TestHighlight(unittest.TestCase):
+
+    def test_escape(self):
+        self.assertEqual(escape('a < b && c > "d"'), 'a &lt; b &amp;&amp; c &gt; "d"')
+
+    def test_python_tokens(self):
+        html = highlight.highlight('def f(x):\n    return x < 2  # "small"', 'python')
+        self.assertEqual(html, '<span class="k">def</span> f(x):\n    <span class="k">return</span> x &lt; '
+                               '<span class="m">2</span>  <span class="c"># "small"</span>')
+
+    def test_javascript_alias_and_strings(self):
+        html = highlight.highlight("const s = '<b>';", 'js')
+        self.assertIn('<span class="k">const</span>', html)
+        self.assertIn('<span class="s">\'&lt;b&gt;\'</span>', html)
+
+        #No lexer for the language: escaped, nothing else.
+    def test_unknown_language(self):
+        self.assertEqual(highlight.highlight('x <- 1', 'r'), 'x &lt;- 1')
+        self.assertEqual(highlight.highlight('<p>', None), '&lt;p&gt;')
+
+    def test_code_block_in_page(self):
+        node = markdown_to_html_node('```python\nif a:\n    b = "<i>"\n```')
+        self.assertEqual(node.to_html(), '<div><pre><code class="language-python"><span class="k">if</span> a:\n'
+                                         '    b = <span class="s">"&lt;i&gt;"</span></code></pre></div>')
+        node = markdown_to_html_node('```\n<script>\n```')
+        self.assertEqual(node.to_html(), '<div><pre><code>&lt;script&gt;</code></pre></div>')
+
+        #A language name that could break out of the class attribute is ignored.
+    def test_unsafe_language_name(self):
+        node = markdown_to_html_node('```x"onclick="y\ncode\n```')
+        self.assertEqual(node.to_html(), '<div><pre><code>code</code></pre></div>')
+
+    def test_memory_cache_is_bounded(self):
+        cache = HighlightCache(max_entries=2)
+        for code in ('a = 1', 'b = 2', 'a = 1', 'c = 3'):
+            cache.get(code, 'python')
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertEqual(len(cache.entries), 2)
+        expected = highlight.highlight('c = 3', 'python')
+        with mock.patch.object(highlight.Lexer, 'highlight', side_effect=AssertionError):
+            self.assertEqual(cache.get('c = 3', 'python'), expected)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, 'highlight')
+            stale = os.path.join(cache_dir, 'old-version')
+            os.makedirs(stale)
+            first = HighlightCache(cache_dir=cache_dir)
+            self.assertFalse(os.path.exists(stale))
+            html = first.get('print("hi")', 'python')
+
+            #A fresh cache (another process, the next build) finds it on disk.
+            second = HighlightCache(cache_dir=cache_dir)
+            with mock.patch.object(highlight.Lexer, 'highlight', side_effect=AssertionError):
+                self.assertEqual(second.get('print("hi")', 'python'), html)
+            self.assertEqual((second.hits, second.misses), (1, 0))
+            self.assertEqual(os.listdir(cache_dir), [highlighter_version()])
+
+
+if __name__ == "__main__":
+    unittest.main()
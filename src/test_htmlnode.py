@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode,LeafNode,ParentNode
+from htmlnode import HTMLNode,LeafNode,ParentNode,markdown_to_html_node,markdown_to_blocks,iter_blocks,block_to_block_type
 
 
 class TestHTML(unittest.TestCase):
@@ -11,7 +12,7 @@ class TestHTML(unittest.TestCase):
         leaf = LeafNode(tag='p', value='Hello, World!')
         self.assertEqual(leaf.tag, 'p')
         self.assertEqual(leaf.value, 'Hello, World!')
-        self.assertEqual(leaf.children, [])
+        self.assertEqual(leaf.children, ())
         self.assertEqual(leaf.props, {})
 
         #Test to see if error flag triggers when value = None
@@ -53,6 +54,55 @@ class TestHTML(unittest.TestCase):
             '<p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p>'
         )
 
+        #Test to see if streaming into a buffer produces the same markup as to_html
+    def test_write_html_matches_to_html(self):
+        node = markdown_to_html_node("# Title\n\nSome **bold** [link](/x)\n\n- one\n- two\n\n> quoted")
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertTrue(out.getvalue().startswith('<div><h1>Title</h1><p>Some <strong>bold</strong> <a href="/x">link</a></p>'))
+
+        #Test to see if nodes are slotted and share their empty children/props
+    def test_leaf_nodes_are_compact(self):
+        first = LeafNode(tag='b', value='one')
+        second = LeafNode(tag='i', value='two')
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertIs(first.props, second.props)
+        self.assertIs(first.children, second.children)
+
+        #Test to see if plain string children render as untagged text
+    def test_parent_node_string_children(self):
+        parent = ParentNode(tag='p', children=['Normal ', LeafNode(tag='b', value='bold'), ' text'])
+        self.assertEqual(parent.to_html(), '<p>Normal <b>bold</b> text</p>')
+
+        #Paragraph text runs are plain strings, not wrapper nodes
+    def test_paragraph_text_runs_are_strings(self):
+        paragraph = markdown_to_html_node("Plain and **bold**").children[0]
+        self.assertEqual(paragraph.children[0], 'Plain and ')
+
+        #Test to see if the lazy block splitter yields exactly what markdown_to_blocks returns
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        for markdown in ("# Title\n\npara\nline two\n\n\n- a\n- b\n",
+                         "\n\n  \n\nlead\n\n   \n\nmiddle\n\n  \n\n",
+                         "single",
+                         "  \n"):
+            self.assertEqual(list(iter_blocks(io.StringIO(markdown))), markdown_to_blocks(markdown))
+
+
+        #Test to see if the first-character classifier agrees with the block rules
+    def test_block_to_block_type(self):
+        cases = {"## Title": "heading", "```\ncode\n```": "code_block", "> quoted": "quote",
+                 "- item": "list", "3. item": "list", "-not a list": "paragraph", "![alt](/a.png)": "image",
+                 "  [text](/x)\n": "link", "[text](/x) and more": "paragraph", "": "paragraph"}
+        for block, block_type in cases.items():
+            self.assertEqual(block_to_block_type(block), block_type, block)
+
+        #Test to see if every block kind renders links and images through the shared inline converter
+    def test_inline_links_in_every_block(self):
+        html = markdown_to_html_node("# See [docs](/d)\n\n> a ![i](/i.png)\n\n- [one](/1)\n- **two**").to_html()
+        self.assertEqual(html, '<div><h1>See <a href="/d">docs</a></h1>'
+                               '<blockquote>a <img alt="i" src="/i.png"/></blockquote>'
+                               '<ul><li><a href="/1">one</a></li><li><strong>two</strong></li></ul></div>')
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import images
+from depgraph import DependencyGraph
+from htmlnode import markdown_to_html_node
+from images import ImageIndex, image_size, sync_images
+from main import generate_pages_incremental, rebuild_paths
+
+
+def png(width, height):
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr
+    return b'\x89PNG\r\n\x1a\n' + chunk + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+
+
+def jpeg(width, height):
+    #An EXIF segment before the frame header, which has to be skipped over.
+    exif = b'\xff\xe1' + struct.pack('>H', 2 + 100) + b'\x00' * 100
+    frame = b'\xff\xc2' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + exif + b'\xff\xff' + frame + b'\xff\xd9'
+
+
+class TestImageSize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, 'image')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png(640, 480)), (640, 480))
+        self.assertEqual(self.size_of(jpeg(1920, 1080)), (1920, 1080))
+        self.assertEqual(self.size_of(b'GIF89a' + struct.pack('<HH', 32, 16) + b'\x00' * 20), (32, 16))
+        vp8x = b'RIFF\x00\x00\x00\x00WEBPVP8X' + b'\x00' * 8 + (799).to_bytes(3, 'little') + (599).to_bytes(3, 'little')
+        self.assertEqual(self.size_of(vp8x), (800, 600))
+        vp8l = b'RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f' + struct.pack('<I', 99 | 49 << 14) + b'\x00' * 8
+        self.assertEqual(self.size_of(vp8l), (100, 50))
+
+    def test_not_an_image(self):
+        self.assertIsNone(self.size_of(b'<svg xmlns="http://www.w3.org/2000/svg"/>'))
+        self.assertIsNone(self.size_of(b'\xff\xd8\xff\xe0'))
+
+
+class TestImageIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ImageIndex(images={
+            "/images/a.png": {"width": 1200, "height": 800, "hash": "x", "variants": [480, 960], "state": [1, 2]},
+            "/images/b.gif": {"width": 32, "height": 32, "hash": "y", "variants": [], "state": [1, 2]},
+        })
+
+    def test_annotate(self):
+        node = markdown_to_html_node('![a](/images/a.png)\n\nText ![b](/images/../images/b.gif) ![c](c.png)')
+        self.index.annotate(node)
+        self.assertEqual(node.to_html(), (
+            '<div><img src="/images/a.png" alt="a" width="1200" height="800" '
+            'srcset="/images/a-480w.png 480w, /images/a-960w.png 960w, /images/a.png 1200w" '
+            'sizes="(max-width: 1200px) 100vw, 1200px"/>'
+            '<p>Text <img alt="b" src="/images/../images/b.gif" width="32" height="32"/> '
+            '<img alt="c" src="c.png"/></p></div>'))
+
+    def test_signature(self):
+        self.assertEqual(self.index.signature(['/other.png', 'c.png']), '')
+        before = self.index.signature(['/images/a.png'])
+        self.assertNotEqual(before, '')
+        self.index.images["/images/b.gif"]["width"] = 64
+        self.assertEqual(self.index.signature(['/images/a.png']), before)
+        self.index.images["/images/a.png"]["height"] = 801
+        self.assertNotEqual(self.index.signature(['/images/a.png']), before)
+
+
+class TestSyncImages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, 'static')
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.state = os.path.join(root, '.ssg')
+        self.index_path = os.path.join(self.state, 'images.json')
+        self.write(os.path.join(self.static, 'images', 'a.png'), png(2000, 1000))
+        self.write(os.path.join(self.static, 'notes.txt'), b'not an image')
+
+    def tearDown(self):
+        images.configure()
+        self.tmp.cleanup()
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def sync(self):
+        with self.assertLogs('ssg', level='INFO') as logs:
+            changed = sync_images(self.static, self.dest, self.index_path, (480, 960))
+        return changed, logs.output[-1]
+
+    def test_unchanged_images_are_skipped(self):
+        changed, log = self.sync()
+        self.assertEqual(changed, ['/images/a.png'])
+        self.assertIn('1 processed, 0 unchanged', log)
+        self.assertEqual(images.active.attributes('/images/a.png')["height"], '1000')
+
+        self.assertEqual(self.sync()[0], [])
+        os.remove(os.path.join(self.static, 'images', 'a.png'))
+        self.assertEqual(self.sync()[0], ['/images/a.png'])
+        self.assertIsNone(images.active.attributes('/images/a.png'))
+
+    @unittest.skipIf(images.Image is None, "needs Pillow")
+    def test_variants(self):
+        from PIL import Image
+        Image.new('RGB', (2000, 1000), 'red').save(os.path.join(self.static, 'images', 'a.png'))
+        self.sync()
+        for width in (480, 960):
+            with Image.open(os.path.join(self.dest, 'images', f'a-{width}w.png')) as variant:
+                self.assertEqual(variant.size, (width, width // 2))
+
+        #Lost index, same bytes: the variants come from the cache without decoding the image.
+        os.remove(self.index_path)
+        with mock.patch.object(images.Image, 'open', side_effect=AssertionError):
+            self.assertIn('1 processed', self.sync()[1])
+
+        #A changed image embedded by a page regenerates that page on the next incremental build.
+    def test_incremental_build_follows_image_size(self):
+        template = os.path.join(self.tmp.name, 'template.html')
+        self.write(template, b'{{ Content }}')
+        self.write(os.path.join(self.content, 'index.md'), b'# Home\n\n![a](/images/a.png)')
+        self.write(os.path.join(self.content, 'other.md'), b'# Other\n\ntext')
+        manifest = os.path.join(self.state, 'manifest.json')
+
+        def build():
+            changed = self.sync()[0]
+            with redirect_stdout(StringIO()), self.assertLogs('ssg', level='INFO'):
+                generated = generate_pages_incremental(self.content, template, self.dest, manifest,
+                                                       changed_images=changed)
+            with open(os.path.join(self.dest, 'index.html')) as f:
+                return generated, f.read()
+
+        self.assertIn('width="2000" height="1000"', build()[1])
+        self.assertEqual(build()[0], 0)
+        self.write(os.path.join(self.static, 'images', 'a.png'), png(300, 200))
+        generated, html = build()
+        self.assertEqual(generated, 1)
+        self.assertIn('width="300" height="200"', html)
+
+        #Watch mode and the daemon go through rebuild_paths instead.
+        image = os.path.join(self.static, 'images', 'a.png')
+        self.write(image, png(64, 48))
+        graph = DependencyGraph.load(os.path.join(self.state, 'depgraph.json'))
+        with redirect_stdout(StringIO()), self.assertLogs('ssg', level='INFO'):
+            rebuild_paths([image], self.content, template, self.dest, self.static, graph)
+        with open(os.path.join(self.dest, 'index.html')) as f:
+            self.assertIn('width="64" height="48"', f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
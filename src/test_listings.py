@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from listings import generate_listings, listing_output, paginate, render_feed, slugify, tag_slugs
+from siteindex import SiteIndex
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_paginate(self):
+        self.assertEqual(paginate([1, 2, 3], 2), [[1, 2], [3]])
+        self.assertEqual(paginate([], 2), [[]])
+
+    def test_listing_output(self):
+        self.assertEqual(listing_output('blog', 1), os.path.join('blog', 'index.html'))
+        self.assertEqual(listing_output('blog', 1, first_taken=True), os.path.join('blog', 'page', '1', 'index.html'))
+        self.assertEqual(listing_output('', 3), os.path.join('page', '3', 'index.html'))
+
+    def test_slugify(self):
+        self.assertEqual(slugify('Middle Earth & Co'), 'middle-earth-co')
+
+        #Tags that slugify alike get their own listing each, with a warning.
+    def test_tag_slug_collisions(self):
+        with self.assertLogs('ssg', level='WARNING') as logs:
+            slugs = tag_slugs(['C++', 'C', 'c-2', 'Rust'])
+        self.assertEqual(slugs, {'C': 'c', 'C++': 'c-3', 'Rust': 'rust', 'c-2': 'c-2'})
+        self.assertIn("'C' and 'C++' both slugify to 'c'", logs.output[0])
+
+    def test_feed_escapes_and_dates(self):
+        feed = render_feed([{'url': '/a.html', 'title': 'Q&A', 'date': '2024-02-03', 'summary': '<b>'}],
+                           'https://example.com', 'Site')
+        self.assertIn('<title>Q&amp;A</title>', feed)
+        self.assertIn('<pubDate>Sat, 03 Feb 2024 00:00:00 +0000</pubDate>', feed)
+        self.assertIn('<description>&lt;b&gt;</description>', feed)
+
+
+class TestGenerateListings(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.state = os.path.join(root, '.ssg', 'listings.json')
+        self.template = os.path.join(root, 'template.html')
+        with open(self.template, 'w') as f:
+            f.write('<title>{{ Title }}</title>{{ Content }}')
+        self.index = SiteIndex(os.path.join(root, '.ssg', 'site.db'))
+        for i in range(1, 4):
+            self.add(f'p{i}', f'2024-0{i}-01', ['news'])
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def add(self, name, date, tags):
+        self.index.update_page(os.path.join('blog', f'{name}.md'), os.path.join('blog', f'{name}.html'),
+                               {'title': name.upper(), 'summary': f'About {name}',
+                                'meta': {'date': date, 'tags': tags}, 'links': [], 'images': []})
+
+    def generate(self):
+        with self.assertLogs('ssg', level='INFO'):
+            return generate_listings(self.index, self.dest, self.content, self.template, self.state, per_page=2)
+
+    def read(self, *parts):
+        with open(os.path.join(self.dest, *parts)) as f:
+            return f.read()
+
+    def test_listing_pages(self):
+        self.assertEqual(self.generate(), (7, 0, 0))
+        self.assertEqual(self.read('blog', 'index.html'),
+                         '<title>Blog</title><div><h1>Blog</h1><ul>'
+                         '<li><a href="/blog/p3.html">P3</a><time>2024-03-01</time><p>About p3</p></li>'
+                         '<li><a href="/blog/p2.html">P2</a><time>2024-02-01</time><p>About p2</p></li>'
+                         '</ul><nav><a href="/blog/page/2/">Older</a></nav></div>')
+        self.assertIn('<a href="/blog/">Newer</a>', self.read('blog', 'page', '2', 'index.html'))
+        self.assertIn('<a href="/tags/news/">news (3)</a>', self.read('tags', 'index.html'))
+        self.assertIn('<loc>/blog/page/2/</loc>', self.read('sitemap.xml'))
+        self.assertEqual(self.read('feed.xml').count('<item>'), 3)
+
+    def test_colliding_tags_keep_separate_listings(self):
+        self.add('p4', '2024-04-01', ['C++'])
+        self.add('p5', '2024-05-01', ['C'])
+        with self.assertLogs('ssg', level='INFO') as logs:
+            generate_listings(self.index, self.dest, self.content, self.template, self.state, per_page=2)
+        self.assertTrue(any('WARNING' in line for line in logs.output))
+        self.assertIn('P5', self.read('tags', 'c', 'index.html'))
+        self.assertIn('P4', self.read('tags', 'c-2', 'index.html'))
+        self.assertIn('<a href="/tags/c-2/">C++ (1)</a>', self.read('tags', 'index.html'))
+
+        #Only listings whose members changed are rewritten; listings that disappear are removed.
+    def test_only_changed_listings_regenerated(self):
+        self.generate()
+        self.assertEqual(self.generate(), (0, 7, 0))
+
+        self.add('p1', '2024-01-01', ['news', 'extra'])
+        #Only the tags index, the new tag's page and the sitemap listing it change.
+        written, unchanged, removed = self.generate()
+        self.assertEqual((written, removed), (3, 0))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'tags', 'extra', 'index.html')))
+
+        self.index.remove_page(os.path.join('blog', 'p1.md'))
+        self.generate()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'tags', 'extra')))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'blog', 'page', '2')))
+
+
+if __name__ == "__main__":
+    unittest.main()
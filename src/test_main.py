@@ -0,0 +1,136 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import highlight
+import main
+from main import build_pages, find_pages, generate_page
+from render import extract_title, extract_title_from_file
+
+
+class TestBuildPages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.template = os.path.join(root, 'template.html')
+        with open(self.template, 'w') as f:
+            f.write('<title>{{ Title }}</title>{{ Content }}')
+        for i in range(6):
+            os.makedirs(os.path.join(self.content, f'section{i}'))
+            with open(os.path.join(self.content, f'section{i}', 'index.md'), 'w') as f:
+                f.write(f'# Page {i}\n\nBody {i}')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+        #Pages come back sorted so every build visits them in the same order.
+    def test_find_pages_sorted(self):
+        pages = find_pages(self.content, self.dest)
+        self.assertEqual([os.path.relpath(src, self.content) for src, _ in pages],
+                         [f'section{i}/index.md' for i in range(6)])
+        self.assertTrue(pages[0][1].endswith(os.path.join('section0', 'index.html')))
+
+    def test_parallel_build_matches_serial(self):
+        pages = find_pages(self.content, self.dest)
+        with self.assertLogs('ssg', level='DEBUG') as serial_log:
+            self.assertEqual(build_pages(pages, self.template, jobs=1), [])
+        with self.assertLogs('ssg', level='DEBUG') as parallel_log:
+            self.assertEqual(build_pages(pages, self.template, jobs=3, chunk_size=1), [])
+        self.assertEqual(serial_log.output, parallel_log.output)
+        with open(os.path.join(self.dest, 'section4', 'index.html')) as f:
+            self.assertIn('<title>Page 4</title>', f.read())
+
+        #A page without an h1 fails on its own without stopping the rest of the batch.
+    def test_failures_reported_in_order(self):
+        for i in (1, 3):
+            with open(os.path.join(self.content, f'section{i}', 'index.md'), 'w') as f:
+                f.write('no title here')
+        with self.assertLogs('ssg', level='ERROR'):
+            failures = build_pages(find_pages(self.content, self.dest), self.template, jobs=2, chunk_size=2)
+        self.assertEqual([os.path.relpath(src, self.content) for src, _ in failures],
+                         ['section1/index.md', 'section3/index.md'])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'section5', 'index.html')))
+
+        #Pages are written by a background thread; a failed write still fails its page.
+    def test_write_failure_fails_page(self):
+        os.makedirs(os.path.join(self.dest, 'section2', 'index.html'))
+        with self.assertLogs('ssg', level='ERROR'):
+            failures = build_pages(find_pages(self.content, self.dest), self.template)
+        self.assertEqual([os.path.relpath(src, self.content) for src, _ in failures], ['section2/index.md'])
+
+        #A streamed page comes out byte for byte the same as a normally generated one, title
+        #included: a '# ' line inside a code block is not a heading on either path.
+    def test_streamed_page_matches(self):
+        src = os.path.join(self.content, 'big.md')
+        with open(src, 'w', encoding='utf-8') as f:
+            f.write('\n\nIntro *text*\n\n```\n# not the title\n```\n\n# Big Page \u00e9\n\n' + '\n\n'.join(f'## Part {i}\n\n- a\n- b **{i}**' for i in range(50)) + '\n\n\n')
+        normal, streamed = os.path.join(self.dest, 'normal.html'), os.path.join(self.dest, 'streamed.html')
+        with self.assertLogs('ssg', level='DEBUG') as log:
+            generate_page(src, self.template, normal)
+            generate_page(src, self.template, streamed, stream_threshold=1)
+        self.assertIn('Streaming large page', ''.join(log.output))
+        with open(normal, 'rb') as f, open(streamed, 'rb') as g:
+            page = f.read()
+            self.assertEqual(page, g.read())
+        self.assertIn('<title>Big Page \u00e9</title>'.encode('utf-8'), page)
+
+        #A failed --atomic build leaves the live tree as it was, and the state with it: the next
+        #build still regenerates the pages the failed one had built into the discarded tree.
+    def test_failed_atomic_build_rolls_back_state(self):
+        def build():
+            argv = ['main.py', '--incremental', '--atomic', '--content', self.content, '--template', self.template,
+                    '--dest', self.dest]
+            with mock.patch.object(sys, 'argv', argv), mock.patch.object(main, 'configure_logging'), \
+                    self.assertLogs('ssg', level='INFO'):
+                main.main()
+        self.addCleanup(highlight.configure)
+
+        def write(section, text):
+            with open(os.path.join(self.content, section, 'index.md'), 'w') as f:
+                f.write(text)
+
+        build()
+        write('section0', '# Page 0\n\nversion 2')
+        write('section1', 'no title here')
+        with self.assertRaises(RuntimeError):
+            build()
+        with open(os.path.join(self.dest, 'section0', 'index.html')) as f:
+            self.assertNotIn('version 2', f.read())
+
+        write('section1', '# Page 1\n\nfixed')
+        build()
+        with open(os.path.join(self.dest, 'section0', 'index.html')) as f:
+            self.assertIn('version 2', f.read())
+        self.assertEqual([name for name in os.listdir(os.path.join(self.tmp.name, '.ssg'))
+                          if name.endswith('.staged-backup')], [])
+
+        #A full build leaves the manifest behind: the first incremental build after it has nothing to do.
+    def test_full_build_writes_manifest(self):
+        argv = ['main.py', '--content', self.content, '--template', self.template, '--dest', self.dest]
+        self.addCleanup(highlight.configure)
+        with mock.patch.object(sys, 'argv', argv), mock.patch.object(main, 'configure_logging'):
+            main.main()
+        with self.assertLogs('ssg', level='INFO'):
+            generated = main.generate_pages_incremental(self.content, self.template, self.dest,
+                                                        os.path.join(self.tmp.name, '.ssg', 'manifest.json'))
+        self.assertEqual(generated, 0)
+
+    def test_extract_title_from_file(self):
+        for markdown in ('# Top\n\ntext', '  # Indented start\n', 'intro\n\n# Later  \nmore'):
+            path = os.path.join(self.content, 'title.md')
+            with open(path, 'w') as f:
+                f.write(markdown)
+            self.assertEqual(extract_title_from_file(path), extract_title(markdown))
+        with open(path, 'w') as f:
+            f.write('no title\n')
+        with self.assertRaises(ValueError):
+            extract_title_from_file(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
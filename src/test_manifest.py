@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from main import generate_pages_incremental
+from manifest import BuildManifest
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.template = os.path.join(root, 'template.html')
+        self.manifest = os.path.join(root, '.ssg', 'manifest.json')
+        os.makedirs(os.path.join(self.content, 'blog'))
+        self.write(self.template, '<title>{{ Title }}</title>{{ Content }}')
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome')
+        self.write(os.path.join(self.content, 'blog', 'post.md'), '# Post\n\nHello')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self):
+        with redirect_stdout(StringIO()):
+            return generate_pages_incremental(self.content, self.template, self.dest, self.manifest)
+
+        #First build generates everything, an unchanged rebuild generates nothing.
+    def test_unchanged_rebuild_is_noop(self):
+        self.assertEqual(self.build(), 2)
+        self.assertEqual(self.build(), 0)
+
+    def test_only_changed_page_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome back')
+        self.assertEqual(self.build(), 1)
+        with open(os.path.join(self.dest, 'index.html')) as f:
+            self.assertIn('Welcome back', f.read())
+
+    def test_template_change_rebuilds_all(self):
+        self.build()
+        self.write(self.template, '<h1>{{ Title }}</h1>{{ Content }}')
+        self.assertEqual(self.build(), 2)
+
+        #Removing a source removes its output and the directory it leaves empty.
+    def test_removed_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, 'blog', 'post.md'))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'blog')))
+        self.assertNotIn('blog/post.md', BuildManifest.load(self.manifest).pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
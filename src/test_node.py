@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, split_nodes_delimiter, split_nodes_image, split_nodes_link
+from textnode import TextNode, split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
 
 
 class TestTextNode(unittest.TestCase):
@@ -38,6 +38,34 @@ class TestTextNode(unittest.TestCase):
             ]
         self.assertEqual(result,expected)
 
+    def test_text_to_textnodes_all_types(self):
+        result = text_to_textnodes("A **bold** and *italic* with ![pic](/p.png) and [a link](/x).")
+        expected = [
+            TextNode("A ", "text"),
+            TextNode("bold", "bold"),
+            TextNode(" and ", "text"),
+            TextNode("italic", "italic"),
+            TextNode(" with ", "text"),
+            TextNode("pic", "image", "/p.png"),
+            TextNode(" and ", "text"),
+            TextNode("a link", "link", "/x"),
+            TextNode(".", "text")
+            ]
+        self.assertEqual(result, expected)
+
+        #Outermost construct wins, inner markup stays as written.
+    def test_text_to_textnodes_nesting(self):
+        self.assertEqual(text_to_textnodes("**see [docs](/d)**"), [TextNode("see [docs](/d)", "bold")])
+        self.assertEqual(text_to_textnodes("[*this*](/d)"), [TextNode("*this*", "link", "/d")])
+        self.assertEqual(
+            text_to_textnodes("[![logo](/l.png)](/)"),
+            [TextNode("[", "text"), TextNode("logo", "image", "/l.png"), TextNode("](/)", "text")])
+
+        #Constructs never span lines and unmatched delimiters are plain text.
+    def test_text_to_textnodes_unmatched(self):
+        self.assertEqual(text_to_textnodes("a *b\nc* d"), [TextNode("a *b\nc* d", "text")])
+        self.assertEqual(text_to_textnodes(""), [TextNode("", "text")])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from main import build_pages, find_pages
+from pipeline import PipelinedBuild, iter_pages
+
+
+class TestPipelinedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.template = os.path.join(root, 'template.html')
+        with open(self.template, 'w') as f:
+            f.write('<title>{{ Title }}</title>{{ Content }}')
+        for i in range(12):
+            os.makedirs(os.path.join(self.content, f'section{i}'))
+            with open(os.path.join(self.content, f'section{i}', 'index.md'), 'w') as f:
+                f.write(f'# Page {i}\n\nBody *{i}* and [next](/section{i + 1}/)')
+        with open(os.path.join(self.content, 'section3', 'template.html'), 'w') as f:
+            f.write('<h6>{{ Title }}</h6>')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, dest):
+        tree = {}
+        for src, output in find_pages(self.content, dest):
+            with open(output) as f:
+                tree[os.path.relpath(output, dest)] = f.read()
+        return tree
+
+    def test_iter_pages_matches_find_pages(self):
+        dest = os.path.join(self.tmp.name, 'public')
+        self.assertEqual(list(iter_pages(self.content, dest)), find_pages(self.content, dest))
+
+        #Same pages, same on_page calls in the same order, whatever the parallelism.
+    def test_matches_build_pages(self):
+        for jobs, readers, chunk_size, stream_threshold in ((1, 1, 1, None), (3, 4, 2, None), (2, 2, 8, 1)):
+            expected_dest = os.path.join(self.tmp.name, f'expected{jobs}')
+            expected_calls = []
+            with self.assertLogs('ssg', level='DEBUG'):
+                build_pages(find_pages(self.content, expected_dest), self.template, content_root=self.content,
+                            stream_threshold=stream_threshold, on_page=lambda *call: expected_calls.append(call[2:]))
+
+            dest = os.path.join(self.tmp.name, f'public{jobs}')
+            calls = []
+            with self.assertLogs('ssg', level='INFO'):
+                failures = PipelinedBuild(self.content, self.template, dest, jobs, readers, chunk_size,
+                                          queue_size=2, stream_threshold=stream_threshold
+                                          ).run(on_page=lambda *call: calls.append(call[2:]))
+            self.assertEqual(failures, [])
+            self.assertEqual(self.read_tree(dest), self.read_tree(expected_dest))
+            self.assertEqual(calls, expected_calls)
+        self.assertEqual(self.read_tree(dest)['section3/index.html'], '<h6>Page 3</h6>')
+
+    def test_failures_reported_in_order(self):
+        for i in (7, 2):
+            with open(os.path.join(self.content, f'section{i}', 'index.md'), 'w') as f:
+                f.write('no title here')
+        dest = os.path.join(self.tmp.name, 'public')
+        with self.assertLogs('ssg', level='ERROR'):
+            failures = PipelinedBuild(self.content, self.template, dest, jobs=2, chunk_size=3).run()
+        self.assertEqual([os.path.relpath(src, self.content) for src, _ in failures],
+                         ['section2/index.md', 'section7/index.md'])
+        self.assertTrue(os.path.exists(os.path.join(dest, 'section11', 'index.html')))
+
+    def test_missing_content_dir_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            PipelinedBuild(os.path.join(self.tmp.name, 'nowhere'), self.template, self.tmp.name).run()
+
+
+if __name__ == "__main__":
+    unittest.main()
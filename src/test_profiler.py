@@ -0,0 +1,59 @@
+import os
+import tempfile
+import time
+import unittest
+
+import profiler
+from main import build_pages, find_pages
+
+
+class TestProfiler(unittest.TestCase):
+
+    def tearDown(self):
+        profiler.disable()
+
+        #Nested stages are charged only their own time.
+    def test_nested_stages_are_exclusive(self):
+        build_profiler = profiler.BuildProfiler()
+        with build_profiler.page('page.md'):
+            with build_profiler.stage('outer'):
+                time.sleep(0.02)
+                with build_profiler.stage('inner'):
+                    time.sleep(0.05)
+        stages = build_profiler.pages['page.md']
+        self.assertLess(stages['outer'][0], 0.045)
+        self.assertGreaterEqual(stages['inner'][0], 0.045)
+        total = sum(wall for name, (wall, _) in stages.items() if name != 'total')
+        self.assertAlmostEqual(total, stages['total'][0], places=3)
+
+    def test_disabled_profiler_records_nothing(self):
+        with profiler.active.page('page.md'):
+            with profiler.stage('read'):
+                pass
+        self.assertFalse(profiler.active.enabled)
+
+        #Worker processes send their timings back to the parent's profiler.
+    def test_parallel_build_profile(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, 'content')
+            os.makedirs(content)
+            template = os.path.join(root, 'template.html')
+            with open(template, 'w') as f:
+                f.write('{{ Title }}{{ Content }}')
+            for i in range(4):
+                with open(os.path.join(content, f'page{i}.md'), 'w') as f:
+                    f.write(f'# Page {i}\n\nSome *text*\n\n- a\n- b')
+            build_profiler = profiler.enable()
+            build_pages(find_pages(content, os.path.join(root, 'public')), template, jobs=2, chunk_size=1)
+            self.assertEqual(len(build_profiler.pages), 4)
+            for stages in build_profiler.pages.values():
+                for stage in ('read', 'parse', 'block_split', 'convert:list', 'inline', 'serialize',
+                              'template_fill', 'write', 'total'):
+                    self.assertIn(stage, stages)
+            report = os.path.join(root, 'profile.json')
+            build_profiler.report(report)
+            self.assertIn('Slowest 2 pages', build_profiler.summary(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
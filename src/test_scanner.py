@@ -0,0 +1,119 @@
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import main
+from scanner import RACY_WINDOW_NS, TreeSnapshot, iter_pages, scan_files
+
+
+class TestScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'content')
+        for relative in ('b.md', 'a.md', os.path.join('a', 'z.md'), os.path.join('a', 'img.png'), 'notes.txt'):
+            self.write(relative, relative)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, relative, text, age=10):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        #Old enough to be outside the racy window of a scan made now.
+        stamp = time.time_ns() - age * 10 ** 9
+        os.utime(path, ns=(stamp, stamp))
+
+        #A directory sorts before a file that shares its name as a prefix, as find_pages always had it.
+    def test_iter_pages_order_and_outputs(self):
+        dest = os.path.join(self.tmp.name, 'public')
+        self.assertEqual(list(iter_pages(self.root, dest)), [
+            (os.path.join(self.root, 'a', 'z.md'), os.path.join(dest, 'a', 'z.html')),
+            (os.path.join(self.root, 'a.md'), os.path.join(dest, 'a.html')),
+            (os.path.join(self.root, 'b.md'), os.path.join(dest, 'b.html')),
+        ])
+
+    def test_scan_files(self):
+        self.assertEqual(list(scan_files(self.root, '.md')), [os.path.join('a', 'z.md'), 'a.md', 'b.md'])
+        self.assertEqual(scan_files(self.root)['notes.txt'][0], len('notes.txt'))
+
+    def test_snapshot_diff_and_racy_entries(self):
+        path = os.path.join(self.tmp.name, '.ssg', 'pages.json')
+        TreeSnapshot.scan(path, self.root, '.md').save()
+        self.write('b.md', 'changed!')
+        self.write('c.md', 'new', age=0)
+        os.remove(os.path.join(self.root, 'a.md'))
+
+        previous = TreeSnapshot.load(path)
+        current = TreeSnapshot.scan(path, self.root, '.md')
+        self.assertEqual(sorted(current.files), [os.path.join('a', 'z.md'), 'b.md', 'c.md'])
+        self.assertNotIn('c.md', previous.files)
+        self.assertTrue(previous.unchanged(os.path.join('a', 'z.md'), current.files[os.path.join('a', 'z.md')]))
+        self.assertFalse(previous.unchanged('b.md', current.files['b.md']))
+
+        #Recorded too close to the scan to be trusted, even with the same size and mtime.
+        current.save()
+        racy = TreeSnapshot.load(path)
+        racy.scanned_at = current.files['c.md'][1] + RACY_WINDOW_NS // 2
+        self.assertFalse(racy.unchanged('c.md', current.files['c.md']))
+
+        with open(path, 'w') as f:
+            f.write('{not json')
+        self.assertEqual(TreeSnapshot.load(path).files, {})
+
+        #An incremental build only reads the pages whose size or mtime moved.
+    def test_incremental_build_skips_unchanged_pages(self):
+        template = os.path.join(self.tmp.name, 'template.html')
+        with open(template, 'w') as f:
+            f.write('{{ Content }}')
+        for relative in ('a.md', 'b.md', os.path.join('a', 'z.md')):
+            self.write(relative, f'# {relative}\n\ntext')
+        manifest = os.path.join(self.tmp.name, '.ssg', 'manifest.json')
+        dest = os.path.join(self.tmp.name, 'public')
+
+        def build():
+            with redirect_stdout(StringIO()), self.assertLogs('ssg', level='INFO'), \
+                    mock.patch.object(main, 'hash_file', wraps=main.hash_file) as hash_file:
+                generated = main.generate_pages_incremental(self.root, template, dest, manifest)
+            return generated, sorted(os.path.basename(call.args[0]) for call in hash_file.call_args_list)
+
+        self.assertEqual(build(), (3, ['a.md', 'b.md', 'template.html', 'z.md']))
+        self.assertEqual(build(), (0, ['template.html']))
+        self.write('b.md', '# b\n\nnew text')
+        self.assertEqual(build(), (1, ['b.md', 'template.html']))
+
+        #Pages under a symlinked directory are found by the incremental scan too, the same as
+        #by find_pages, so their outputs are neither skipped nor removed.
+    @unittest.skipUnless(hasattr(os, 'symlink'), "needs symlinks")
+    def test_incremental_build_follows_symlinked_dirs(self):
+        template = os.path.join(self.tmp.name, 'template.html')
+        with open(template, 'w') as f:
+            f.write('{{ Content }}')
+        for relative in ('a.md', 'b.md', os.path.join('a', 'z.md')):
+            self.write(relative, f'# {relative}\n\ntext')
+        shared = os.path.join(self.tmp.name, 'shared')
+        os.makedirs(shared)
+        with open(os.path.join(shared, 'page.md'), 'w') as f:
+            f.write('# Shared\n\ntext')
+        os.symlink(shared, os.path.join(self.root, 'docs'))
+        manifest = os.path.join(self.tmp.name, '.ssg', 'manifest.json')
+        dest = os.path.join(self.tmp.name, 'public')
+
+        def build():
+            with redirect_stdout(StringIO()), self.assertLogs('ssg', level='INFO'):
+                return main.generate_pages_incremental(self.root, template, dest, manifest)
+
+        self.assertEqual(build(), 4)
+        self.assertTrue(os.path.exists(os.path.join(dest, 'docs', 'page.html')))
+        self.assertEqual(build(), 0)
+        self.assertTrue(os.path.exists(os.path.join(dest, 'docs', 'page.html')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip
+import http.client
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from functools import partial
+from unittest import mock
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import StaticHandler, watch_and_rebuild
+
+
+class QuietHandler(StaticHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestStaticHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        with open(os.path.join(root, 'index.html'), 'w') as f:
+            f.write('<p>hello</p>')
+        with open(os.path.join(root, 'index.html.gz'), 'wb') as f:
+            f.write(gzip.compress(b'<p>hello</p>'))
+        os.makedirs(os.path.join(root, 'majesty'))
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=root))
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection('127.0.0.1', self.httpd.server_address[1])
+
+    def tearDown(self):
+        self.conn.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+
+    def get(self, path, headers=None):
+        self.conn.request('GET', path, headers=headers or {})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+        #Two requests over one keep-alive connection, the second revalidates with the ETag.
+    def test_etag_revalidation(self):
+        response, body = self.get('/')
+        self.assertEqual((response.status, body), (200, b'<p>hello</p>'))
+        self.assertEqual(response.getheader('Cache-Control'), 'no-cache')
+        response, body = self.get('/', {'If-None-Match': response.getheader('ETag')})
+        self.assertEqual((response.status, body), (304, b''))
+
+    def test_precompressed_variant(self):
+        response, body = self.get('/index.html', {'Accept-Encoding': 'br, gzip'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(gzip.decompress(body), b'<p>hello</p>')
+
+    def test_directory_redirect_and_missing(self):
+        response, _ = self.get('/majesty')
+        self.assertEqual((response.status, response.getheader('Location')), (301, '/majesty/'))
+        response, _ = self.get('/nope.html')
+        self.assertEqual(response.status, 404)
+
+
+class TestWatchAndRebuild(unittest.TestCase):
+
+        #A rebuild that raises is logged and the next change is still rebuilt.
+    def test_failed_rebuild_keeps_watching(self):
+        reloader = mock.Mock()
+        batches = [['a.md'], ['b.md']]
+        with mock.patch('watcher.Watcher', return_value=iter(batches)), \
+                mock.patch('main.rebuild_paths', side_effect=[RuntimeError('boom'), []]) as rebuild, \
+                self.assertLogs('ssg', level='INFO') as logs:
+            watch_and_rebuild(reloader, 'content', 'template.html', 'public')
+        self.assertEqual([call.args[0] for call in rebuild.call_args_list], batches)
+        self.assertEqual(reloader.notify.call_count, 2)
+        errors = [record for record in logs.records if record.levelname == 'ERROR']
+        self.assertEqual(str(errors[0].exc_info[1]), 'boom')
+        self.assertEqual(logs.output.count('INFO:ssg.server:Detected 1 changed file(s), rebuilding'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from main import generate_pages_incremental
+from siteindex import SiteIndex
+
+
+class TestSiteIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, '.ssg', 'site.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def info(self, title, date=None, tags=()):
+        meta = {'tags': list(tags)}
+        if date:
+            meta['date'] = date
+        return {'title': title, 'summary': f'About {title}', 'meta': meta, 'links': [], 'images': []}
+
+    def test_queries(self):
+        index = SiteIndex(self.path)
+        index.update_page(os.path.join('blog', 'a.md'), os.path.join('blog', 'a.html'),
+                          self.info('A', '2024-01-01', ['x']))
+        index.update_page(os.path.join('blog', 'b.md'), os.path.join('blog', 'b.html'),
+                          self.info('B', '2024-02-01', ['x', 'y']))
+        index.update_page('about.md', 'about.html', self.info('About'))
+        index.save()
+        index.close()
+
+        index = SiteIndex(self.path)
+        self.assertEqual([page['title'] for page in index.pages()], ['B', 'A', 'About'])
+        self.assertEqual([page['url'] for page in index.pages('blog')], ['/blog/b.html', '/blog/a.html'])
+        self.assertEqual([page['title'] for page in index.pages_tagged('x')], ['B', 'A'])
+        self.assertEqual(index.tags(), {'x': 2, 'y': 1})
+        self.assertEqual(index.sections(), ['', 'blog'])
+
+        #Updating a page replaces its tags; removing it drops them.
+        index.update_page(os.path.join('blog', 'b.md'), os.path.join('blog', 'b.html'), self.info('B', tags=['z']))
+        self.assertEqual(index.tags(), {'x': 1, 'z': 1})
+        index.remove_page(os.path.join('blog', 'b.md'))
+        self.assertEqual(index.tags(), {'x': 1})
+        index.close()
+
+    def test_incremental_build_fills_index(self):
+        root = self.tmp.name
+        content, dest = os.path.join(root, 'content'), os.path.join(root, 'public')
+        template = os.path.join(root, 'template.html')
+        with open(template, 'w') as f:
+            f.write('{{ Content }}')
+        os.makedirs(os.path.join(content, 'posts'))
+        with open(os.path.join(content, 'posts', 'one.md'), 'w') as f:
+            f.write('---\ndate: 2024-05-05\ntags: rings, elves\n---\n# One\n\nThe first post.')
+        manifest = os.path.join(root, '.ssg', 'manifest.json')
+        with self.assertLogs('ssg', level='INFO'):
+            generate_pages_incremental(content, template, dest, manifest)
+
+        index = SiteIndex(self.path)
+        [page] = index.pages('posts')
+        self.assertEqual((page['title'], page['date'], page['summary'], page['tags']),
+                         ('One', '2024-05-05', 'The first post.', ['rings', 'elves']))
+        index.close()
+
+        os.remove(os.path.join(content, 'posts', 'one.md'))
+        with self.assertLogs('ssg', level='INFO'):
+            generate_pages_incremental(content, template, dest, manifest)
+        index = SiteIndex(self.path)
+        self.assertEqual(index.pages(), [])
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode
+from template import Template, TemplateResolver, load_template
+
+
+class TestTemplate(unittest.TestCase):
+
+        #Test to see if the template compiles into literal and placeholder segments
+    def test_compile_segments(self):
+        template = Template('<title>{{ Title }}</title>{{Content}}!')
+        self.assertEqual(template.segments, [
+            (False, '<title>'),
+            (True, 'Title', '{{ Title }}'),
+            (False, '</title>'),
+            (True, 'Content', '{{Content}}'),
+            (False, '!')
+        ])
+
+        #Nodes stream, lists join, unknown placeholders stay as written
+    def test_render(self):
+        template = Template('<h1>{{ Title }}</h1>{{ Content }}<p>{{ tags }}</p>{{ missing }}')
+        out = io.StringIO()
+        template.render(out, {"Title": "Hi", "Content": LeafNode(tag='b', value='x'), "tags": ["a", "b"]})
+        self.assertEqual(out.getvalue(), '<h1>Hi</h1><b>x</b><p>a, b</p>{{ missing }}')
+
+        #The same page as render(), as pre-encoded literal chunks and encoded fields
+    def test_render_bytes(self):
+        template = Template('<h1>{{ Title }}</h1>{{ Content }}<p>{{ tags }}</p>{{ missing }}é')
+        context = {"Title": "Hé", "Content": LeafNode(tag='b', value='x'), "tags": ["a", "b"]}
+        out = io.StringIO()
+        template.render(out, context)
+        chunks = template.render_bytes(context)
+        self.assertIs(chunks[0], template.byte_segments[0][1])
+        self.assertEqual(b''.join(chunks), out.getvalue().encode('utf-8'))
+
+    def test_load_template_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'template.html')
+            with open(path, 'w') as f:
+                f.write('{{ Title }}')
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            with open(path, 'w') as f:
+                f.write('<b>{{ Title }}</b>')
+            self.assertIsNot(load_template(path), first)
+
+        #Nearest template.html inside the content dir wins, else the default
+    def test_resolver_per_directory(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, 'content')
+            os.makedirs(os.path.join(content, 'blog', '2024'))
+            os.makedirs(os.path.join(content, 'about'))
+            blog_template = os.path.join(content, 'blog', 'template.html')
+            with open(blog_template, 'w') as f:
+                f.write('{{ Content }}')
+            resolver = TemplateResolver(content, 'default.html')
+            self.assertEqual(resolver.for_page(os.path.join(content, 'blog', '2024', 'post.md')), blog_template)
+            self.assertEqual(resolver.for_page(os.path.join(content, 'about', 'index.md')), 'default.html')
+            self.assertEqual(resolver.for_page(os.path.join(content, 'index.md')), 'default.html')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from main import find_pages, build_pages, rebuild_paths
+from watcher import Watcher, diff_snapshots, snapshot
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.dest = os.path.join(root, 'public')
+        self.template = os.path.join(root, 'template.html')
+        os.makedirs(os.path.join(self.content, 'blog'))
+        self.write(self.template, '<title>{{ Title }}</title>{{ Content }}')
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nWelcome')
+        self.write(os.path.join(self.content, 'blog', 'post.md'), '# Post\n\nHello')
+        with redirect_stdout(StringIO()):
+            build_pages(find_pages(self.content, self.dest), self.template, content_root=self.content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.dest, *parts)) as f:
+            return f.read()
+
+    def rebuild(self, *paths):
+        with redirect_stdout(StringIO()):
+            return rebuild_paths(paths, self.content, self.template, self.dest)
+
+    def test_snapshot_diff(self):
+        before = snapshot([self.content, self.template])
+        post = os.path.join(self.content, 'blog', 'post.md')
+        self.write(post, '# Post\n\nHello again, longer now')
+        os.remove(os.path.join(self.content, 'index.md'))
+        new = os.path.join(self.content, 'new.md')
+        self.write(new, '# New')
+        changed = diff_snapshots(before, snapshot([self.content, self.template]))
+        self.assertEqual(changed, {post, new, os.path.join(self.content, 'index.md')})
+
+        #A page under a symlinked directory is watched like any other.
+    def test_snapshot_follows_symlinked_dirs(self):
+        shared = os.path.join(self.tmp.name, 'shared')
+        os.makedirs(shared)
+        self.write(os.path.join(shared, 'doc.md'), '# Doc')
+        os.symlink(shared, os.path.join(self.content, 'docs'))
+        before = snapshot([self.content])
+        self.write(os.path.join(shared, 'doc.md'), '# Doc, edited')
+        changed = diff_snapshots(before, snapshot([self.content]))
+        self.assertEqual(changed, {os.path.join(self.content, 'docs', 'doc.md')})
+
+    def test_poll_reports_each_change_once(self):
+        watcher = Watcher([self.content])
+        self.write(os.path.join(self.content, 'new.md'), '# New')
+        self.assertEqual(len(watcher.poll()), 1)
+        self.assertEqual(watcher.poll(), set())
+
+    def test_rebuild_changed_page_only(self):
+        self.write(os.path.join(self.content, 'index.md'), '# Home\n\nChanged')
+        self.write(self.template, '<h1>{{ Title }}</h1>{{ Content }}')
+        self.rebuild(os.path.join(self.content, 'index.md'))
+        self.assertIn('Changed', self.read('index.html'))
+        self.assertIn('<title>Post</title>', self.read('blog', 'post.html'))
+
+        #A section template only rebuilds the pages underneath it.
+    def test_rebuild_section_template(self):
+        section_template = os.path.join(self.content, 'blog', 'template.html')
+        self.write(section_template, '<main>{{ Content }}</main>')
+        self.rebuild(section_template)
+        self.assertTrue(self.read('blog', 'post.html').startswith('<main>'))
+        self.assertTrue(self.read('index.html').startswith('<title>'))
+
+    def test_rebuild_removed_page(self):
+        post = os.path.join(self.content, 'blog', 'post.md')
+        os.remove(post)
+        self.rebuild(post)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'blog')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import writer
+from writer import OutputWriter, StagedOutput, remove_file, write_chunks, write_if_changed
+
+
+class TestOutputWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_and_skips_unchanged(self):
+        path = os.path.join(self.root, 'a', 'b', 'index.html')
+        writer = OutputWriter(queue_size=2)
+        for _ in range(3):
+            writer.write(path, '<p>é</p>')
+        self.assertEqual(writer.close(), {})
+        self.assertEqual((writer.written, writer.unchanged), (1, 2))
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '<p>é</p>')
+
+        #Unchanged bytes keep the file (and its mtime); new bytes replace it with a new file.
+    def test_write_if_changed_replaces_file(self):
+        path = os.path.join(self.root, 'page.html')
+        write_if_changed(path, b'old')
+        os.link(path, path + '.link')
+        self.assertFalse(write_if_changed(path, b'old'))
+        self.assertTrue(write_if_changed(path, b'new'))
+        with open(path + '.link', 'rb') as f:
+            self.assertEqual(f.read(), b'old')
+
+        #Byte chunks are compared and written in place of one joined string.
+    def test_write_chunks(self):
+        path = os.path.join(self.root, 'page.html')
+        self.assertTrue(write_if_changed(path, [b'<p>', 'é'.encode('utf-8'), b'', b'</p>']))
+        self.assertFalse(write_if_changed(path, [b'<p>\xc3', b'\xa9</p>']))
+        self.assertTrue(write_if_changed(path, [b'<p>', b'e!', b'</p>']))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'<p>e!</p>')
+        #Same size, first chunk differs: the rest of the file is not read.
+        with mock.patch('writer.open', mock.mock_open(read_data=b'<p>e!</p>')) as opened:
+            self.assertTrue(write_if_changed(path, [b'<a>', b'e!', b'</p>']))
+        opened().read.assert_called_once_with(3)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'<a>e!</p>')
+
+        #A short writev is resumed mid-chunk.
+    def test_write_chunks_partial_writes(self):
+        def short_writev(fd, buffers):
+            return os.write(fd, bytes(buffers[0])[:3])
+
+        path = os.path.join(self.root, 'partial')
+        with open(path, 'wb') as f, mock.patch.object(writer.os, 'writev', side_effect=short_writev):
+            write_chunks(f.fileno(), [b'hello', b'', b' wide', b' world'])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'hello wide world')
+
+    def test_errors_reported_per_path(self):
+        blocker = os.path.join(self.root, 'file')
+        open(blocker, 'w').close()
+        writer = OutputWriter()
+        writer.write(os.path.join(blocker, 'page.html'), 'x')
+        writer.write(os.path.join(self.root, 'ok.html'), 'x')
+        errors = writer.close()
+        self.assertEqual(list(errors), [os.path.join(blocker, 'page.html')])
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'ok.html')))
+
+        #Emptied directories go, up to the root; a directory that is already gone is fine.
+    def test_remove_file_prunes_empty_parents(self):
+        path = os.path.join(self.root, 'a', 'b', 'page.html')
+        os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+        self.assertTrue(remove_file(path, self.root))
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertFalse(remove_file(path, self.root))
+
+
+class TestStagedOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, 'public')
+        os.makedirs(os.path.join(self.dest, 'sub'))
+        with open(os.path.join(self.dest, 'sub', 'old.html'), 'w') as f:
+            f.write('old')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_publish_swaps_in_staged_tree(self):
+        staged = StagedOutput(self.dest)
+        self.assertTrue(os.path.exists(os.path.join(staged.root, 'sub', 'old.html')))
+        write_if_changed(os.path.join(staged.root, 'new.html'), b'new')
+        self.assertFalse(os.path.exists(os.path.join(self.dest, 'new.html')))
+        staged.publish()
+        self.assertTrue(os.path.islink(self.dest))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'new.html')))
+
+        #The next staged build clones the published one and retires it on publish.
+        previous = os.path.realpath(self.dest)
+        staged = StagedOutput(self.dest)
+        self.assertTrue(os.path.samefile(os.path.join(staged.root, 'new.html'), os.path.join(self.dest, 'new.html')))
+        staged.publish()
+        self.assertFalse(os.path.exists(previous))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), sorted([os.path.basename(staged.root), 'public']))
+
+        #A dest_dir symlinked by the user to a webroot: the webroot survives the publish.
+    def test_publish_keeps_foreign_symlink_target(self):
+        webroot = os.path.join(self.tmp.name, 'www')
+        os.rename(self.dest, webroot)
+        os.symlink(webroot, self.dest)
+        staged = StagedOutput(self.dest)
+        self.assertTrue(os.path.exists(os.path.join(staged.root, 'sub', 'old.html')))
+        with self.assertLogs('ssg', level='WARNING'):
+            staged.publish()
+        self.assertEqual(os.readlink(self.dest), os.path.basename(staged.root))
+        self.assertTrue(os.path.exists(os.path.join(webroot, 'sub', 'old.html')))
+
+    def test_discard_keeps_live_tree(self):
+        staged = StagedOutput(self.dest)
+        os.remove(os.path.join(staged.root, 'sub', 'old.html'))
+        staged.discard()
+        self.assertFalse(os.path.exists(staged.root))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, 'sub', 'old.html')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,6 +34,9 @@ class TextNode:
     
 
 
+#The split_nodes_* helpers each handle one kind of construct on an existing node list.
+#text_to_textnodes no longer chains them, it scans the text once (see below).
+
 #This delimiter will return a new list of nodes from strings of text, based on the list of delimiters.
 #If delimiters are found within other delimiters, only outter delimiter will apply, but it will remove the inner delimiters to keep it clean.
 
@@ -144,31 +147,81 @@ def split_nodes_link(nodes):
 
     return result_nodes
 
-#This function takes care of the inline text.
+#Any character that can open an inline construct: ** or * (bold/italic), ![ (image), [ (link).
+_inline_start = re.compile(r'[*!\[]')
+
+
+#Images are matched before links, as in the old pipeline: a link whose span holds an
+#image is not a link, so "[![logo](l.png)](/)" keeps its image.
+def _contains_image(text, start, end, line_end):
+    k = text.find('![', start, end)
+    while k != -1:
+        middle = text.find('](', k + 2, line_end)
+        if middle != -1 and text.find(')', middle + 2, line_end) != -1:
+            return True
+        k = text.find('![', k + 1, end)
+    return False
+
+
+#Single left-to-right scan over the text, emitting the same nodes the old three-pass
+#split_nodes_delimiter -> split_nodes_image -> split_nodes_link pipeline produced.
+#Everything works on positions into the original string, so the text is never re-sliced
+#or re-searched from the start and the cost stays linear in its length.
+#Like the regexes it replaces, no construct spans a newline.
+#Nesting: the outermost construct wins and its inner text is kept as written, so
+#"**see [docs](/d)**" is one bold node and "[*this*](/d)" is one link node.
 def text_to_textnodes(text):
-    
-    initial_nodes = [TextNode(text, "text")]
-    #print("Initial nodes:", initial_nodes)  # Debug print
-    
-    #print('===================================================')
-
-    after_delimiters= split_nodes_delimiter(initial_nodes)
-    #print("After splitting delimiters:", after_delimiters)  # Debug print
-   
-    #print('===================================================')
-
-    after_images= split_nodes_image(after_delimiters)
-    #print("After splitting images:", after_images)  # Debug print
-    
-    #print('===================================================')
-
-    final_nodes= split_nodes_link(after_images)
-    #print("Final nodes after splitting links:", final_nodes)  # Debug print
-
-    return final_nodes
-
-
-
-
-
-
+    nodes = []
+    length = len(text)
+    pending = 0     # start of the plain text not yet emitted
+    i = 0
+    line_end = -1
+    links_exhausted = -1    # end of a line known to hold no complete [..](..) after i
+
+    while True:
+        match = _inline_start.search(text, i)
+        if not match:
+            break
+        j = match.start()
+        if j > line_end:
+            line_end = text.find('\n', j)
+            if line_end == -1:
+                line_end = length
+        char = text[j]
+        node = None
+
+        if char == '*':
+            if text.startswith('**', j):
+                close = text.find('**', j + 2, line_end)
+                if close != -1:
+                    node = TextNode(text[j + 2:close], "bold")
+                    end = close + 2
+            if node is None:
+                close = text.find('*', j + 1, line_end)
+                if close != -1:
+                    node = TextNode(text[j + 1:close], "italic")
+                    end = close + 1
+        elif line_end != links_exhausted:
+            is_image = char == '!'
+            start = j + 1 if is_image else j
+            if not is_image or text.startswith('[', start):
+                middle = text.find('](', start + 1, line_end)
+                close = text.find(')', middle + 2, line_end) if middle != -1 else -1
+                if close == -1:
+                    #If the first "](" has no ")" after it, no later one on this line does either.
+                    links_exhausted = line_end
+                elif close > middle + 2 and (is_image or not _contains_image(text, j + 1, close, line_end)):
+                    node = TextNode(text[start + 1:middle], "image" if is_image else "link", url=text[middle + 2:close])
+                    end = close + 1
+
+        if node is None:
+            i = j + 1
+            continue
+        if j > pending:
+            nodes.append(TextNode(text[pending:j], "text"))
+        nodes.append(node)
+        pending = i = end
+
+    if pending < length or not nodes:
+        nodes.append(TextNode(text[pending:], "text"))
+    return nodes
@@ -0,0 +1,77 @@
+import os
+import time
+
+
+#Record (mtime_ns, size) for every file under the given roots (files or directories).
+#os.scandir hands back cached file types, so only one stat per file is needed.
+#Symlinked directories are followed, as the page scan of an incremental build follows them.
+def snapshot(roots):
+    files = {}
+    for root in roots:
+        if os.path.isfile(root):
+            stat = os.stat(root)
+            files[os.path.abspath(root)] = (stat.st_mtime_ns, stat.st_size)
+        elif os.path.isdir(root):
+            _scan(os.path.abspath(root), files)
+    return files
+
+
+def _scan(directory, files):
+    try:
+        with os.scandir(directory) as iterator:
+            entries = list(iterator)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                _scan(entry.path, files)
+            elif entry.is_file():
+                stat = entry.stat()
+                files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            #Deleted between listing and stat, the next poll reports it as removed.
+            continue
+
+
+#Paths that were added, removed or modified between two snapshots.
+def diff_snapshots(old, new):
+    changed = {path for path, state in new.items() if old.get(path) != state}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+class Watcher:
+    #Polls a set of roots and reports changes in debounced bursts: once something changes,
+    #it keeps collecting until the tree has been quiet for `debounce` seconds, so an editor
+    #saving several files (or writing one in pieces) triggers a single rebuild.
+
+    def __init__(self, roots, interval=0.25, debounce=0.2):
+        self.roots = list(roots)
+        self.interval = interval
+        self.debounce = debounce
+        self.state = snapshot(self.roots)
+
+    def poll(self):
+        new_state = snapshot(self.roots)
+        changed = diff_snapshots(self.state, new_state)
+        self.state = new_state
+        return changed
+
+    #Block until a burst of changes has settled, then return every path it touched.
+    def wait_for_changes(self):
+        while True:
+            changed = self.poll()
+            if changed:
+                break
+            time.sleep(self.interval)
+        while True:
+            time.sleep(self.debounce)
+            more = self.poll()
+            if not more:
+                return changed
+            changed |= more
+
+    def __iter__(self):
+        while True:
+            yield self.wait_for_changes()
@@ -0,0 +1,209 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+
+logger = logging.getLogger("ssg.writer")
+
+
+#Most buffers one writev call takes.
+_IOV_MAX = os.sysconf('SC_IOV_MAX') if hasattr(os, 'sysconf') and 'SC_IOV_MAX' in os.sysconf_names else 1024
+
+
+#Write a list of byte strings to the file descriptor fd in order: with os.writev where the
+#OS has it, so the pieces of a page go out in one system call without being joined first.
+#A short write is picked up where it stopped.
+def write_chunks(fd, chunks):
+    chunks = [chunk for chunk in chunks if chunk]
+    if not hasattr(os, 'writev'):
+        for chunk in chunks:
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(fd, view):]
+        return
+    first = 0
+    while first < len(chunks):
+        written = os.writev(fd, chunks[first:first + _IOV_MAX])
+        while first < len(chunks) and written >= len(chunks[first]):
+            written -= len(chunks[first])
+            first += 1
+        if written:
+            chunks[first] = memoryview(chunks[first])[written:]
+
+
+#True if the open file f, already known to be the right size, holds exactly the bytes of
+#chunks. Read one chunk's length at a time, so the comparison stops at the first chunk that
+#differs and the page is never joined.
+def _same_bytes(f, chunks):
+    for chunk in chunks:
+        #bytes equality is a memcmp; comparing memoryviews goes item by item.
+        if f.read(len(chunk)) != chunk:
+            return False
+    return True
+
+
+#Write data (bytes, or a list of byte strings as Template.render_bytes returns) to path
+#unless the file already holds exactly those bytes.
+#New contents go to a temporary file that is renamed over path, so readers never see a
+#half-written page and a file hardlinked into another tree is never written through.
+#Returns True if the file was written.
+def write_if_changed(path, data):
+    chunks = (data,) if isinstance(data, (bytes, bytearray)) else data
+    try:
+        if os.path.getsize(path) == sum(map(len, chunks)):
+            with open(path, 'rb') as f:
+                if _same_bytes(f, chunks):
+                    return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + '.write-tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        write_chunks(fd, chunks)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+    return True
+
+
+#Delete the file at path, if there is one, and then any directories that leaves empty,
+#up to but not including root. Returns True if a file was removed.
+def remove_file(path, root):
+    removed = os.path.exists(path)
+    if removed:
+        os.remove(path)
+    parent = os.path.dirname(path)
+    root = os.path.abspath(root)
+    while os.path.abspath(parent).startswith(root + os.sep) and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+    return removed
+
+
+class OutputWriter:
+    #Takes rendered pages off the build loop: write() queues (path, text or a list of byte
+    #chunks) and returns, a background thread encodes and writes them. The queue is bounded,
+    #so a slow disk holds the producer back instead of piling pages up in memory. Directories
+    #are created once per writer, and pages whose bytes are unchanged are left untouched
+    #(keeping their mtime).
+    #close() waits for the queue to drain and returns {path: error message} for failed writes.
+
+    def __init__(self, queue_size=64):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.created_dirs = set()
+        self.errors = {}
+        self.written = 0
+        self.unchanged = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def makedirs(self, directory):
+        if directory not in self.created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self.created_dirs.add(directory)
+
+    def write(self, path, text):
+        self.queue.put((path, text))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, text = item
+            try:
+                self.makedirs(os.path.dirname(path))
+                if write_if_changed(path, text.encode('utf-8') if type(text) is str else text):
+                    self.written += 1
+                else:
+                    self.unchanged += 1
+            except Exception as e:
+                self.errors[path] = f"{type(e).__name__}: {e}"
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        return self.errors
+
+
+class StagedOutput:
+    #Builds the site next to dest_dir and swaps it in whole, so nothing serving dest_dir
+    #ever sees a half-built tree.
+    #dest_dir becomes a symlink to the current build (.<name>-<id> beside it); the staging
+    #tree starts as a hardlink clone of the current one, so unchanged files cost one link()
+    #instead of a copy. Everything that writes into root must replace files rather than
+    #write through them (write_if_changed, copy_asset and precompress all do).
+    #publish() flips the symlink with a single rename and removes the old tree; the first
+    #publish over a plain directory has to move it aside first, so that one isn't atomic.
+    #If dest_dir is a symlink the user made, its target is cloned like any other tree but
+    #never removed.
+    #state_files are build state files describing the output (manifest, dependency graph,
+    #...). Whatever the build saves to them belongs to the staging tree: discard() puts back
+    #the copies taken here (or removes files that didn't exist), so the next build compares
+    #against the tree that is actually live.
+
+    def __init__(self, dest_dir, state_files=()):
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.backups = {}
+        for path in state_files:
+            backup = None
+            if os.path.exists(path):
+                backup = path + '.staged-backup'
+                shutil.copy2(path, backup)
+            self.backups[path] = backup
+        parent, name = os.path.split(self.dest_dir)
+        self.root = os.path.join(parent, f".{name}-{time.time_ns():x}")
+        if os.path.isdir(self.dest_dir):
+            self._clone(os.path.realpath(self.dest_dir), self.root)
+        else:
+            os.makedirs(self.root)
+
+    def _clone(self, src, dest):
+        os.makedirs(dest)
+        with os.scandir(src) as entries:
+            for entry in entries:
+                target = os.path.join(dest, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    self._clone(entry.path, target)
+                else:
+                    try:
+                        os.link(entry.path, target, follow_symlinks=False)
+                    except OSError:
+                        shutil.copy2(entry.path, target, follow_symlinks=False)
+
+    def publish(self):
+        previous = None
+        if os.path.islink(self.dest_dir):
+            #Only a tree this class made (a .<name>-<id> sibling) is ours to remove. A symlink the
+            #user pointed somewhere else is replaced, but the directory it pointed to is left alone.
+            target = os.readlink(self.dest_dir)
+            parent, name = os.path.split(self.dest_dir)
+            if os.sep not in target and target.startswith(f".{name}-"):
+                previous = os.path.join(parent, target)
+            else:
+                logger.warning("%s pointed to %s, which is left in place", self.dest_dir, target)
+        elif os.path.exists(self.dest_dir):
+            #A plain directory from before staged builds: move it aside so the symlink can take its name.
+            previous = self.dest_dir + '.previous'
+            os.rename(self.dest_dir, previous)
+        link_path = self.root + '.link'
+        os.symlink(os.path.basename(self.root), link_path)
+        os.replace(link_path, self.dest_dir)
+        if previous and os.path.isdir(previous):
+            shutil.rmtree(previous)
+        for backup in self.backups.values():
+            if backup:
+                os.remove(backup)
+        logger.info("Published %s", self.dest_dir)
+
+    #Throw the staging tree away, leaving dest_dir as it was.
+    def discard(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        for path, backup in self.backups.items():
+            if backup:
+                os.replace(backup, path)
+            elif os.path.exists(path):
+                os.remove(path)